@@ -1,190 +1,316 @@
+import argparse
 import csv
+import heapq
 import json
-from collections import defaultdict
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, combinations, combinations_with_replacement, product
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple, NamedTuple, Callable
 
-# Load the CSV
-print("Loading card database...")
-with open('database/swu_cards.csv', 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    cards = list(reader)
+# Twin Suns decks pair leaders that share one of these aspects
+SIDES = ('Heroism', 'Villainy')
 
-# Filter for leaders only
-leaders = [c for c in cards if c.get('Type') == 'Leader']
+# Rarity points used by the classic ranking
+RARITY_POINTS = {'Special': 2, 'Legendary': 1}
 
-print(f'\n{"="*80}')
-print(f'TWIN SUNS LEADER ANALYSIS')
-print(f'{"="*80}')
-print(f'Total Leaders Found: {len(leaders)}\n')
+DEFAULT_SIZE = 2
+DEFAULT_TOP = 15
+DEFAULT_RECOMMENDED = 5
 
-# Parse aspects and organize leaders
-heroism_leaders = []
-villainy_leaders = []
-aspect_combinations = defaultdict(list)
+# Combinations of this many leaders or more are scored on a process pool
+PARALLEL_MIN_SIZE = 3
 
-for leader in leaders:
-    aspects_str = leader.get('Aspects', '[]')
+# Work units per pool worker, so uneven chunks still balance out
+CHUNKS_PER_WORKER = 4
+
+
+class Leader(NamedTuple):
+    """A leader card with its aspects parsed once and encoded as a bitmask."""
+    index: int
+    name: str
+    subtitle: str
+    set: str
+    number: str
+    aspects: Tuple[str, ...]
+    mask: int
+    rarity: str
+    cost: Any
+    power: Any
+    hp: Any
+
+    @property
+    def full_name(self) -> str:
+        return f'{self.name} - {self.subtitle}' if self.subtitle else self.name
+
+
+class Combination(NamedTuple):
+    """A group of leaders, the aspects they cover together and their score."""
+    score: Tuple[Any, ...]
+    leaders: Tuple[Leader, ...]
+    mask: int
+    aspects: List[str]
+
+
+# A scorer maps (combined aspect mask, number of aspects, leaders) to a sortable
+# tuple; higher ranks first. Scorers must be module-level functions so they can
+# be sent to pool workers.
+Scorer = Callable[[int, int, Tuple[Leader, ...]], Tuple[Any, ...]]
+
+
+def _number(value) -> float:
     try:
-        aspects = json.loads(aspects_str) if aspects_str else []
-    except:
-        aspects = []
-    
-    name = leader.get('Name', 'Unknown')
-    subtitle = leader.get('Subtitle', '')
-    set_code = leader.get('Set', '')
-    number = leader.get('Number', '')
-    rarity = leader.get('Rarity', '')
-    cost = leader.get('Cost', 'N/A')
-    power = leader.get('Power', 'N/A')
-    hp = leader.get('HP', 'N/A')
-    
-    # Check for Heroism (white) or Villainy (black)
-    has_heroism = 'Heroism' in aspects
-    has_villainy = 'Villainy' in aspects
-    
-    leader_info = {
-        'name': name,
-        'subtitle': subtitle,
-        'full_name': f'{name} - {subtitle}' if subtitle else name,
-        'set': set_code,
-        'number': number,
-        'aspects': aspects,
-        'rarity': rarity,
-        'cost': cost,
-        'power': power,
-        'hp': hp,
-        'heroism': has_heroism,
-        'villainy': has_villainy
-    }
-    
-    if has_heroism:
-        heroism_leaders.append(leader_info)
-    if has_villainy:
-        villainy_leaders.append(leader_info)
-    
-    # Track aspect combinations
-    aspect_key = tuple(sorted(aspects))
-    aspect_combinations[aspect_key].append(leader_info)
-
-print(f'Heroism Leaders: {len(heroism_leaders)}')
-print(f'Villainy Leaders: {len(villainy_leaders)}')
-print(f'\n{"="*80}')
-
-# Analyze aspect coverage
-print("\nASPECT COMBINATIONS AVAILABLE:")
-print("-" * 80)
-for aspects, leader_list in sorted(aspect_combinations.items()):
-    if aspects:  # Skip empty aspect sets
-        print(f"{' + '.join(aspects)}: {len(leader_list)} leaders")
-
-print(f'\n{"="*80}')
-print("TOP HEROISM LEADER COMBINATIONS FOR TWIN SUNS")
-print(f'{"="*80}')
-
-# Find best Heroism combinations (max aspect coverage)
-heroism_combos = []
-for i, leader1 in enumerate(heroism_leaders):
-    for leader2 in heroism_leaders[i+1:]:
-        # Combine aspects from both leaders
-        combined_aspects = set(leader1['aspects'] + leader2['aspects'])
-        
-        # Calculate synergy score
-        aspect_count = len(combined_aspects)
-        rarity_score = 0
-        if leader1['rarity'] == 'Special': rarity_score += 2
-        if leader2['rarity'] == 'Special': rarity_score += 2
-        if leader1['rarity'] == 'Legendary': rarity_score += 1
-        if leader2['rarity'] == 'Legendary': rarity_score += 1
-        
-        combo = {
-            'leader1': leader1,
-            'leader2': leader2,
-            'aspects': sorted(combined_aspects),
-            'aspect_count': aspect_count,
-            'rarity_score': rarity_score,
-            'score': aspect_count * 10 + rarity_score
-        }
-        heroism_combos.append(combo)
-
-# Sort by aspect coverage first, then rarity
-heroism_combos.sort(key=lambda x: (x['aspect_count'], x['rarity_score']), reverse=True)
-
-# Display top 15 Heroism combinations
-print("\nTop 15 Heroism Combinations (by aspect coverage):\n")
-for idx, combo in enumerate(heroism_combos[:15], 1):
-    l1 = combo['leader1']
-    l2 = combo['leader2']
-    print(f"{idx}. {l1['full_name']} ({l1['set']}) + {l2['full_name']} ({l2['set']})")
-    print(f"   Aspects: {' + '.join(combo['aspects'])} ({combo['aspect_count']} total)")
-    print(f"   Stats: L1: {l1['cost']}/{l1['power']}/{l1['hp']} | L2: {l2['cost']}/{l2['power']}/{l2['hp']}")
-    print(f"   Rarity: {l1['rarity']} + {l2['rarity']}")
-    print()
-
-print(f'{"="*80}')
-print("TOP VILLAINY LEADER COMBINATIONS FOR TWIN SUNS")
-print(f'{"="*80}')
-
-# Find best Villainy combinations
-villainy_combos = []
-for i, leader1 in enumerate(villainy_leaders):
-    for leader2 in villainy_leaders[i+1:]:
-        # Combine aspects from both leaders
-        combined_aspects = set(leader1['aspects'] + leader2['aspects'])
-        
-        # Calculate synergy score
-        aspect_count = len(combined_aspects)
-        rarity_score = 0
-        if leader1['rarity'] == 'Special': rarity_score += 2
-        if leader2['rarity'] == 'Special': rarity_score += 2
-        if leader1['rarity'] == 'Legendary': rarity_score += 1
-        if leader2['rarity'] == 'Legendary': rarity_score += 1
-        
-        combo = {
-            'leader1': leader1,
-            'leader2': leader2,
-            'aspects': sorted(combined_aspects),
-            'aspect_count': aspect_count,
-            'rarity_score': rarity_score,
-            'score': aspect_count * 10 + rarity_score
-        }
-        villainy_combos.append(combo)
-
-# Sort by aspect coverage first, then rarity
-villainy_combos.sort(key=lambda x: (x['aspect_count'], x['rarity_score']), reverse=True)
-
-# Display top 15 Villainy combinations
-print("\nTop 15 Villainy Combinations (by aspect coverage):\n")
-for idx, combo in enumerate(villainy_combos[:15], 1):
-    l1 = combo['leader1']
-    l2 = combo['leader2']
-    print(f"{idx}. {l1['full_name']} ({l1['set']}) + {l2['full_name']} ({l2['set']})")
-    print(f"   Aspects: {' + '.join(combo['aspects'])} ({combo['aspect_count']} total)")
-    print(f"   Stats: L1: {l1['cost']}/{l1['power']}/{l1['hp']} | L2: {l2['cost']}/{l2['power']}/{l2['hp']}")
-    print(f"   Rarity: {l1['rarity']} + {l2['rarity']}")
-    print()
-
-print(f'{"="*80}')
-print("RECOMMENDED TWIN SUNS DECKS")
-print(f'{"="*80}')
-
-# Recommend specific strong combinations
-print("\n🌟 BEST 3-ASPECT HEROISM COMBOS:")
-heroism_3aspect = [c for c in heroism_combos if c['aspect_count'] == 3]
-for idx, combo in enumerate(heroism_3aspect[:5], 1):
-    l1 = combo['leader1']
-    l2 = combo['leader2']
-    print(f"\n{idx}. {l1['full_name']} + {l2['full_name']}")
-    print(f"   Aspects: {' + '.join(combo['aspects'])}")
-    print(f"   Sets: {l1['set']}, {l2['set']}")
-
-print("\n\n🌟 BEST 3-ASPECT VILLAINY COMBOS:")
-villainy_3aspect = [c for c in villainy_combos if c['aspect_count'] == 3]
-for idx, combo in enumerate(villainy_3aspect[:5], 1):
-    l1 = combo['leader1']
-    l2 = combo['leader2']
-    print(f"\n{idx}. {l1['full_name']} + {l2['full_name']}")
-    print(f"   Aspects: {' + '.join(combo['aspects'])}")
-    print(f"   Sets: {l1['set']}, {l2['set']}")
-
-print(f'\n{"="*80}')
-print("Analysis complete!")
-print(f'{"="*80}')
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def coverage_score(mask: int, aspect_count: int, leaders: Tuple[Leader, ...]) -> Tuple[int, int]:
+    """Aspect coverage first, then rarity (Special 2 points, Legendary 1)."""
+    return aspect_count, sum(RARITY_POINTS.get(leader.rarity, 0) for leader in leaders)
+
+
+def stats_score(mask: int, aspect_count: int, leaders: Tuple[Leader, ...]) -> Tuple[int, float]:
+    """Aspect coverage first, then the leaders' combined Power + HP."""
+    return aspect_count, sum(_number(leader.power) + _number(leader.hp) for leader in leaders)
+
+
+# Scorers selectable from the command line, with how their ranking is described
+SCORERS: Dict[str, Tuple[Scorer, str]] = {
+    'coverage': (coverage_score, "aspect coverage"),
+    'stats': (stats_score, "aspect coverage, then Power + HP"),
+}
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+class AspectBits:
+    """Assigns every aspect a bit. Bits follow alphabetical order, so decoding a mask gives sorted names."""
+
+    def __init__(self, aspects: Iterable[str]):
+        self.names = sorted(set(aspects))
+        self.bits = {name: 1 << bit for bit, name in enumerate(self.names)}
+
+    def mask(self, aspects: Iterable[str]) -> int:
+        mask = 0
+        for aspect in aspects:
+            mask |= self.bits[aspect]
+        return mask
+
+    def decode(self, mask: int) -> List[str]:
+        return [name for name in self.names if mask & self.bits[name]]
+
+
+def parse_aspects(value) -> List[str]:
+    """Aspects of a card, whether a list (JSON database) or JSON-encoded (CSV)."""
+    if isinstance(value, list):
+        return value
+    try:
+        aspects = json.loads(value) if value else []
+    except (ValueError, TypeError):
+        return []
+    return aspects if isinstance(aspects, list) else []
+
+
+def load_leaders(cards: Iterable[Dict[str, Any]]) -> Tuple[List[Leader], AspectBits]:
+    """Pick the leaders out of a card list and encode their aspects."""
+    raw = [(card, parse_aspects(card.get('Aspects', '[]'))) for card in cards if card.get('Type') == 'Leader']
+    bits = AspectBits(aspect for _, aspects in raw for aspect in aspects)
+    leaders = [
+        Leader(index=index, name=card.get('Name', 'Unknown'), subtitle=card.get('Subtitle', ''),
+               set=card.get('Set', ''), number=card.get('Number', ''), aspects=tuple(aspects),
+               mask=bits.mask(aspects), rarity=card.get('Rarity', ''), cost=card.get('Cost', 'N/A'),
+               power=card.get('Power', 'N/A'), hp=card.get('HP', 'N/A'))
+        for index, (card, aspects) in enumerate(raw)
+    ]
+    return leaders, bits
+
+
+def load_csv(path: str = 'database/swu_cards.csv') -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def group_by_mask(leaders: Iterable[Leader]) -> Dict[int, List[Leader]]:
+    """Leaders with identical aspects share a group; groups keep leader order."""
+    groups: Dict[int, List[Leader]] = defaultdict(list)
+    for leader in leaders:
+        groups[leader.mask].append(leader)
+    return dict(groups)
+
+
+def group_combinations(groups: Dict[int, List[Leader]], size: int) -> List[Tuple[Tuple[int, int], ...]]:
+    """Every way to draw `size` leaders from the groups, as ((mask, leaders taken), ...)."""
+    result = []
+    for masks in combinations_with_replacement(sorted(groups), size):
+        taken = tuple(Counter(masks).items())
+        if all(len(groups[mask]) >= count for mask, count in taken):
+            result.append(taken)
+    return result
+
+
+def _rank_key(candidate) -> Tuple[Any, ...]:
+    # Ties go to the lowest leader positions, as in a stable sort of all combinations
+    score, mask, members = candidate
+    return score, tuple(-leader.index for leader in members)
+
+
+def _top_candidates(groups: Dict[int, List[Leader]], group_combos: Sequence[Tuple[Tuple[int, int], ...]],
+                    k: Optional[int], scorer: Scorer, aspect_count: Optional[int]) -> List[tuple]:
+    """Best (score, mask, leaders) candidates drawn from the given group combinations.
+
+    The union mask and its aspect count are computed once per group
+    combination, not per leader combination, and only the best k
+    candidates are ever held.
+    """
+    def candidates():
+        for taken in group_combos:
+            mask = 0
+            for group_mask, _ in taken:
+                mask |= group_mask
+            count = popcount(mask)
+            if aspect_count is not None and count != aspect_count:
+                continue
+            for parts in product(*(combinations(groups[group_mask], n) for group_mask, n in taken)):
+                members = tuple(sorted(chain.from_iterable(parts)))
+                yield scorer(mask, count, members), mask, members
+
+    if k is None:
+        return sorted(candidates(), key=_rank_key, reverse=True)
+    return heapq.nlargest(k, candidates(), key=_rank_key)
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(groups, k, scorer, aspect_count):
+    _worker_state.update(groups=groups, k=k, scorer=scorer, aspect_count=aspect_count)
+
+
+def _top_in_chunk(group_combos):
+    state = _worker_state
+    return _top_candidates(state['groups'], group_combos, state['k'], state['scorer'], state['aspect_count'])
+
+
+def top_combinations(leaders: Sequence[Leader], bits: AspectBits, size: int = DEFAULT_SIZE,
+                     k: Optional[int] = DEFAULT_TOP, scorer: Scorer = coverage_score,
+                     aspect_count: Optional[int] = None, workers: Optional[int] = None) -> List[Combination]:
+    """The k best combinations of `size` distinct leaders, best first (k=None for all).
+
+    With `aspect_count`, only combinations covering exactly that many
+    aspects are considered. Ties keep the order of a stable sort over all
+    combinations generated in leader order. Combinations of
+    PARALLEL_MIN_SIZE or more leaders are spread over `workers` processes
+    (default: one per CPU); workers=1 always runs in this process.
+    """
+    groups = group_by_mask(leaders)
+    group_combos = group_combinations(groups, size)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if size >= PARALLEL_MIN_SIZE else 1
+
+    if workers <= 1 or len(group_combos) < 2:
+        ranked = _top_candidates(groups, group_combos, k, scorer, aspect_count)
+    else:
+        chunk_count = min(len(group_combos), workers * CHUNKS_PER_WORKER)
+        chunks = [group_combos[i::chunk_count] for i in range(chunk_count)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(groups, k, scorer, aspect_count)) as pool:
+            partial = chain.from_iterable(pool.map(_top_in_chunk, chunks))
+            # Rank keys are unique, so merging per-chunk winners gives the exact top k
+            ranked = (sorted(partial, key=_rank_key, reverse=True) if k is None
+                      else heapq.nlargest(k, partial, key=_rank_key))
+
+    return [Combination(score, members, mask, bits.decode(mask)) for score, mask, members in ranked]
+
+
+def side_leaders(leaders: Iterable[Leader], side: str) -> List[Leader]:
+    """Leaders with the given aspect (Heroism or Villainy)."""
+    return [leader for leader in leaders if side in leader.aspects]
+
+
+def print_report(leaders: List[Leader], bits: AspectBits, size: int = DEFAULT_SIZE, top: int = DEFAULT_TOP,
+                 recommended: int = DEFAULT_RECOMMENDED, scorer_name: str = 'coverage',
+                 workers: Optional[int] = None) -> None:
+    """Print the leader overview, the best combinations per side and the recommended decks."""
+    scorer, ranking = SCORERS[scorer_name]
+    pools = {side: side_leaders(leaders, side) for side in SIDES}
+
+    print(f'\n{"="*80}')
+    print(f'TWIN SUNS LEADER ANALYSIS')
+    print(f'{"="*80}')
+    print(f'Total Leaders Found: {len(leaders)}\n')
+    for side in SIDES:
+        print(f'{side} Leaders: {len(pools[side])}')
+    print(f'\n{"="*80}')
+
+    aspect_combinations = Counter(tuple(sorted(leader.aspects)) for leader in leaders)
+    print("\nASPECT COMBINATIONS AVAILABLE:")
+    print("-" * 80)
+    for aspects, count in sorted(aspect_combinations.items()):
+        if aspects:  # Skip empty aspect sets
+            print(f"{' + '.join(aspects)}: {count} leaders")
+
+    for side in SIDES:
+        print(f'\n{"="*80}' if side == SIDES[0] else f'{"="*80}')
+        print(f"TOP {side.upper()} LEADER COMBINATIONS FOR TWIN SUNS")
+        print(f'{"="*80}')
+        print(f"\nTop {top} {side} Combinations (by {ranking}):\n")
+        best = top_combinations(pools[side], bits, size, top, scorer, workers=workers)
+        for idx, combo in enumerate(best, 1):
+            print(f"{idx}. " + " + ".join(f"{leader.full_name} ({leader.set})" for leader in combo.leaders))
+            print(f"   Aspects: {' + '.join(combo.aspects)} ({len(combo.aspects)} total)")
+            print("   Stats: " + " | ".join(f"L{n}: {leader.cost}/{leader.power}/{leader.hp}"
+                                            for n, leader in enumerate(combo.leaders, 1)))
+            print(f"   Rarity: {' + '.join(leader.rarity for leader in combo.leaders)}")
+            print()
+
+    print(f'{"="*80}')
+    print("RECOMMENDED TWIN SUNS DECKS")
+    print(f'{"="*80}')
+
+    # Leaders usually have their side's aspect plus one more, so size + 1 is full coverage
+    full_coverage = size + 1
+    for side in SIDES:
+        print(f"\n🌟 BEST {full_coverage}-ASPECT {side.upper()} COMBOS:" if side == SIDES[0]
+              else f"\n\n🌟 BEST {full_coverage}-ASPECT {side.upper()} COMBOS:")
+        best = top_combinations(pools[side], bits, size, recommended, scorer,
+                                aspect_count=full_coverage, workers=workers)
+        for idx, combo in enumerate(best, 1):
+            print(f"\n{idx}. " + " + ".join(leader.full_name for leader in combo.leaders))
+            print(f"   Aspects: {' + '.join(combo.aspects)}")
+            print(f"   Sets: {', '.join(leader.set for leader in combo.leaders)}")
+
+    print(f'\n{"="*80}')
+    print("Analysis complete!")
+    print(f'{"="*80}')
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Find the best Twin Suns leader combinations.")
+    parser.add_argument('--csv', default='database/swu_cards.csv', help="card database CSV (default: database/swu_cards.csv)")
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help=f"leaders per combination (default: {DEFAULT_SIZE})")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f"combinations to list per side (default: {DEFAULT_TOP})")
+    parser.add_argument('--recommended', type=int, default=DEFAULT_RECOMMENDED,
+                        help=f"full-coverage combinations to recommend per side (default: {DEFAULT_RECOMMENDED})")
+    parser.add_argument('--scorer', choices=sorted(SCORERS), default='coverage', help="ranking (default: coverage)")
+    parser.add_argument('--workers', type=int,
+                        help=f"processes for combinations of {PARALLEL_MIN_SIZE}+ leaders (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if args.size < 1:
+        parser.error("--size must be at least 1")
+    return args
+
+
+def main(argv=None):
+    """Load the leaders and print the Twin Suns analysis."""
+    args = parse_args(argv)
+    print("Loading card database...")
+    leaders, bits = load_leaders(load_csv(args.csv))
+    print_report(leaders, bits, args.size, args.top, args.recommended, args.scorer, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterable, Tuple
+from urllib.parse import urlparse
+
+ART_DIR = "art"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "downloads.jsonl"
+
+# Card fields holding art URLs, by the side they show
+ART_FIELDS = {'front': 'FrontArt', 'back': 'BackArt'}
+
+DEFAULT_THUMBNAIL_SIZE = 300
+THUMBNAIL_QUALITY = 85
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArtDownloadError(Exception):
+    """An image could not be downloaded intact."""
+
+
+def art_key(card: Dict[str, Any]) -> str:
+    return f"{card.get('Set')}/{card.get('Number')}"
+
+
+def object_path(art_dir, digest: str, suffix: str) -> Path:
+    """Where an image with this SHA-256 is stored (objects/ab/abcdef....png)."""
+    return Path(art_dir) / "objects" / digest[:2] / f"{digest}{suffix}"
+
+
+def thumbnail_path(art_dir, digest: str, size: int) -> Path:
+    return Path(art_dir) / "thumbs" / f"{digest}_{size}.jpg"
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadIndex:
+    """Append-only record of downloaded URLs: url -> {'sha256', 'bytes', 'suffix'}.
+
+    Every completed download is appended as one JSON line, so an
+    interrupted mirror run knows what it already has. A truncated last
+    line is dropped on load.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        valid_length = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry['url']] = entry
+                except (ValueError, KeyError):
+                    break
+                valid_length += len(line)
+        if valid_length != self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_length)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self.entries[entry['url']] = entry
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def download(client, url: str, art_dir) -> Dict[str, Any]:
+    """Download one image into the content-addressed store and return its index entry.
+
+    The body is hashed while it streams to a temporary file, checked against
+    Content-Length, and renamed to its digest. If the store already has
+    that digest (the same image under another URL), the copy is discarded.
+    """
+    tmp_dir = Path(art_dir) / "tmp"
+    tmp_path = tmp_dir / uuid.uuid4().hex
+    client.limiter.wait()
+    try:
+        with client.session.get(url, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                raise ArtDownloadError(f"{url}: HTTP {response.status_code}")
+            digest = hashlib.sha256()
+            size = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            expected = response.headers.get('Content-Length')
+            if expected is not None and int(expected) != size:
+                raise ArtDownloadError(f"{url}: got {size} of {expected} bytes")
+
+        suffix = Path(urlparse(url).path).suffix.lower() or ".bin"
+        sha = digest.hexdigest()
+        final = object_path(art_dir, sha, suffix)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        if final.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, final)
+        return {'url': url, 'sha256': sha, 'bytes': size, 'suffix': suffix}
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def make_thumbnail(job: Tuple[str, str, int]) -> Optional[str]:
+    """Write a JPEG thumbnail no larger than size x size; returns an error message or None.
+
+    Runs in a worker process.
+    """
+    source, target, size = job
+    try:
+        from PIL import Image
+        with Image.open(source) as image:
+            image.thumbnail((size, size))
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            tmp_path = f"{target}.tmp"
+            image.save(tmp_path, 'JPEG', quality=THUMBNAIL_QUALITY)
+        os.replace(tmp_path, target)
+        return None
+    except Exception as e:
+        return f"{source}: {e}"
+
+
+def card_art_urls(cards: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """{card key: {side: url}} for every card with art."""
+    urls = {}
+    for card in cards:
+        sides = {side: card[field] for side, field in ART_FIELDS.items() if card.get(field)}
+        if sides:
+            urls[art_key(card)] = sides
+    return urls
+
+
+def mirror_art(cards: Iterable[Dict[str, Any]], client, art_dir=ART_DIR, workers: int = 8,
+               thumbnail_size: Optional[int] = DEFAULT_THUMBNAIL_SIZE, verify: bool = False) -> Dict[str, Any]:
+    """Mirror all card art into `art_dir` and write its manifest; returns the manifest.
+
+    Each distinct URL is downloaded once by a pool of `workers` threads
+    sharing the client's request budget. Images are stored by SHA-256, so
+    identical images (e.g. across variants) are stored once. URLs already
+    in the download index whose object is present are skipped, so
+    re-running resumes an interrupted mirror; with `verify`, every stored
+    object is re-hashed first and damaged ones are downloaded again.
+    Thumbnails (if `thumbnail_size`) are made on a process pool.
+    """
+    art_dir = Path(art_dir)
+    (art_dir / "tmp").mkdir(parents=True, exist_ok=True)
+    card_urls = card_art_urls(cards)
+    urls = list(dict.fromkeys(url for sides in card_urls.values() for url in sides.values()))
+    index = DownloadIndex(art_dir / INDEX_FILE)
+
+    checked: Dict[Path, bool] = {}
+
+    def have(url):
+        entry = index.entries.get(url)
+        if entry is None:
+            return False
+        path = object_path(art_dir, entry['sha256'], entry['suffix'])
+        if path not in checked:
+            checked[path] = path.exists() and path.stat().st_size == entry['bytes'] and (
+                not verify or sha256_file(path) == entry['sha256'])
+            if not checked[path] and path.exists():
+                print(f"Corrupt image {path.name}, downloading again")
+                path.unlink()
+        return checked[path]
+
+    todo = [url for url in urls if not have(url)]
+    print(f"\nMirroring art: {len(urls)} image URLs, {len(urls) - len(todo)} already stored, {len(todo)} to download")
+
+    failures = []
+    downloaded, downloaded_bytes = 0, 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(download, client, url, art_dir): url for url in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failures.append(f"{futures[future]}: {e}" if not isinstance(e, ArtDownloadError) else str(e))
+                    continue
+                index.record(entry)
+                downloaded += 1
+                downloaded_bytes += entry['bytes']
+                if done % 100 == 0:
+                    print(f"Progress: {done}/{len(todo)} images")
+    finally:
+        index.close()
+
+    stored = {url: index.entries[url] for url in urls if url in index.entries}
+    digests = {entry['sha256']: entry for entry in stored.values()}
+
+    if thumbnail_size:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("Pillow is not installed; skipping thumbnails (pip install Pillow)")
+            thumbnail_size = None
+    if thumbnail_size:
+        (art_dir / "thumbs").mkdir(exist_ok=True)
+        jobs = [(str(object_path(art_dir, sha, entry['suffix'])), str(thumbnail_path(art_dir, sha, thumbnail_size)),
+                 thumbnail_size)
+                for sha, entry in digests.items() if not thumbnail_path(art_dir, sha, thumbnail_size).exists()]
+        if jobs:
+            print(f"Making {len(jobs)} thumbnails...")
+            with ProcessPoolExecutor(max_workers=max(1, min(workers, os.cpu_count() or 1))) as pool:
+                failures.extend(error for error in pool.map(make_thumbnail, jobs, chunksize=8) if error)
+
+    manifest = {'images': len(digests), 'bytes': sum(entry['bytes'] for entry in digests.values()), 'cards': {}}
+    for key, sides in card_urls.items():
+        card_art = {}
+        for side, url in sides.items():
+            entry = stored.get(url)
+            if entry is None:
+                continue
+            sha = entry['sha256']
+            local = {'url': url, 'sha256': sha,
+                     'path': object_path(art_dir, sha, entry['suffix']).relative_to(art_dir).as_posix()}
+            thumb = thumbnail_path(art_dir, sha, thumbnail_size) if thumbnail_size else None
+            if thumb is not None and thumb.exists():
+                local['thumbnail'] = thumb.relative_to(art_dir).as_posix()
+            card_art[side] = local
+        if card_art:
+            manifest['cards'][key] = card_art
+
+    tmp_manifest = art_dir / (MANIFEST_FILE + ".tmp")
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, art_dir / MANIFEST_FILE)
+
+    print(f"Downloaded {downloaded} images ({downloaded_bytes / (1024 * 1024):.1f} MB); "
+          f"{len(urls)} URLs stored as {len(digests)} distinct images ({manifest['bytes'] / (1024 * 1024):.1f} MB)")
+    if failures:
+        print(f"{len(failures)} failures (run again to retry):")
+        for failure in failures[:10]:
+            print(f"  {failure}")
+    print(f"Art manifest saved to: {art_dir / MANIFEST_FILE}")
+    manifest['failures'] = failures
+    return manifest
@@ -0,0 +1,196 @@
+"""Load-test the card HTTP service (serve_cards.py) with many concurrent keep-alive clients.
+
+Usage: python -m benchmarks.load_test [--url http://127.0.0.1:8080] [--clients 64] [--duration 10]
+
+Without --url, a server is started on a free port for the run. Each client
+sends requests back to back on one connection, drawn from a mix of card
+lookups, filtered searches, text searches, leader lists and stats built
+from the local database, and the run reports requests per second and
+latency percentiles overall and per kind of request.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import quote, urlencode, urlsplit
+
+DEFAULT_CLIENTS = 64
+DEFAULT_DURATION = 10.0
+DEFAULT_DB = "database/swu_cards.json"
+SERVER_SCRIPT = Path(__file__).resolve().parent.parent / "serve_cards.py"
+
+# Relative frequency of each kind of request
+REQUEST_MIX = {'card': 50, 'filter': 20, 'search': 10, 'leaders': 10, 'stats': 5, 'page': 5}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class RequestMix:
+    """Random request targets, drawn from the cards of a database."""
+
+    def __init__(self, cards, seed=0):
+        self.rng = random.Random(seed)
+        self.cards = cards
+        self.kinds = list(REQUEST_MIX)
+        self.weights = list(REQUEST_MIX.values())
+
+        def values(field):
+            found = set()
+            for card in cards:
+                value = card.get(field)
+                found.update(value if isinstance(value, list) else [value] if value else [])
+            return sorted(found)
+
+        self.sets, self.types, self.traits = values('Set'), values('Type'), values('Traits')
+        self.aspects = values('Aspects')
+        self.words = sorted({word for card in cards for word in card.get('Name', '').split() if len(word) > 3})
+
+    def next(self):
+        """(kind, target) of the next request."""
+        rng = self.rng
+        kind = rng.choices(self.kinds, self.weights)[0]
+        if kind == 'card':
+            card = rng.choice(self.cards)
+            target = f"/cards/{quote(card['Set'])}/{quote(str(card['Number']))}"
+        elif kind == 'filter':
+            params = {'type': rng.choice(self.types), 'trait': rng.choice(self.traits)}
+            if rng.random() < 0.5:
+                params['max_cost'] = rng.randint(1, 6)
+            target = f"/cards?{urlencode(params)}"
+        elif kind == 'search':
+            target = f"/cards?{urlencode({'q': rng.choice(self.words), 'per_page': 20})}"
+        elif kind == 'leaders':
+            target = f"/leaders?{urlencode({'aspect': rng.choice(self.aspects)})}"
+        elif kind == 'stats':
+            target = f"/stats?{urlencode({'set': rng.choice(self.sets)})}"
+        else:
+            target = f"/cards?{urlencode({'set': rng.choice(self.sets), 'page': rng.randint(1, 5)})}"
+        return kind, target
+
+
+async def read_response(reader):
+    """(status, body length) of one HTTP/1.1 response with a Content-Length."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status, length
+
+
+async def client(host, port, mix, deadline, results, gzip):
+    """Send requests on one connection until the deadline, reconnecting if it drops."""
+    encoding = "Accept-Encoding: gzip\r\n" if gzip else ""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        kind, target = mix.next()
+        request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n{encoding}\r\n".encode('latin-1')
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, size = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            results['errors'].append(f"{target}: {e!r}")
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        results['latency'][kind].append(time.perf_counter() - start)
+        results['bytes'] += size
+        if status >= 500:
+            results['errors'].append(f"{target}: HTTP {status}")
+        results['status'][status] += 1
+    if writer is not None:
+        writer.close()
+
+
+async def run(host, port, mix, clients, duration, gzip):
+    results = {'latency': defaultdict(list), 'status': defaultdict(int), 'errors': [], 'bytes': 0}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(host, port, mix, deadline, results, gzip) for _ in range(clients)))
+    results['elapsed'] = time.perf_counter() - started
+    return results
+
+
+def start_server(db_path):
+    """Start serve_cards.py on a free port; returns (process, host, port)."""
+    process = subprocess.Popen([sys.executable, '-u', str(SERVER_SCRIPT), '--port', '0', '--db', str(db_path)],
+                               stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.startswith("Serving"):
+            address = urlsplit(line.split(" on ")[-1].strip())
+            return process, address.hostname, address.port
+    process.wait()
+    raise SystemExit(f"serve_cards.py exited with status {process.returncode}")
+
+
+def report(results, clients):
+    latencies = sorted(value for values in results['latency'].values() for value in values)
+    total = len(latencies)
+    elapsed = results['elapsed']
+    print(f"\n{total} requests from {clients} clients in {elapsed:.1f}s: {total / elapsed:,.0f} requests/s, "
+          f"{results['bytes'] / elapsed / (1024 * 1024):.1f} MB/s")
+    print("Status codes: " + ", ".join(f"{status}: {count}" for status, count in sorted(results['status'].items())))
+    print(f"\n{'Request':<10} {'count':>8} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    rows = [(kind, sorted(values)) for kind, values in sorted(results['latency'].items())] + [('all', latencies)]
+    for kind, values in rows:
+        print(f"{kind:<10} {len(values):>8} {percentile(values, 0.5) * 1000:>9.2f} "
+              f"{percentile(values, 0.9) * 1000:>9.2f} {percentile(values, 0.99) * 1000:>9.2f} "
+              f"{(values[-1] if values else 0) * 1000:>9.2f}")
+    if results['errors']:
+        print(f"\n{len(results['errors'])} errors, e.g.:")
+        for error in results['errors'][:5]:
+            print(f"  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="server to test (default: start one for the run)")
+    parser.add_argument('--db', default=DEFAULT_DB, help=f"database to draw requests from (default: {DEFAULT_DB})")
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS, help="concurrent connections")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="seconds to run")
+    parser.add_argument('--no-gzip', action='store_true', help="don't ask for gzipped responses")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.db, 'r', encoding='utf-8') as f:
+        mix = RequestMix(json.load(f), args.seed)
+
+    process = None
+    if args.url:
+        address = urlsplit(args.url)
+        host, port = address.hostname, address.port or 80
+    else:
+        process, host, port = start_server(args.db)
+    try:
+        print(f"Load testing http://{host}:{port} with {args.clients} clients for {args.duration:g}s...")
+        results = asyncio.run(run(host, port, mix, args.clients, args.duration, not args.no_gzip))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    report(results, args.clients)
+    if results['errors']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measure the memory held by a loaded card database, as dicts and as compact Card records.
+
+Usage: python -m benchmarks.memory [path/to/swu_cards.json]
+
+Each mode is measured in a fresh interpreter: tracemalloc reports the bytes
+still allocated once the cards are loaded, and the peak resident set size
+comes from getrusage.
+"""
+import argparse
+import gc
+import json
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+from query_cards import CardPacker
+
+MODES = ('dict', 'compact')
+
+
+def measure(db_path, mode):
+    """Return (retained bytes, card count, peak RSS in KB) for one load in this process."""
+    gc.collect()
+    tracemalloc.start()
+    with open(db_path, 'r', encoding='utf-8') as f:
+        cards = json.load(f)
+    if mode == 'compact':
+        cards = CardPacker().pack_all(cards)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return retained, len(cards), peak_rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path', nargs='?', default="database/swu_cards.json")
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: measure one mode and report as JSON
+        print(json.dumps(measure(args.db_path, args.mode)))
+        return
+
+    results = {}
+    for mode in MODES:
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.memory', args.db_path, '--mode', mode],
+                                check=True, capture_output=True, text=True).stdout
+        results[mode] = json.loads(output)
+
+    print(f"{'Representation':<16} {'retained (KB)':>14} {'per card (B)':>13} {'peak RSS (KB)':>14}")
+    for mode, (retained, count, peak_rss) in results.items():
+        print(f"{mode:<16} {retained / 1024:>14.1f} {retained / count:>13.0f} {peak_rss:>14}")
+    ratio = results['dict'][0] / results['compact'][0]
+    print(f"\nCompact records use {ratio:.1f}x less memory than dicts.")
+
+
+if __name__ == "__main__":
+    main()
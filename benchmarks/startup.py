@@ -0,0 +1,46 @@
+"""Compare SWUCardDatabase startup from the JSON file and from the binary snapshot.
+
+Usage: python -m benchmarks.startup [path/to/swu_cards.json] [--repeat N]
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from card_snapshot import snapshot_path_for, write_snapshot
+from query_cards import SWUCardDatabase
+
+
+def time_startup(db_path, use_snapshot, repeat):
+    """Best and median seconds to construct the database and answer one lookup."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db = SWUCardDatabase(db_path, use_snapshot=use_snapshot, quiet=True)
+        db.get_card("SOR", 10)
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('db_path', nargs='?', default="database/swu_cards.json")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot_path = snapshot_path_for(args.db_path)
+    if not snapshot_path.exists():
+        with open(args.db_path, 'r', encoding='utf-8') as f:
+            write_snapshot(json.load(f), snapshot_path, args.db_path)
+
+    print(f"JSON:     {Path(args.db_path).stat().st_size / 1024:.1f} KB")
+    print(f"Snapshot: {snapshot_path.stat().st_size / 1024:.1f} KB")
+    print(f"\n{'Loader':<10} {'best (ms)':>10} {'median (ms)':>12}")
+    for label, use_snapshot in (("JSON", False), ("Snapshot", True)):
+        best, median = time_startup(args.db_path, use_snapshot, args.repeat)
+        print(f"{label:<10} {best * 1000:>10.2f} {median * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
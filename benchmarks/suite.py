@@ -0,0 +1,220 @@
+"""Time the main code paths on synthetic databases of 1x, 10x and 100x the real size.
+
+Usage: python -m benchmarks.suite [--scales 1 10 100] [--only NAME ...]
+                                  [--save-baseline FILE] [--baseline FILE]
+
+Every benchmark is run up to --repeat times (at least once, and no more
+than fits in --time-budget seconds) and reports its best and median
+time. One further run under tracemalloc gives its peak Python memory.
+With --baseline, medians and peaks are compared with a saved run and
+anything more than --threshold slower or larger is flagged as a
+regression (exit status 1). Baselines are only comparable on the same
+machine.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from analyze_twin_suns import load_csv, load_leaders, side_leaders, top_combinations
+from benchmarks.synthetic import DEFAULT_SOURCE, generate_database
+from query_cards import SWUCardDatabase
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 5
+DEFAULT_TIME_BUDGET = 5.0
+DEFAULT_THRESHOLD = 0.15
+
+# Lookups and queries per benchmark run, drawn once from the database
+QUERY_COUNT = 200
+
+
+class Workload:
+    """One synthetic database and the query arguments the benchmarks use on it."""
+
+    def __init__(self, json_path, seed=0):
+        self.json_path = json_path
+        self.csv_path = json_path.with_suffix('.csv')
+        with open(json_path, 'r', encoding='utf-8') as f:
+            self.cards = json.load(f)
+        self.db = SWUCardDatabase(json_path, use_snapshot=False, quiet=True)
+
+        rng = random.Random(seed)
+        sample = [rng.choice(self.cards) for _ in range(QUERY_COUNT)]
+        self.keys = [(card['Set'], card['Number']) for card in sample]
+        self.names = [rng.choice(card['Name'].split()) for card in sample[:20]]
+
+        def values(field, many=False):
+            found = {value for card in self.cards
+                     for value in ((card.get(field) or []) if many else [card.get(field)]) if value}
+            return sorted(found)
+
+        self.values = {
+            'set': values('Set'), 'type': values('Type'), 'rarity': values('Rarity'),
+            'trait': values('Traits', True), 'aspect': values('Aspects', True),
+            'keyword': values('Keywords', True), 'arena': values('Arenas', True),
+        }
+        self.leaders, self.bits = load_leaders(self.cards)
+
+
+def bench_load_json(w):
+    with open(w.json_path, 'r', encoding='utf-8') as f:
+        json.load(f)
+
+
+def bench_load_csv(w):
+    load_csv(w.csv_path)
+
+
+def bench_open_database(w):
+    SWUCardDatabase(w.json_path, use_snapshot=False, quiet=True)
+
+
+def bench_get_card(w):
+    for set_code, number in w.keys:
+        w.db.get_card(set_code, number)
+
+
+def bench_search_by_name(w):
+    for name in w.names:
+        w.db.search_by_name(name)
+
+
+def _filter_bench(kind):
+    def bench(w):
+        method = getattr(w.db, f"filter_by_{kind}")
+        for value in w.values[kind]:
+            method(value)
+    bench.__name__ = f"bench_filter_by_{kind}"
+    return bench
+
+
+def bench_filter_by_cost(w):
+    for low in range(0, 8):
+        w.db.filter_by_cost(low, low + 2)
+
+
+def bench_summary_stats(w):
+    # Imported here: fetch_cards pulls in requests and BeautifulSoup
+    from fetch_cards import create_summary_stats
+    create_summary_stats(w.cards)
+
+
+def bench_save_database(w):
+    from fetch_cards import save_database
+    with tempfile.TemporaryDirectory() as output_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_database(w.cards, output_dir)
+
+
+def bench_twin_suns_pairs(w):
+    for side in ('Heroism', 'Villainy'):
+        top_combinations(side_leaders(w.leaders, side), w.bits, size=2, k=10, workers=1)
+
+
+BENCHMARKS = {
+    'load_json': bench_load_json,
+    'load_csv': bench_load_csv,
+    'open_database': bench_open_database,
+    'get_card': bench_get_card,
+    'search_by_name': bench_search_by_name,
+    **{f"filter_by_{kind}": _filter_bench(kind)
+       for kind in ('set', 'type', 'rarity', 'trait', 'aspect', 'keyword', 'arena')},
+    'filter_by_cost': bench_filter_by_cost,
+    'summary_stats': bench_summary_stats,
+    'save_database': bench_save_database,
+    'twin_suns_pairs': bench_twin_suns_pairs,
+}
+
+
+def run_benchmark(bench, workload, repeat, time_budget):
+    """{'best', 'median' (seconds), 'runs', 'peak_kb'} for one benchmark."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat and (not timings or time.perf_counter() - started < time_budget):
+        start = time.perf_counter()
+        bench(workload)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        bench(workload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'best': min(timings), 'median': statistics.median(timings), 'runs': len(timings),
+            'peak_kb': peak / 1024}
+
+
+def compare(result, baseline, threshold):
+    """Regression notes for one benchmark against its baseline ('' if none)."""
+    if not baseline:
+        return "new"
+    notes = []
+    for field, label in (('median', 'time'), ('peak_kb', 'memory')):
+        if baseline[field] and result[field] > baseline[field] * (1 + threshold):
+            notes.append(f"{label} +{(result[field] / baseline[field] - 1) * 100:.0f}%")
+    return "REGRESSION " + ", ".join(notes) if notes else f"{result['median'] / baseline['median']:.2f}x"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help="database sizes as multiples of the real one (default: 1 10 100)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), metavar='NAME',
+                        help="run only these benchmarks")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help=f"real database to model (default: {DEFAULT_SOURCE})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="stop repeating a benchmark after this many seconds")
+    parser.add_argument('--save-baseline', metavar='FILE', help="write the results to FILE")
+    parser.add_argument('--baseline', metavar='FILE', help="compare with results saved by --save-baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative slowdown or growth counted as a regression (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    regressions = 0
+    for scale in args.scales:
+        scale_key = f"x{scale:g}"
+        print(f"Preparing {scale_key} database...")
+        workload = Workload(generate_database(scale, args.source))
+        print(f"\n{scale_key}: {len(workload.cards)} cards, {len(workload.leaders)} leaders")
+        print(f"{'Benchmark':<20} {'best (ms)':>11} {'median (ms)':>12} {'runs':>5} {'peak (KB)':>11}  vs baseline")
+        results[scale_key] = {}
+        for name in names:
+            result = run_benchmark(BENCHMARKS[name], workload, args.repeat, args.time_budget)
+            results[scale_key][name] = result
+            status = compare(result, baseline.get(scale_key, {}).get(name), args.threshold) if baseline else ""
+            regressions += status.startswith("REGRESSION")
+            print(f"{name:<20} {result['best'] * 1000:>11.2f} {result['median'] * 1000:>12.2f} "
+                  f"{result['runs']:>5} {result['peak_kb']:>11.0f}  {status}")
+        print()
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'created': datetime.now(timezone.utc).isoformat(), 'python': platform.python_version(),
+                       'machine': platform.machine(), 'results': results}, f, indent=2)
+        print(f"Baseline saved to: {args.save_baseline}")
+    if baseline:
+        print(f"{regressions} regressions (threshold {args.threshold:.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Generate synthetic card databases modeled on the real one, at any multiple of its size.
+
+Usage: python -m benchmarks.synthetic --scale 10 [--source database/swu_cards.json] [--output DIR]
+
+Synthetic set i is modeled on real set i (cycling through them): it has
+the same size, and each of its cards starts from a random card of that set,
+which keeps the joint distribution of Type, Rarity, Aspects, Arenas, Cost,
+Power, HP and which fields are present. Names, subtitles, traits,
+keywords, rules text and artists are redrawn from the whole database, and
+prices are jittered, so text searches and indexes see realistic variety
+rather than copies. The output is written with save_database, like a real
+build.
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import random
+from collections import defaultdict
+from itertools import product
+from pathlib import Path
+from string import ascii_uppercase
+
+from card_snapshot import file_digest
+
+DEFAULT_SOURCE = "database/swu_cards.json"
+DEFAULT_SEED = 1553
+DATA_DIR = Path(__file__).parent / "data"
+
+# Redrawn independently per card from all cards of the same type
+RESAMPLED_FIELDS = ('Subtitle', 'Traits', 'Keywords', 'FrontText', 'BackText', 'EpicAction', 'Artist')
+PRICE_FIELDS = ('MarketPrice', 'LowPrice', 'FoilPrice', 'LowFoilPrice')
+ART_URL = "https://cdn.swu-db.com/images/cards/{set}/{number}{suffix}.png"
+
+
+def set_codes():
+    """Three-letter set codes in order: AAA, AAB, ..."""
+    for letters in product(ascii_uppercase, repeat=3):
+        yield ''.join(letters)
+
+
+def _jitter_price(value, rng):
+    try:
+        price = float(value)
+    except (ValueError, TypeError):
+        return value
+    return f"{price * rng.lognormvariate(0, 0.25):.2f}"
+
+
+class CardModel:
+    """Field distributions of a real card database, to draw synthetic cards from."""
+
+    def __init__(self, cards):
+        self.sets = defaultdict(list)
+        for card in cards:
+            self.sets[card.get('Set', 'UNKNOWN')].append(card)
+        self.set_order = list(self.sets)
+
+        # Values of each field per card type, from the cards that have it
+        self.pools = defaultdict(lambda: defaultdict(list))
+        self.name_words = defaultdict(lambda: ([], []))
+        for card in cards:
+            pools = self.pools[card.get('Type')]
+            for field in RESAMPLED_FIELDS:
+                if card.get(field) is not None:
+                    pools[field].append(card[field])
+            words = card.get('Name', '').split()
+            if words:
+                heads, tails = self.name_words[card.get('Type')]
+                heads.append(words[0])
+                tails.append(' '.join(words[1:]))
+
+    def _name(self, card_type, rng):
+        heads, tails = self.name_words[card_type]
+        if not heads:
+            return 'Unknown'
+        return ' '.join(part for part in (rng.choice(heads), rng.choice(tails)) if part)
+
+    def card(self, template, set_code, number, rng):
+        """A new card shaped like `template`, placed at set_code/number."""
+        card = copy.deepcopy(template)
+        card_type = card.get('Type')
+        card['Set'] = set_code
+        card['Number'] = f"{number:03d}"
+        card['Name'] = self._name(card_type, rng)
+        for field, pool in self.pools[card_type].items():
+            # Only fields the template has are redrawn, so presence rates stay as they are
+            if card.get(field) is not None:
+                card[field] = copy.deepcopy(rng.choice(pool))
+        for field in PRICE_FIELDS:
+            if card.get(field) is not None:
+                card[field] = _jitter_price(card[field], rng)
+        for field, suffix in (('FrontArt', ''), ('BackArt', '-b')):
+            if card.get(field):
+                card[field] = ART_URL.format(set=set_code, number=card['Number'], suffix=suffix)
+        return card
+
+    def generate(self, count, seed=DEFAULT_SEED):
+        """`count` synthetic cards in sets shaped like the real ones, in database order."""
+        rng = random.Random(seed)
+        cards = []
+        codes = set_codes()
+        set_index = 0
+        while len(cards) < count:
+            real_set = self.sets[self.set_order[set_index % len(self.set_order)]]
+            set_code = next(codes)
+            size = min(len(real_set), count - len(cards))
+            cards.extend(self.card(rng.choice(real_set), set_code, number, rng) for number in range(1, size + 1))
+            set_index += 1
+        return cards
+
+
+def load_cards(path=DEFAULT_SOURCE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def generate_database(scale, source=DEFAULT_SOURCE, output_dir=None, seed=DEFAULT_SEED):
+    """Write a synthetic database of `scale` x the source's cards; returns the path of its JSON file.
+
+    The result is reused while the source, scale and seed stay the same.
+    """
+    # Imported here: fetch_cards pulls in requests and BeautifulSoup
+    from fetch_cards import save_database
+
+    output_dir = Path(output_dir) if output_dir else DATA_DIR / f"x{scale:g}"
+    json_path = output_dir / "swu_cards.json"
+    stamp_path = output_dir / "synthetic.json"
+    stamp = {'source_digest': file_digest(source).hex(), 'scale': scale, 'seed': seed}
+    if json_path.exists() and stamp_path.exists():
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == stamp:
+                return json_path
+
+    source_cards = load_cards(source)
+    cards = CardModel(source_cards).generate(round(len(source_cards) * scale), seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_database(cards, output_dir)
+    with open(stamp_path, 'w', encoding='utf-8') as f:
+        json.dump(stamp, f)
+    return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1, help="multiple of the source database size (default: 1)")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help=f"real database to model (default: {DEFAULT_SOURCE})")
+    parser.add_argument('--output', help=f"output directory (default: {DATA_DIR}/x<scale>)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    json_path = generate_database(args.scale, args.source, args.output, args.seed)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        count = len(json.load(f))
+    print(f"{count} synthetic cards in {json_path.parent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Card fields stored as numbers (strings in the JSON) and as category codes
+NUMERIC_FIELDS = ('Cost', 'Power', 'HP', 'MarketPrice', 'LowPrice', 'FoilPrice', 'LowFoilPrice')
+CATEGORICAL_FIELDS = ('Set', 'Type', 'Rarity')
+
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max')
+
+
+def _parse_number(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+class CardColumns:
+    """Typed, column-oriented view of a card list for vectorized queries.
+
+    Every numeric field becomes a float64 array with a boolean mask of the
+    cards that actually have a value (missing or non-numeric values are NaN
+    and masked out). Categorical fields become int32 codes into a sorted list
+    of labels. Row i always describes cards[i].
+    """
+
+    def __init__(self, cards: Sequence[Dict[str, Any]]):
+        self.cards = cards
+        self.size = len(cards)
+        self.values: Dict[str, np.ndarray] = {}
+        self.present: Dict[str, np.ndarray] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, List[str]] = {}
+
+        for field in NUMERIC_FIELDS:
+            values = np.fromiter((_parse_number(card.get(field)) for card in cards),
+                                 dtype=np.float64, count=self.size)
+            self.values[field] = values
+            self.present[field] = ~np.isnan(values)
+
+        for field in CATEGORICAL_FIELDS:
+            labels = [card.get(field, 'UNKNOWN') for card in cards]
+            categories, codes = np.unique(np.array(labels, dtype=object), return_inverse=True)
+            self.categories[field] = list(categories)
+            self.codes[field] = codes.astype(np.int32)
+
+    def range_mask(self, field: str, low: Optional[float] = None,
+                   high: Optional[float] = None) -> np.ndarray:
+        """Mask of the cards whose numeric `field` is within [low, high]."""
+        values = self.values[field]
+        mask = self.present[field].copy()
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def equals_mask(self, field: str, label: str) -> np.ndarray:
+        """Mask of the cards whose categorical `field` equals `label`."""
+        try:
+            code = self.categories[field].index(label)
+        except ValueError:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[field] == code
+
+    def order_by(self, field: str, descending: bool = False, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row numbers sorted by a numeric field; cards without a value are left out.
+
+        The sort is stable, so ties keep card order.
+        """
+        rows = np.flatnonzero(self.present[field] if mask is None else mask & self.present[field])
+        keys = self.values[field][rows]
+        order = np.argsort(-keys if descending else keys, kind='stable')
+        return rows[order]
+
+    def _key_codes(self, field: str) -> Tuple[np.ndarray, np.ndarray, List[Any]]:
+        """Integer codes, validity mask and labels for a group-by key."""
+        if field in self.codes:
+            return self.codes[field], np.ones(self.size, dtype=bool), self.categories[field]
+        values, present = self.values[field], self.present[field]
+        distinct, codes = np.unique(np.where(present, values, 0), return_inverse=True)
+        labels = [int(v) if float(v).is_integer() else float(v) for v in distinct]
+        return codes, present, labels
+
+    def aggregate(self, value_field: Optional[str], by: Sequence[str], agg: str = 'mean',
+                  mask: Optional[np.ndarray] = None) -> Dict[Tuple[Any, ...], float]:
+        """Group cards by `by` fields and aggregate a numeric field.
+
+        Cards missing the value or any group key are skipped. With
+        `agg='count'` the value field may be None to count cards.
+        Example: aggregate('Power', by=('Set', 'Cost')) is the average power
+        per cost per set.
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {agg!r}; expected one of {', '.join(AGGREGATES)}")
+
+        valid = np.ones(self.size, dtype=bool) if mask is None else mask.copy()
+        if value_field is not None:
+            valid &= self.present[value_field]
+
+        key_columns, key_labels = [], []
+        for field in by:
+            codes, present, labels = self._key_codes(field)
+            valid &= present
+            key_columns.append(codes)
+            key_labels.append(labels)
+
+        rows = np.flatnonzero(valid)
+        if not len(rows):
+            return {}
+        if key_columns:
+            keys = np.stack([codes[rows] for codes in key_columns], axis=1)
+            groups, group_of_row = np.unique(keys, axis=0, return_inverse=True)
+            group_of_row = group_of_row.reshape(-1)
+        else:
+            groups, group_of_row = np.zeros((1, 0), dtype=np.int64), np.zeros(len(rows), dtype=np.int64)
+
+        counts = np.bincount(group_of_row, minlength=len(groups))
+        if agg == 'count':
+            result = counts.astype(np.float64)
+        else:
+            values = self.values[value_field][rows]
+            if agg in ('sum', 'mean'):
+                result = np.bincount(group_of_row, weights=values, minlength=len(groups))
+                if agg == 'mean':
+                    result = result / counts
+            elif agg == 'min':
+                result = np.full(len(groups), np.inf)
+                np.minimum.at(result, group_of_row, values)
+            else:
+                result = np.full(len(groups), -np.inf)
+                np.maximum.at(result, group_of_row, values)
+
+        return {
+            tuple(key_labels[i][code] for i, code in enumerate(group)): float(value)
+            for group, value in zip(groups, result)
+        }
@@ -0,0 +1,426 @@
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+from card_manifest import (CHANGELOG_FILE, MANIFEST_FILE, CardManifest, append_changelog, card_source, changelog,
+                           database_source, has_changes, load_build)
+from card_snapshot import SnapshotError, snapshot_path_for, write_snapshot
+from card_sqlite import sqlite_path_for, write_sqlite
+
+# Columns every card is expected to have; the CSV header is fixed up at the end if the cards differ
+CARD_FIELDS = (
+    'Set', 'Number', 'Name', 'Subtitle', 'Type', 'Aspects', 'Traits', 'Arenas', 'Cost', 'Power', 'HP',
+    'FrontText', 'EpicAction', 'DoubleSided', 'BackArt', 'BackText', 'Rarity', 'Unique', 'Keywords',
+    'Artist', 'VariantType', 'MarketPrice', 'LowPrice', 'FoilPrice', 'LowFoilPrice', 'FrontArt',
+)
+
+# Cards buffered per writer before add() blocks, so a slow writer can't use unbounded memory
+QUEUE_SIZE = 256
+
+_DONE = object()
+
+
+def _timed(function, *args):
+    """Call function(*args) and return how many seconds it took."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def temp_path(path):
+    """Where a file is written before being renamed into place."""
+    path = Path(path)
+    return path.with_name(path.name + ".tmp")
+
+
+class JsonArrayStream:
+    """Writes a JSON array one element at a time.
+
+    The indented output is byte-for-byte what json.dump(items, f, indent=2)
+    produces; compact output has no whitespace at all.
+    """
+
+    def __init__(self, path, compact=False):
+        self.path = Path(path)
+        self.compact = compact
+        self.count = 0
+        self._file = open(temp_path(self.path), 'w', encoding='utf-8')
+
+    def write(self, item):
+        if self.compact:
+            text = json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+            self._file.write(("," if self.count else "[") + text)
+        else:
+            text = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            self._file.write((",\n  " if self.count else "[\n  ") + text)
+        self.count += 1
+
+    def close(self):
+        if not self.count:
+            self._file.write("[]")
+        else:
+            self._file.write("]" if self.compact else "\n]")
+        self._file.close()
+
+
+class Writer:
+    """One output format, fed cards through a queue by its own thread.
+
+    Subclasses implement write(card) and finish(), writing only to temporary
+    files; outputs() lists the (temporary, final) paths to rename on commit.
+    `busy` is the time spent writing, not counting waits for cards.
+    """
+
+    name = "output"
+
+    def __init__(self):
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.error = None
+        self.busy = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"export-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        card = None
+        try:
+            while True:
+                card = self.queue.get()
+                if card is _DONE:
+                    break
+                start = time.perf_counter()
+                self.write(card)
+                self.busy += time.perf_counter() - start
+            self.busy += _timed(self.finish)
+        except Exception as e:
+            self.error = e
+            # Keep draining so producers never block on a dead writer
+            while card is not _DONE:
+                card = self.queue.get()
+
+    def join(self):
+        self.queue.put(_DONE)
+        self._thread.join()
+
+    def write(self, card):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+    def outputs(self):
+        raise NotImplementedError
+
+    def temp_files(self):
+        """Every temporary file the writer may have created, to remove on abort."""
+        return [tmp for tmp, _ in self.outputs()]
+
+    def summary(self):
+        """Lines to print once the outputs are in place."""
+        return []
+
+
+class JsonWriter(Writer):
+    name = "json"
+
+    def __init__(self, output_dir, compact=False):
+        self.path = Path(output_dir) / "swu_cards.json"
+        self.stream = JsonArrayStream(self.path, compact)
+        super().__init__()
+
+    def write(self, card):
+        self.stream.write(card)
+
+    def finish(self):
+        self.stream.close()
+
+    def outputs(self):
+        return [(temp_path(self.path), self.path)]
+
+    def summary(self):
+        return [f"Saved JSON database: {self.path} ({self.path.stat().st_size / 1024:.1f} KB)"]
+
+
+class CsvWriter(Writer):
+    name = "csv"
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / "swu_cards.csv"
+        self.fieldnames = sorted(CARD_FIELDS)
+        self._known_fields = set(CARD_FIELDS)
+        self.seen_fields = set()
+        self.rows = 0
+        self._file = open(temp_path(self.path), 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        self._writer.writeheader()
+        self._extra_rows = []
+        super().__init__()
+
+    def write(self, card):
+        # Flatten lists/dicts to strings for CSV
+        row = {}
+        for key, value in card.items():
+            if isinstance(value, (list, dict)):
+                row[key] = json.dumps(value)
+            else:
+                row[key] = value
+        self.seen_fields.update(row)
+        self._writer.writerow(row)
+        extra = {key: value for key, value in row.items() if key not in self._known_fields}
+        if extra:
+            self._extra_rows.append((self.rows, extra))
+        self.rows += 1
+
+    def finish(self):
+        self._file.close()
+        if sorted(self.seen_fields) != self.fieldnames:
+            self._rewrite_header()
+
+    def _rewrite_header(self):
+        """Rewrite the file with exactly the columns the cards used (rare: unexpected fields)."""
+        columns = sorted(self.seen_fields)
+        extras = dict(self._extra_rows)
+        tmp = temp_path(self.path)
+        rewritten = tmp.with_name(tmp.name + ".rewrite")
+        with open(tmp, 'r', newline='', encoding='utf-8') as src, \
+                open(rewritten, 'w', newline='', encoding='utf-8') as dst:
+            writer = csv.DictWriter(dst, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for i, row in enumerate(csv.DictReader(src)):
+                row.update(extras.get(i, {}))
+                writer.writerow(row)
+        os.replace(rewritten, tmp)
+
+    def outputs(self):
+        if not self.rows:
+            temp_path(self.path).unlink(missing_ok=True)
+            return []
+        return [(temp_path(self.path), self.path)]
+
+    def temp_files(self):
+        tmp = temp_path(self.path)
+        return [tmp, tmp.with_name(tmp.name + ".rewrite")]
+
+    def summary(self):
+        if not self.rows:
+            return []
+        return [f"Saved CSV database: {self.path} ({self.path.stat().st_size / 1024:.1f} KB)"]
+
+
+class BySetWriter(Writer):
+    name = "by_set"
+
+    def __init__(self, output_dir, compact=False):
+        self.by_set_dir = Path(output_dir) / "by_set"
+        self.by_set_dir.mkdir(exist_ok=True)
+        self.compact = compact
+        self.streams = {}
+        super().__init__()
+
+    def write(self, card):
+        set_code = card.get('Set', 'UNKNOWN')
+        stream = self.streams.get(set_code)
+        if stream is None:
+            stream = self.streams[set_code] = JsonArrayStream(self.by_set_dir / f"{set_code}.json", self.compact)
+        stream.write(card)
+
+    def finish(self):
+        manifest = []
+        for set_code, stream in self.streams.items():
+            stream.close()
+            manifest.append({'set': set_code, 'file': stream.path.name, 'cards': stream.count,
+                             'bytes': temp_path(stream.path).stat().st_size})
+
+        # Manifest of the set files, in database order, for SWUCardDatabase(lazy=True)
+        with open(temp_path(self.by_set_dir / "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump({'sets': manifest}, f, indent=2)
+
+    def outputs(self):
+        paths = [stream.path for stream in self.streams.values()] + [self.by_set_dir / "manifest.json"]
+        return [(temp_path(path), path) for path in paths]
+
+    def summary(self):
+        return [f"Saved {set_code}: {stream.count} cards" for set_code, stream in self.streams.items()]
+
+
+class ManifestWriter(Writer):
+    """Per-card content hashes of the build (see card_manifest.CardManifest)."""
+
+    name = "manifest"
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / MANIFEST_FILE
+        self.manifest = CardManifest()
+        super().__init__()
+
+    def write(self, card):
+        self.manifest.add(card)
+
+    def finish(self):
+        self.manifest.write(temp_path(self.path))
+
+    def outputs(self):
+        return [(temp_path(self.path), self.path)]
+
+
+class DatabaseExporter:
+    """Streams cards into every database format at once, then swaps the files in atomically.
+
+    Cards passed to add() go to one writer thread per format (combined JSON,
+    CSV, per-set JSON files with their manifest, per-card content hashes).
+    Everything is written to `.tmp` files; commit() renames them over the
+    old files only after every writer succeeded, so readers never see a
+    half-written database. Outputs that need the complete card list, the
+    binary snapshot and the SQLite database, are built side by side at
+    commit time. Before the old files are replaced, the new card hashes are
+    compared with the old build's and the changes are appended to
+    changelog.jsonl (see card_manifest.changelog); they are also kept in
+    `changes`. The seconds spent on each format are kept in `timings` and,
+    with `metrics` (a fetch_metrics.FetchMetrics), recorded there too.
+
+        with DatabaseExporter("database") as exporter:
+            for card in cards:
+                exporter.add(card)
+    """
+
+    def __init__(self, output_dir="database", compact=False, metrics=None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        self.compact = compact
+        self.metrics = metrics
+        self.timings = {}
+        self.cards = []
+        self.writers = [
+            JsonWriter(self.output_dir, compact),
+            CsvWriter(self.output_dir),
+            BySetWriter(self.output_dir, compact),
+            ManifestWriter(self.output_dir),
+        ]
+        self.changes = None
+        self._closed = False
+
+    def add(self, card):
+        """Queue one card for every format."""
+        self.cards.append(card)
+        for writer in self.writers:
+            writer.queue.put(card)
+
+    def _finish_writers(self):
+        for writer in self.writers:
+            writer.join()
+        errors = [writer.error for writer in self.writers if writer.error]
+        if errors:
+            raise errors[0]
+
+    def _pending_outputs(self):
+        return [pair for writer in self.writers for pair in writer.outputs()]
+
+    def commit(self):
+        """Finish every format and move the new files into place."""
+        if self._closed:
+            return
+        self._closed = True
+        with self.metrics.stage('save') if self.metrics else nullcontext():
+            self._commit()
+
+    def _commit(self):
+        try:
+            self._finish_writers()
+            outputs = self._pending_outputs()
+
+            # The snapshot is tied to the exact JSON bytes written above
+            json_writer = self.writers[0]
+            snapshot_path = snapshot_path_for(json_writer.path)
+            sqlite_path = sqlite_path_for(json_writer.path)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                builds = {
+                    'sqlite': pool.submit(_timed, write_sqlite, self.cards, temp_path(sqlite_path)),
+                    'snapshot': pool.submit(_timed, write_snapshot, self.cards, temp_path(snapshot_path),
+                                            temp_path(json_writer.path)),
+                }
+                for name, build in builds.items():
+                    self.timings[name] = build.result()
+            outputs.append((temp_path(sqlite_path), sqlite_path))
+            outputs.append((temp_path(snapshot_path), snapshot_path))
+            self.timings['changelog'] = _timed(self._compare_with_previous)
+        except BaseException:
+            self._remove_temp_files()
+            raise
+        
+        # Snapshot last: until it is replaced, the old snapshot is stale and ignored
+        for tmp, final in outputs:
+            os.replace(tmp, final)
+
+        for writer in self.writers:
+            self.timings[writer.name] = writer.busy
+        if self.metrics:
+            for name, seconds in self.timings.items():
+                self.metrics.observe_format(name, seconds)
+        
+        for writer in self.writers:
+            for line in writer.summary():
+                print(line)
+        print(f"Saved SQLite database: {sqlite_path} ({sqlite_path.stat().st_size / 1024:.1f} KB)")
+        print(f"Saved binary snapshot: {snapshot_path} ({snapshot_path.stat().st_size / 1024:.1f} KB)")
+        if self.changes is not None and has_changes(self.changes):
+            append_changelog(self.changes, self.output_dir / CHANGELOG_FILE)
+            summary = self.changes['summary']
+            print(f"Changes since the previous build: {summary['added']} added, {summary['removed']} removed, "
+                  f"{summary['modified']} modified (see {self.output_dir / CHANGELOG_FILE})")
+
+    def _compare_with_previous(self):
+        """Changes from the database about to be replaced (run before the swap).
+
+        Best effort: if the previous build can't be read, e.g. a truncated
+        swu_cards.json, no changelog is recorded but the new build is still
+        saved.
+        """
+        try:
+            self._read_changes()
+        except (OSError, ValueError, SnapshotError) as e:
+            self.changes = None
+            print(f"Warning: not recording a changelog, the previous build could not be read: {e}")
+
+    def _read_changes(self):
+        manifest_writer = next(writer for writer in self.writers if isinstance(writer, ManifestWriter))
+        new = manifest_writer.manifest
+        old = CardManifest.load(manifest_writer.path)
+        if old is None:
+            # A database saved before manifests existed: hash it once to have something to compare
+            if not (self.output_dir / "swu_cards.json").exists():
+                return
+            old = load_build(self.output_dir)
+        with database_source(self.output_dir, old) as old_cards:
+            self.changes = changelog(old, new, old_cards, card_source(self.cards, new))
+
+    def abort(self):
+        """Discard everything written so far, leaving the old database untouched."""
+        if self._closed:
+            return
+        self._closed = True
+        for writer in self.writers:
+            writer.join()
+        self._remove_temp_files()
+
+    def _remove_temp_files(self):
+        # Only this exporter's own files: others (the dead-letter queue, the cube) share the directory
+        json_path = self.writers[0].path
+        temp_files = [tmp for writer in self.writers for tmp in writer.temp_files()]
+        temp_files += [temp_path(sqlite_path_for(json_path)), temp_path(snapshot_path_for(json_path))]
+        for tmp in temp_files:
+            tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable, Sequence
+
+from card_snapshot import SnapshotCards, SnapshotError, snapshot_path_for
+
+MANIFEST_FILE = "card_manifest.json"
+CHANGELOG_FILE = "changelog.jsonl"
+MANIFEST_VERSION = 1
+
+# Card hashes are 64-bit BLAKE2b of the card's canonical JSON
+HASH_BYTES = 8
+
+
+def card_key(card: Dict[str, Any]) -> str:
+    return f"{card.get('Set')}/{card.get('Number')}"
+
+
+def card_hash(card: Dict[str, Any]) -> str:
+    """Hex digest of a card's content; equal for cards with equal fields, whatever their order."""
+    text = json.dumps(card, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=HASH_BYTES).hexdigest()
+
+
+class CardManifest:
+    """The content hash of every card of one build, in database order.
+
+    Two builds are compared by their hashes alone, so only cards that
+    actually changed are ever looked at field by field. `digest` hashes
+    the whole list: equal digests mean identical databases.
+    """
+
+    def __init__(self, hashes: Optional[Dict[str, str]] = None, created: Optional[str] = None,
+                 digest: Optional[str] = None):
+        self.hashes: Dict[str, str] = hashes if hashes is not None else {}
+        self.created = created or datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self._digest = digest
+
+    @classmethod
+    def build(cls, cards: Iterable[Dict[str, Any]]) -> 'CardManifest':
+        manifest = cls()
+        for card in cards:
+            manifest.add(card)
+        return manifest
+
+    def add(self, card: Dict[str, Any]) -> None:
+        self.hashes[card_key(card)] = card_hash(card)
+        self._digest = None
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for key, value in self.hashes.items():
+                digest.update(f"{key}={value}\n".encode('utf-8'))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def positions(self) -> Dict[str, int]:
+        """{card key: index in the database}."""
+        return {key: position for position, key in enumerate(self.hashes)}
+
+    def diff(self, newer: 'CardManifest') -> Dict[str, List[str]]:
+        """Keys of the cards added, removed and modified in `newer`, in database order."""
+        if self.digest == newer.digest:
+            return {'added': [], 'removed': [], 'modified': []}
+        old, new = self.hashes, newer.hashes
+        return {
+            'added': [key for key in new if key not in old],
+            'removed': [key for key in old if key not in new],
+            'modified': [key for key, value in new.items() if key in old and old[key] != value],
+        }
+
+    def write(self, path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'created': self.created, 'digest': self.digest,
+                       'cards': len(self.hashes), 'hashes': self.hashes}, f, separators=(',', ':'))
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        self.write(tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path) -> Optional['CardManifest']:
+        """The saved manifest, or None if it is missing, unreadable or of another version."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return None
+        return cls(data['hashes'], data.get('created'), data.get('digest'))
+
+
+CardSource = Callable[[str], Optional[Dict[str, Any]]]
+
+
+def card_source(cards: Sequence[Dict[str, Any]], manifest: CardManifest) -> CardSource:
+    """Look up cards by key in the cards `manifest` was built from, verifying each against its hash.
+
+    `cards` may be a lazily decoded SnapshotCards, so only the cards
+    actually looked up are decoded. A card whose hash doesn't match (the
+    cards aren't the ones the manifest describes) is reported as None.
+    """
+    positions = None
+
+    def lookup(key):
+        nonlocal positions
+        if positions is None:
+            positions = manifest.positions()
+        position = positions.get(key)
+        if position is None or position >= len(cards):
+            return None
+        card = cards[position]
+        return card if card_hash(card) == manifest.hashes[key] else None
+
+    return lookup
+
+
+@contextlib.contextmanager
+def database_source(output_dir, manifest: CardManifest):
+    """Yields a CardSource over the database saved in `output_dir` (None if unreadable).
+
+    Reads from the binary snapshot when there is one, decoding only the
+    cards looked up, else from the JSON. The snapshot is closed on exit,
+    so the files can be replaced afterwards.
+    """
+    json_path = Path(output_dir) / "swu_cards.json"
+    snapshot_path = snapshot_path_for(json_path)
+    snapshot = None
+    if snapshot_path.exists():
+        try:
+            snapshot = SnapshotCards(snapshot_path)
+        except SnapshotError:
+            pass
+    try:
+        if snapshot is not None and len(snapshot) == len(manifest.hashes):
+            yield card_source(snapshot, manifest)
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                cards = json.load(f)
+        except (OSError, ValueError):
+            cards = None
+        yield card_source(cards, manifest) if cards is not None else None
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+
+def _name(card: Optional[Dict[str, Any]]) -> Optional[str]:
+    if card is None:
+        return None
+    return card.get('Name', '') + (f" - {card['Subtitle']}" if card.get('Subtitle') else '')
+
+
+def changelog(old: CardManifest, new: CardManifest, old_cards: Optional[CardSource],
+              new_cards: Optional[CardSource]) -> Dict[str, Any]:
+    """Structured changes from the `old` build to the `new` one.
+
+    Modified cards list each changed field with its old and new value
+    ('fields' is None if the old card couldn't be read, so only the fact
+    of the change is known). Only the cards whose hashes differ are read.
+    """
+    changes = old.diff(new)
+    old_cards = old_cards or (lambda key: None)
+    new_cards = new_cards or (lambda key: None)
+    modified = []
+    for key in changes['modified']:
+        before, after = old_cards(key), new_cards(key)
+        fields = None
+        if before is not None and after is not None:
+            fields = {field: {'old': before.get(field), 'new': after.get(field)}
+                      for field in dict.fromkeys([*before, *after]) if before.get(field) != after.get(field)}
+        modified.append({'card': key, 'name': _name(after or before), 'fields': fields})
+    return {
+        'created': new.created,
+        'from': old.digest,
+        'to': new.digest,
+        'summary': {'added': len(changes['added']), 'removed': len(changes['removed']), 'modified': len(modified)},
+        'added': [{'card': key, 'name': _name(new_cards(key))} for key in changes['added']],
+        'removed': [{'card': key, 'name': _name(old_cards(key))} for key in changes['removed']],
+        'modified': modified,
+    }
+
+
+def has_changes(log: Dict[str, Any]) -> bool:
+    return any(log['summary'].values())
+
+
+def append_changelog(log: Dict[str, Any], path) -> None:
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(log, ensure_ascii=False) + "\n")
+
+
+def read_changelog(path) -> List[Dict[str, Any]]:
+    """Every entry of a changelog file, oldest first (a torn last line is skipped)."""
+    entries = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+    except OSError:
+        pass
+    return entries
+
+
+def changed_keys(entries: Iterable[Dict[str, Any]]) -> set:
+    """Keys of every card added, removed or modified in these changelog entries (to invalidate caches)."""
+    return {change['card'] for log in entries for kind in ('added', 'removed', 'modified') for change in log[kind]}
+
+
+def print_changelog(log: Dict[str, Any], limit: int = 50) -> None:
+    summary = log['summary']
+    print(f"{log['created']}: {summary['added']} added, {summary['removed']} removed, {summary['modified']} modified")
+    shown = 0
+    for kind, mark in (('added', '+'), ('removed', '-'), ('modified', '~')):
+        for change in log[kind]:
+            if shown == limit:
+                print(f"  ... {sum(summary.values()) - shown} more")
+                return
+            shown += 1
+            print(f"  {mark} {change['card']} {change['name'] or ''}".rstrip())
+            for field, values in (change.get('fields') or {}).items():
+                print(f"      {field}: {values['old']!r} -> {values['new']!r}")
+
+
+def load_build(directory) -> CardManifest:
+    """The manifest of the database in `directory`, built from its cards if it has none."""
+    manifest = CardManifest.load(Path(directory) / MANIFEST_FILE)
+    if manifest is None:
+        with open(Path(directory) / "swu_cards.json", 'r', encoding='utf-8') as f:
+            manifest = CardManifest.build(json.load(f))
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare database builds by per-card content hashes.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff = commands.add_parser('diff', help="changes between two database directories")
+    diff.add_argument('old', help="database directory of the older build")
+    diff.add_argument('new', help="database directory of the newer build")
+    diff.add_argument('--json', action='store_true', help="print the changelog entry as JSON")
+    diff.add_argument('--limit', type=int, default=50, help="cards to list (default: 50)")
+
+    log = commands.add_parser('log', help="changes recorded by past builds")
+    log.add_argument('--db-dir', default="database", help="database directory (default: database)")
+    log.add_argument('--last', type=int, default=5, help="entries to show (default: 5)")
+    log.add_argument('--limit', type=int, default=20, help="cards to list per entry (default: 20)")
+
+    build = commands.add_parser('build', help="write the manifest of an existing database")
+    build.add_argument('--db-dir', default="database", help="database directory (default: database)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'diff':
+        old, new = load_build(args.old), load_build(args.new)
+        with database_source(args.old, old) as old_cards, database_source(args.new, new) as new_cards:
+            log = changelog(old, new, old_cards, new_cards)
+        if args.json:
+            print(json.dumps(log, indent=2, ensure_ascii=False))
+        else:
+            print_changelog(log, args.limit)
+    elif args.command == 'log':
+        entries = read_changelog(Path(args.db_dir) / CHANGELOG_FILE)
+        if not entries:
+            print("No changes recorded yet")
+        for log in entries[-args.last:]:
+            print_changelog(log, args.limit)
+    elif args.command == 'build':
+        with open(Path(args.db_dir) / "swu_cards.json", 'r', encoding='utf-8') as f:
+            manifest = CardManifest.build(json.load(f))
+        manifest.save(Path(args.db_dir) / MANIFEST_FILE)
+        print(f"Saved manifest of {len(manifest.hashes)} cards: {Path(args.db_dir) / MANIFEST_FILE}")
+
+
+if __name__ == "__main__":
+    main()
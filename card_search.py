@@ -0,0 +1,213 @@
+import math
+import re
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+# Searchable card fields and how much a match in each one counts
+FIELD_WEIGHTS = {
+    'Name': 3.0,
+    'Subtitle': 2.0,
+    'FrontText': 1.0,
+    'BackText': 1.0,
+    'EpicAction': 1.0,
+}
+
+# Positions of different fields are kept this far apart so phrases never span two fields
+FIELD_GAP = 100000
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Expanded terms score less than the exact term the user typed
+PREFIX_WEIGHT = 0.9
+SUBSTRING_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a string and split it into alphanumeric terms."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(term: str) -> set:
+    """Character trigrams of a term, padded so short terms still have some."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between two terms, giving up once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class CardSearchIndex:
+    """Inverted index over card names, subtitles and rules text.
+
+    Each term maps to the cards containing it and the term's positions in
+    each card, so phrase queries can check adjacency. A trigram index over
+    the vocabulary finds terms containing a query fragment ("vad" -> "vader")
+    and candidates for typo correction. Results are ranked with BM25, with
+    matches in the name and subtitle weighted above rules text.
+
+    Query syntax: words and "quoted phrases" must all match; OR separates
+    alternatives, and AND may be written explicitly:
+        "When Played" AND shield
+        bounty OR smuggle
+    """
+
+    def __init__(self, cards: Sequence[Dict[str, Any]]):
+        self.cards = cards
+        self.postings: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        self.doc_lengths: List[float] = []
+        self.trigram_index: Dict[str, set] = defaultdict(set)
+
+        field_weights = list(FIELD_WEIGHTS.items())
+        for doc, card in enumerate(cards):
+            length = 0.0
+            for field_number, (field, weight) in enumerate(field_weights):
+                terms = tokenize(card.get(field) or '')
+                length += weight * len(terms)
+                for offset, term in enumerate(terms):
+                    self.postings[term].setdefault(doc, []).append(field_number * FIELD_GAP + offset)
+            self.doc_lengths.append(length)
+
+        self.postings = dict(self.postings)
+        for term in self.postings:
+            for gram in trigrams(term):
+                self.trigram_index[gram].add(term)
+
+        self.average_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if cards else 0.0
+        self._field_weights = [weight for _, weight in field_weights]
+
+    def expand(self, term: str) -> Dict[str, float]:
+        """Map a query term to indexed terms and the weight each one scores with.
+
+        An indexed term is used as is. Otherwise the term is treated as a
+        substring of longer terms, and failing that as a typo (one edit for
+        short terms, two for longer ones).
+        """
+        if term in self.postings:
+            return {term: 1.0}
+
+        grams = [gram for gram in trigrams(term) if not gram.startswith(' ') and not gram.endswith(' ')]
+        if grams:
+            candidates = set.intersection(*(self.trigram_index.get(gram, set()) for gram in grams))
+        else:
+            candidates = {t for t in self.postings if len(term) <= len(t)}
+        substring_matches = {t: PREFIX_WEIGHT if t.startswith(term) else SUBSTRING_WEIGHT
+                             for t in candidates if term in t}
+        if substring_matches:
+            return substring_matches
+
+        limit = 1 if len(term) <= 5 else 2
+        shared = set()
+        for gram in trigrams(term):
+            shared.update(self.trigram_index.get(gram, ()))
+        return {candidate: FUZZY_WEIGHT for candidate in shared
+                if edit_distance(term, candidate, limit) <= limit}
+
+    def _phrase_docs(self, terms: List[str]) -> Dict[int, Dict[str, float]]:
+        """Cards containing the terms consecutively, mapped to the matched terms."""
+        if any(term not in self.postings for term in terms):
+            return {}
+        docs = set(self.postings[terms[0]])
+        for term in terms[1:]:
+            docs &= self.postings[term].keys()
+
+        matches = {}
+        for doc in docs:
+            starts = set(self.postings[terms[0]][doc])
+            for i, term in enumerate(terms[1:], 1):
+                starts &= {position - i for position in self.postings[term][doc]}
+                if not starts:
+                    break
+            if starts:
+                matches[doc] = {term: 1.0 for term in terms}
+        return matches
+
+    def _clause_docs(self, clause: Tuple[str, str]) -> Dict[int, Dict[str, float]]:
+        """Cards matching one word or phrase, mapped to {matched term: weight}."""
+        kind, text = clause
+        terms = tokenize(text)
+        if not terms:
+            return {}
+        if kind == 'phrase' and len(terms) > 1:
+            return self._phrase_docs(terms)
+
+        matches: Dict[int, Dict[str, float]] = {}
+        # Tokenizing can split one word into several terms ("+2/+2"); every piece must match
+        for i, term in enumerate(terms):
+            term_matches = defaultdict(dict)
+            for indexed_term, weight in self.expand(term).items():
+                for doc in self.postings[indexed_term]:
+                    term_matches[doc][indexed_term] = max(weight, term_matches[doc].get(indexed_term, 0))
+            if i == 0:
+                matches = dict(term_matches)
+            else:
+                matches = {doc: {**matched, **term_matches[doc]}
+                           for doc, matched in matches.items() if doc in term_matches}
+        return matches
+
+    def _score(self, doc: int, terms: Dict[str, float]) -> float:
+        """BM25 score of a card for the matched terms, with per-field weights."""
+        total_docs = len(self.cards)
+        norm = K1 * (1 - B + B * self.doc_lengths[doc] / self.average_length) if self.average_length else K1
+        score = 0.0
+        for term, weight in terms.items():
+            postings = self.postings[term]
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            tf = sum(self._field_weights[position // FIELD_GAP] for position in postings[doc])
+            score += weight * idf * tf * (K1 + 1) / (tf + norm)
+        return score
+
+    @staticmethod
+    def parse(query: str) -> List[List[Tuple[str, str]]]:
+        """Split a query into OR-groups of AND-ed (kind, text) clauses."""
+        groups: List[List[Tuple[str, str]]] = [[]]
+        for phrase, word in QUERY_RE.findall(query):
+            if word == 'OR':
+                groups.append([])
+            elif word == 'AND':
+                continue
+            elif phrase:
+                groups[-1].append(('phrase', phrase))
+            else:
+                groups[-1].append(('word', word))
+        return [group for group in groups if group]
+
+    def search(self, query: str, limit: Optional[int] = 20) -> List[Tuple[Dict[str, Any], float]]:
+        """Return (card, score) pairs for a query, best match first."""
+        scores: Dict[int, float] = {}
+        for group in self.parse(query):
+            matched: Optional[Dict[int, Dict[str, float]]] = None
+            # Most selective clause first keeps the intersection small
+            for clause_docs in sorted((self._clause_docs(clause) for clause in group), key=len):
+                if matched is None:
+                    matched = clause_docs
+                else:
+                    matched = {doc: {**terms, **clause_docs[doc]}
+                               for doc, terms in matched.items() if doc in clause_docs}
+                if not matched:
+                    break
+            for doc, terms in (matched or {}).items():
+                scores[doc] = max(scores.get(doc, 0.0), self._score(doc, terms))
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.cards[doc], score) for doc, score in ranked]
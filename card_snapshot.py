@@ -0,0 +1,198 @@
+import hashlib
+import json
+import mmap
+import struct
+import zlib
+from collections.abc import Sequence
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from query_cards import CardIndex
+
+SNAPSHOT_MAGIC = b"SWUSNAP\0"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# magic, version, SHA-256 of the source JSON, CRC-32 of everything after the
+# header, card count, layout count, value count, then the section offsets
+HEADER = struct.Struct("<8sI32sIIIIQQQQQ")
+
+# Record slots hold value id + 1; 0 means the card has no such field
+MISSING = 0
+
+
+class SnapshotError(Exception):
+    """The snapshot is missing, corrupt, from another format version or stale."""
+
+
+def snapshot_path_for(json_path) -> Path:
+    """Where the snapshot of a JSON database lives (swu_cards.json -> swu_cards.snapshot)."""
+    return Path(json_path).with_suffix(SNAPSHOT_SUFFIX)
+
+
+def file_digest(path) -> bytes:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def write_snapshot(cards: List[Dict[str, Any]], path, source_path) -> Path:
+    """Write a binary snapshot of `cards`, tied to the JSON file they were saved to.
+
+    Layout after the header:
+      meta     JSON: field names and the distinct field orders ("layouts")
+      values   (value_count + 1) uint32 offsets, then the interned values,
+               each the JSON encoding of one distinct field value
+      records  one fixed-width row per card: a uint32 layout id, then one
+               uint32 slot per field (value id + 1, or 0 if absent)
+      index    JSON: CardIndex.to_prebuilt() for the cards
+    """
+    fields: List[str] = []
+    field_ids: Dict[str, int] = {}
+    layouts: List[List[int]] = []
+    layout_ids: Dict[Tuple[int, ...], int] = {}
+    values: List[bytes] = []
+    value_ids: Dict[bytes, int] = {}
+    rows = []
+
+    for card in cards:
+        for field in card:
+            if field not in field_ids:
+                field_ids[field] = len(fields)
+                fields.append(field)
+    for card in cards:
+        layout = tuple(field_ids[field] for field in card)
+        if layout not in layout_ids:
+            layout_ids[layout] = len(layouts)
+            layouts.append(list(layout))
+        slots = [MISSING] * len(fields)
+        for field, value in card.items():
+            encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            value_id = value_ids.setdefault(encoded, len(values))
+            if value_id == len(values):
+                values.append(encoded)
+            slots[field_ids[field]] = value_id + 1
+        rows.append(struct.pack(f"<I{len(fields)}I", layout_ids[layout], *slots))
+
+    meta = json.dumps({'fields': fields, 'layouts': layouts}, separators=(',', ':')).encode('utf-8')
+    offsets, position = [], 0
+    for encoded in values:
+        offsets.append(position)
+        position += len(encoded)
+    offsets.append(position)
+    value_section = struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(values)
+    record_section = b"".join(rows)
+    index_section = json.dumps(CardIndex(cards).to_prebuilt(), separators=(',', ':')).encode('utf-8')
+
+    meta_offset = HEADER.size
+    values_offset = meta_offset + len(meta)
+    records_offset = values_offset + len(value_section)
+    index_offset = records_offset + len(record_section)
+    end_offset = index_offset + len(index_section)
+    body = meta + value_section + record_section + index_section
+
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, file_digest(source_path), zlib.crc32(body),
+                         len(cards), len(layouts), len(values),
+                         meta_offset, values_offset, records_offset, index_offset, end_offset)
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    tmp_path.replace(path)
+    return path
+
+
+class SnapshotCards(Sequence):
+    """Read-only card list backed by a memory-mapped snapshot.
+
+    Card dicts are decoded on first access and then kept, so cards that are
+    never touched cost nothing beyond their fixed-width record.
+    """
+
+    def __init__(self, path, source_path=None):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open(source_path)
+        except Exception:
+            self._map.close()
+            raise
+
+    def _open(self, source_path):
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{self.path} is truncated")
+        (magic, version, source_digest, body_crc, card_count, _, value_count,
+         meta_offset, values_offset, records_offset, index_offset, end_offset) = HEADER.unpack_from(self._map)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{self.path} is not a card snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"{self.path} has format version {version}, expected {SNAPSHOT_VERSION}")
+        if end_offset != len(self._map) or zlib.crc32(self._map[HEADER.size:end_offset]) != body_crc:
+            raise SnapshotError(f"{self.path} is corrupt")
+        if source_path is not None and file_digest(source_path) != source_digest:
+            raise SnapshotError(f"{self.path} is stale: {source_path} has changed since it was written")
+
+        meta = json.loads(self._map[meta_offset:values_offset])
+        self.fields: List[str] = meta['fields']
+        self._layouts: List[List[int]] = meta['layouts']
+        self._count = card_count
+        self._value_offsets = struct.unpack_from(f"<{value_count + 1}I", self._map, values_offset)
+        self._blob_offset = values_offset + 4 * (value_count + 1)
+        self._record = struct.Struct(f"<I{len(self.fields)}I")
+        self._records_offset = records_offset
+        self._index_range = (index_offset, end_offset)
+        self._values: Dict[int, Any] = {}
+        self._cards: List[Optional[Dict[str, Any]]] = [None] * card_count
+
+    def prebuilt_index(self) -> Dict[str, Any]:
+        """The indexes saved with the snapshot, for CardIndex(cards, prebuilt=...)."""
+        start, end = self._index_range
+        return json.loads(self._map[start:end])
+
+    def _value(self, value_id: int) -> Any:
+        if value_id in self._values:
+            value = self._values[value_id]
+        else:
+            start = self._blob_offset + self._value_offsets[value_id]
+            end = self._blob_offset + self._value_offsets[value_id + 1]
+            value = json.loads(self._map[start:end])
+            self._values[value_id] = value
+        # Lists are shared between cards in the value cache; hand out copies
+        return list(value) if isinstance(value, list) else value
+
+    def _decode(self, position: int) -> Dict[str, Any]:
+        layout_id, *slots = self._record.unpack_from(self._map, self._records_offset + position * self._record.size)
+        return {self.fields[field]: self._value(slots[field] - 1) for field in self._layouts[layout_id]}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("card index out of range")
+        card = self._cards[position]
+        if card is None:
+            card = self._cards[position] = self._decode(position)
+        return card
+
+    def __eq__(self, other):
+        return isinstance(other, (list, SnapshotCards)) and len(self) == len(other) and all(
+            a == b for a, b in zip(self, other))
+
+    def close(self):
+        self._map.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    json_path = Path(sys.argv[1] if len(sys.argv) > 1 else "database/swu_cards.json")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        cards = json.load(f)
+    snapshot_path = write_snapshot(cards, snapshot_path_for(json_path), json_path)
+    print(f"Saved binary snapshot: {snapshot_path} ({snapshot_path.stat().st_size / 1024:.1f} KB)")
@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+
+from card_search import CardSearchIndex
+from decklists import PARALLEL_MIN_DECKS
+from query_cards import SWUCardDatabase, CacheInfo, parse_cost, card_number_key
+
+SQLITE_SUFFIX = ".sqlite"
+
+# Join tables for the multi-valued fields: (table, value column, card field, normalizer)
+LIST_TABLES = (
+    ('card_aspects', 'aspect', 'Aspects', str),
+    ('card_traits', 'trait', 'Traits', str.upper),
+    ('card_keywords', 'keyword', 'Keywords', str.upper),
+    ('card_arenas', 'arena', 'Arenas', str),
+)
+
+# bm25() weights of the FTS5 columns (name, subtitle, front_text, back_text,
+# epic_action), the same as card_search.FIELD_WEIGHTS
+FTS_WEIGHTS = (3.0, 2.0, 1.0, 1.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE cards (
+    id INTEGER PRIMARY KEY,          -- position in swu_cards.json
+    set_code TEXT NOT NULL,
+    number TEXT NOT NULL,
+    name TEXT,
+    subtitle TEXT,
+    type TEXT,
+    rarity TEXT,
+    cost INTEGER,                    -- missing cost is 0, non-numeric is NULL (as filter_by_cost)
+    power REAL,
+    hp REAL,
+    market_price REAL,
+    low_price REAL,
+    foil_price REAL,
+    low_foil_price REAL,
+    front_text TEXT,
+    back_text TEXT,
+    epic_action TEXT,
+    data TEXT NOT NULL               -- the full card as JSON
+);
+CREATE INDEX idx_cards_set_number ON cards (set_code, number);
+CREATE INDEX idx_cards_type ON cards (type);
+CREATE INDEX idx_cards_rarity ON cards (rarity);
+CREATE INDEX idx_cards_cost ON cards (cost);
+CREATE TABLE card_aspects (card_id INTEGER NOT NULL REFERENCES cards (id), aspect TEXT NOT NULL);
+CREATE TABLE card_traits (card_id INTEGER NOT NULL REFERENCES cards (id), trait TEXT NOT NULL);
+CREATE TABLE card_keywords (card_id INTEGER NOT NULL REFERENCES cards (id), keyword TEXT NOT NULL);
+CREATE TABLE card_arenas (card_id INTEGER NOT NULL REFERENCES cards (id), arena TEXT NOT NULL);
+CREATE INDEX idx_card_aspects ON card_aspects (aspect, card_id);
+CREATE INDEX idx_card_traits ON card_traits (trait, card_id);
+CREATE INDEX idx_card_keywords ON card_keywords (keyword, card_id);
+CREATE INDEX idx_card_arenas ON card_arenas (arena, card_id);
+CREATE VIRTUAL TABLE cards_fts USING fts5 (
+    name, subtitle, front_text, back_text, epic_action,
+    content='cards', content_rowid='id'
+);
+"""
+
+
+def sqlite_path_for(json_path) -> Path:
+    """Where the SQLite copy of a JSON database lives (swu_cards.json -> swu_cards.sqlite)."""
+    return Path(json_path).with_suffix(SQLITE_SUFFIX)
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _list_values(card: Dict[str, Any], field: str, normalize) -> List[str]:
+    """Distinct normalized values of a multi-valued field, as CardIndex posts them."""
+    value = card.get(field)
+    if value is None:
+        return []
+    values = value if isinstance(value, list) else [value]
+    return list(dict.fromkeys(normalize(v) for v in values))
+
+
+def write_sqlite(cards: Sequence[Dict[str, Any]], path) -> Path:
+    """Write the cards to a new SQLite database at `path`, replacing any file there."""
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((position, card.get('Set', 'UNKNOWN'), card.get('Number', ''), card.get('Name'),
+                  card.get('Subtitle'), card.get('Type'), card.get('Rarity'), parse_cost(card),
+                  _number(card.get('Power')), _number(card.get('HP')), _number(card.get('MarketPrice')),
+                  _number(card.get('LowPrice')), _number(card.get('FoilPrice')),
+                  _number(card.get('LowFoilPrice')), card.get('FrontText'), card.get('BackText'),
+                  card.get('EpicAction'), json.dumps(dict(card), ensure_ascii=False))
+                 for position, card in enumerate(cards)))
+            for table, column, field, normalize in LIST_TABLES:
+                conn.executemany(
+                    f"INSERT INTO {table} (card_id, {column}) VALUES (?, ?)",
+                    ((position, value)
+                     for position, card in enumerate(cards)
+                     for value in _list_values(card, field, normalize)))
+            conn.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return path
+
+
+class SQLiteCardDatabase(SWUCardDatabase):
+    """SWUCardDatabase backed by the SQLite file written by save_database.
+
+    Queries run in SQLite against its secondary indexes, so many processes
+    can share one on-disk database through the OS page cache instead of each
+    holding its own parsed copy. search_text uses the FTS5 index (phrases
+    and AND/OR work; typo tolerance does not). The database is opened
+    read-only; for ad-hoc analysis query `self.conn` directly.
+    """
+
+    def __init__(self, db_path="database/swu_cards.sqlite", quiet: bool = False):
+        self._init_state(db_path, quiet=quiet)
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"{self.db_path} not found; run fetch_cards.py or card_sqlite.py to create it")
+        self._load()
+        self._source_version = self._read_source_version()
+
+    def _load(self) -> None:
+        # A reload opens a new connection; queries still running on the old one finish on it
+        self._reset_derived()
+        self.shards = None
+        self.index = None
+        self.conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                    check_same_thread=False)
+        self.conn.create_function('pylower', 1, lambda text: text.lower() if text else '', deterministic=True)
+        count = self.conn.execute("SELECT count(*) FROM cards").fetchone()[0]
+        if not self.quiet:
+            print(f"Opened {count} cards in SQLite database")
+
+    def _cards_where(self, where: str = "1", params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(f"SELECT data FROM cards WHERE {where} ORDER BY id", params)
+        return [json.loads(data) for data, in rows]
+
+    @property
+    def cards(self) -> List[Dict[str, Any]]:
+        """Every card, in database order (read from disk on each access)."""
+        return self._cards_where()
+
+    def get_card(self, set_code: str, number: str) -> Optional[Dict[str, Any]]:
+        """Get a specific card by set and number."""
+        row = self.conn.execute("SELECT data FROM cards WHERE set_code = ? AND number = ? ORDER BY id LIMIT 1",
+                                card_number_key(set_code, number)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def search_by_name(self, name: str) -> List[Dict[str, Any]]:
+        """Search for cards by name (case-insensitive, partial match)."""
+        name_lower = name.lower()
+        return self._cards_where("instr(pylower(name), ?) OR instr(pylower(subtitle), ?)", (name_lower, name_lower))
+
+    def search_text(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Ranked full-text search over names, subtitles and rules text using FTS5."""
+        groups = []
+        for group in CardSearchIndex.parse(query):
+            clauses = ['"' + text.replace('"', '""') + '"' for _, text in group if text.strip()]
+            if clauses:
+                groups.append("(" + " AND ".join(clauses) + ")")
+        if not groups:
+            return []
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        sql = (f"SELECT cards.data FROM cards_fts JOIN cards ON cards.id = cards_fts.rowid "
+               f"WHERE cards_fts MATCH ? ORDER BY bm25(cards_fts, {weights}), cards.id")
+        params: List[Any] = [" OR ".join(groups)]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(data) for data, in self.conn.execute(sql, params)]
+
+    def query(self, set_code: Optional[str] = None, card_type: Optional[str] = None,
+              rarity: Optional[str] = None, aspect: Optional[str] = None,
+              trait: Optional[str] = None, keyword: Optional[str] = None,
+              arena: Optional[str] = None, min_cost: Optional[int] = None,
+              max_cost: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find cards matching all of the given criteria."""
+        conditions, params = [], []
+        for column, value in (('set_code', set_code and set_code.upper()), ('type', card_type), ('rarity', rarity)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        for (table, column, _, normalize), value in zip(LIST_TABLES, (aspect, trait, keyword, arena)):
+            if value is not None:
+                conditions.append(f"id IN (SELECT card_id FROM {table} WHERE {column} = ?)")
+                params.append(normalize(value))
+        if min_cost is not None or max_cost is not None:
+            conditions.append("cost BETWEEN ? AND ?")
+            params += [0 if min_cost is None else min_cost, 99 if max_cost is None else max_cost]
+        return self._cards_where(" AND ".join(conditions) or "1", params)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# Calls that must give the same cards on both backends: (method, args, kwargs)
+CHECK_CALLS = (
+    ('get_card', ('SOR', '010'), {}),
+    ('search_by_name', ('vader',), {}),
+    ('query', (), {'card_type': 'Unit', 'trait': 'imperial', 'max_cost': 3}),
+    ('filter_by_aspect', ('Heroism',), {}),
+    ('filter_by_cost', (2, 4), {}),
+    ('filter_by_range', ('Power', 3, None), {}),
+    ('filter_by_range', ('MarketPrice', None, 1.0), {}),
+    ('sort_by', ('Cost',), {}),
+    ('sort_by', ('MarketPrice',), {'descending': True}),
+    ('get_leaders', (), {}),
+    ('cache_info', (), {}),
+    ('resolve_decklists', (["1 SOR/010\n3 SOR/033\n2 Death Trooper"],), {}),
+    # Large enough for the process pool, whose workers reopen the database with its own backend
+    ('resolve_decklists', (["1 SOR/010\n3 SOR/033\n2 Death Trooper"] * PARALLEL_MIN_DECKS,), {'workers': 2}),
+)
+
+
+def check_backend(db: SQLiteCardDatabase, reference: SWUCardDatabase) -> List[str]:
+    """Run CHECK_CALLS on both databases; returns a description of each call whose results differ."""
+    def keys(result):
+        if result is None or isinstance(result, CacheInfo):
+            return result
+        if isinstance(result, dict):
+            result = [result]
+        elif result and hasattr(result[0], 'to_json'):
+            return [deck.to_json() for deck in result]
+        return [(card['Set'], card['Number']) for card in result]
+
+    mismatches = []
+    for method, args, kwargs in CHECK_CALLS:
+        got, expected = keys(getattr(db, method)(*args, **kwargs)), keys(getattr(reference, method)(*args, **kwargs))
+        if got != expected:
+            mismatches.append(f"{method}{args}{kwargs or ''}: {len(got or ())} results, expected {len(expected or ())}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import sys
+
+    json_path = Path(sys.argv[1] if len(sys.argv) > 1 else "database/swu_cards.json")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        cards = json.load(f)
+    sqlite_path = write_sqlite(cards, sqlite_path_for(json_path))
+    print(f"Saved SQLite database: {sqlite_path} ({os.path.getsize(sqlite_path) / 1024:.1f} KB)")
+    mismatches = check_backend(SQLiteCardDatabase(sqlite_path), SWUCardDatabase(json_path))
+    for mismatch in mismatches:
+        print(f"  Mismatch: {mismatch}")
+    if mismatches:
+        sys.exit(1)
+    print(f"SQLite and JSON backends agree on {len(CHECK_CALLS)} queries")
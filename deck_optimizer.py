@@ -0,0 +1,565 @@
+import argparse
+import json
+import math
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Sequence, Tuple, NamedTuple, Union
+
+import numpy as np
+
+from query_cards import SWUCardDatabase, parse_cost
+
+# Deck rules per format: leaders, copies allowed of each card, main deck size
+FORMATS = {
+    'twin_suns': {'leaders': 2, 'copies': 1, 'deck_size': 50},
+    'premier': {'leaders': 1, 'copies': 3, 'deck_size': 50},
+}
+
+# Card types that go in the main deck
+DECK_TYPES = ('Unit', 'Event', 'Upgrade')
+
+# Each aspect icon the leaders and base don't provide adds this much to a card's cost
+ASPECT_PENALTY_COST = 2
+
+# Per-card features available to weighted objectives
+FEATURES = (
+    'shared_traits',   # traits the card shares with the leaders
+    'keywords',        # number of keywords
+    'power',
+    'hp',
+    'stats_per_cost',  # (Power + HP) per resource, units only
+    'aspect_penalty',  # aspect icons not provided by the leaders and base
+    'cost',            # cost including the aspect penalty
+    'price',           # MarketPrice
+    'unit',
+    'event',
+    'upgrade',
+    'unique',
+)
+
+# Built-in objectives: feature weights, summed over the cards in the deck
+OBJECTIVES: Dict[str, Dict[str, float]] = {
+    'synergy': {'shared_traits': 2.0, 'keywords': 0.5, 'stats_per_cost': 1.0, 'aspect_penalty': -3.0},
+    'stats': {'stats_per_cost': 1.0, 'aspect_penalty': -3.0},
+    'penalty_free': {'aspect_penalty': -1.0, 'shared_traits': 0.1},
+}
+
+DEFAULT_TIME_LIMIT = 5.0
+
+# The deadline is checked every this many search nodes
+CHECK_INTERVAL = 1024
+
+# Root iterations used to tune the price multiplier of the budget bound
+MULTIPLIER_STEPS = 40
+
+Objective = Union[str, Dict[str, float], Callable[[Dict[str, Any]], float]]
+
+
+class Deck(NamedTuple):
+    """A solved deck: main-deck cards with their counts, and how the search went."""
+    leaders: List[Dict[str, Any]]
+    base: Optional[Dict[str, Any]]
+    cards: List[Tuple[Dict[str, Any], int]]
+    value: float
+    price: float
+    optimal: bool
+    nodes: int
+    seconds: float
+
+    @property
+    def size(self) -> int:
+        return sum(count for _, count in self.cards)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'leaders': [card_key(leader) for leader in self.leaders],
+            'base': card_key(self.base) if self.base else None,
+            'cards': [{'card': card_key(card), 'name': card.get('Name'), 'count': count} for card, count in self.cards],
+            'size': self.size,
+            'value': round(self.value, 4),
+            'price': round(self.price, 2),
+            'optimal': self.optimal,
+            'nodes': self.nodes,
+            'seconds': round(self.seconds, 3),
+        }
+
+
+class SearchTimeout(Exception):
+    """The time budget ran out; the best deck found so far is kept."""
+
+
+def card_key(card: Dict[str, Any]) -> str:
+    return f"{card.get('Set')}/{card.get('Number')}"
+
+
+def resolve_card(db: SWUCardDatabase, key: str) -> Dict[str, Any]:
+    """Look up a card given as SET/NUMBER, e.g. SOR/010."""
+    set_code, _, number = key.partition('/')
+    card = db.get_card(set_code, number) if number else None
+    if card is None:
+        raise ValueError(f"Unknown card {key!r}; expected SET/NUMBER, e.g. SOR/010")
+    return card
+
+
+def check_leaders(leaders: Sequence[Dict[str, Any]], deck_format: str) -> None:
+    """Raise ValueError unless the leaders are a legal set for the format."""
+    rules = FORMATS[deck_format]
+    for leader in leaders:
+        if leader.get('Type') != 'Leader':
+            raise ValueError(f"{card_key(leader)} ({leader.get('Name')}) is a {leader.get('Type')}, not a Leader")
+    if len(leaders) != rules['leaders']:
+        raise ValueError(f"{deck_format} needs {rules['leaders']} leader(s), got {len(leaders)}")
+    if deck_format == 'twin_suns':
+        # Twin Suns leaders must all be heroic or all villainous
+        sides = {'Heroism', 'Villainy'}
+        for leader in leaders:
+            sides &= set(leader.get('Aspects') or [])
+        if not sides:
+            raise ValueError("Twin Suns leaders must share Heroism or Villainy: "
+                             + ", ".join(card_key(leader) for leader in leaders))
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class DeckProblem:
+    """Picks the main deck that maximizes an objective for a set of leaders.
+
+    The deck has exactly `deck_size` cards, at most `copies` of each card
+    (reprints count as the same card; the cheapest printing is used), at
+    most `curve[c]` cards at each cost c (the last entry covers everything
+    above), and costs at most `budget` in MarketPrice. Cards needing aspects
+    the leaders and base don't provide are left out unless `allow_penalty`
+    is set, in which case their cost includes the aspect penalty.
+
+    The objective is a feature-weight dict (see FEATURES), the name of one
+    of the OBJECTIVES, or a function scoring one card; either way each
+    card's value is computed once, and the deck's value is their sum.
+    """
+
+    def __init__(self, db: SWUCardDatabase, leaders: Sequence[Dict[str, Any]], base: Optional[Dict[str, Any]] = None,
+                 deck_format: str = 'twin_suns', objective: Objective = 'synergy', budget: Optional[float] = None,
+                 curve: Optional[Sequence[int]] = None, allow_penalty: bool = False,
+                 deck_size: Optional[int] = None, copies: Optional[int] = None):
+        rules = FORMATS[deck_format]
+        check_leaders(leaders, deck_format)
+        self.leaders = list(leaders)
+        self.base = base
+        self.deck_size = rules['deck_size'] if deck_size is None else deck_size
+        self.copies = rules['copies'] if copies is None else copies
+        self.budget = budget
+        self.curve = list(curve) if curve else None
+
+        provided = Counter()
+        for card in self.leaders + ([base] if base else []):
+            provided.update(card.get('Aspects') or [])
+        leader_traits = {trait.upper() for leader in self.leaders for trait in leader.get('Traits') or []}
+
+        self.pool: List[Dict[str, Any]] = []
+        features = []
+        for card in self._printings(db):
+            needed = Counter(card.get('Aspects') or [])
+            penalty = sum(max(0, count - provided[aspect]) for aspect, count in needed.items())
+            if penalty and not allow_penalty:
+                continue
+            self.pool.append(card)
+            features.append(self._features(card, penalty, leader_traits))
+        self.features = np.array(features, dtype=np.float64).reshape(len(self.pool), len(FEATURES))
+
+        self.values = self._values(objective)
+        self.prices = self.features[:, FEATURES.index('price')]
+        costs = self.features[:, FEATURES.index('cost')].astype(int)
+        self.buckets = np.minimum(costs, len(self.curve) - 1) if self.curve else np.zeros(len(self.pool), dtype=int)
+
+    @staticmethod
+    def _printings(db: SWUCardDatabase) -> List[Dict[str, Any]]:
+        """One printing per main-deck card: the cheapest, first in database order on ties."""
+        cheapest: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        for card in db.cards:
+            if card.get('Type') not in DECK_TYPES:
+                continue
+            name = (card.get('Name'), card.get('Subtitle'))
+            current = cheapest.get(name)
+            if current is None or _number(card.get('MarketPrice')) < _number(current.get('MarketPrice')):
+                cheapest[name] = card
+        return list(cheapest.values())
+
+    @staticmethod
+    def _features(card: Dict[str, Any], penalty: int, leader_traits: set) -> List[float]:
+        cost = (parse_cost(card) or 0) + ASPECT_PENALTY_COST * penalty
+        power, hp = _number(card.get('Power')), _number(card.get('HP'))
+        card_type = card.get('Type')
+        values = {
+            'shared_traits': len({trait.upper() for trait in card.get('Traits') or []} & leader_traits),
+            'keywords': len(card.get('Keywords') or []),
+            'power': power,
+            'hp': hp,
+            'stats_per_cost': (power + hp) / max(cost, 1) if card_type == 'Unit' else 0.0,
+            'aspect_penalty': penalty,
+            'cost': cost,
+            'price': _number(card.get('MarketPrice')),
+            'unit': card_type == 'Unit',
+            'event': card_type == 'Event',
+            'upgrade': card_type == 'Upgrade',
+            'unique': bool(card.get('Unique')),
+        }
+        return [float(values[feature]) for feature in FEATURES]
+
+    def _values(self, objective: Objective) -> np.ndarray:
+        if callable(objective):
+            return np.array([float(objective(card)) for card in self.pool], dtype=np.float64)
+        weights = OBJECTIVES[objective] if isinstance(objective, str) else objective
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features {', '.join(sorted(unknown))}; expected some of {', '.join(FEATURES)}")
+        vector = np.array([weights.get(feature, 0.0) for feature in FEATURES])
+        return self.features @ vector
+
+    def solve(self, time_limit: Optional[float] = DEFAULT_TIME_LIMIT) -> Deck:
+        """Best deck found within `time_limit` seconds (None: search until proven optimal)."""
+        started = time.monotonic()
+        search = _BranchAndBound(
+            values=self.values.tolist(),
+            prices=self.prices.tolist(),
+            buckets=self.buckets.tolist(),
+            copies=self.copies,
+            slots=self.deck_size,
+            caps=self.curve,
+            budget=self.budget,
+            deadline=None if time_limit is None else started + time_limit,
+        )
+        counts, value, optimal = search.run()
+        cards = [(self.pool[i], count) for i, count in enumerate(counts) if count]
+        price = sum(_number(card.get('MarketPrice')) * count for card, count in cards)
+        return Deck(self.leaders, self.base, cards, value, price, optimal, search.nodes, time.monotonic() - started)
+
+
+class _BranchAndBound:
+    """Depth-first branch-and-bound for a best deck.
+
+    Items are tried in branching order: by value, or with a budget by value
+    net of a price multiplier. A node fixes the counts of the items before
+    `start` in that order; each child adds one more item at or after
+    `start`. A node is pruned when its upper bound can't beat the best deck
+    so far. The bound fills the remaining slots greedily by value within the
+    cost-curve caps. That is exact without a budget, because the caps form a
+    partition matroid. With a budget it is tightened by a Lagrangian bound:
+    net values plus the multiplier times the unspent budget, with the
+    multiplier tuned once at the root. The cheapest way to fill the
+    remaining slots (also exact by the same argument) rules out nodes that
+    would overrun the budget.
+    """
+
+    def __init__(self, values, prices, buckets, copies, slots, caps, budget, deadline):
+        self.values = list(values)
+        self.prices = list(prices)
+        self.buckets = list(buckets)
+        self.copies = copies
+        self.slots = slots
+        self.caps = caps
+        self.budget = budget
+        self.deadline = deadline
+        self.count = len(self.values)
+        self.nodes = 0
+        self.multiplier = 0.0
+        self.best_value = -math.inf
+        self.best_counts: Optional[List[int]] = None
+
+    def _cap(self, bucket: int) -> int:
+        return self.caps[bucket] if self.caps else self.slots
+
+    def _greedy(self, start, slots_left, used, order, values) -> float:
+        """Best total of `values` from items >= start filling slots_left within the caps (-inf if impossible)."""
+        taken: Dict[int, int] = {}
+        total = 0.0
+        for i in order:
+            if slots_left == 0:
+                break
+            if i < start:
+                continue
+            bucket = self.buckets[i]
+            room = min(self.copies, slots_left, self._cap(bucket) - used.get(bucket, 0) - taken.get(bucket, 0))
+            if room > 0:
+                taken[bucket] = taken.get(bucket, 0) + room
+                total += room * values[i]
+                slots_left -= room
+        return total if slots_left == 0 else -math.inf
+
+    def _cheapest_fill(self, start, slots_left, used) -> float:
+        return -self._greedy(start, slots_left, used, self.by_price, self.negative_prices)
+
+    def _bound(self, start, slots_left, used, budget_left) -> float:
+        bound = self._greedy(start, slots_left, used, self.by_value, self.values)
+        if self.multiplier and bound > -math.inf:
+            bound = min(bound, self.multiplier * budget_left + self._greedy(start, slots_left, used, self.by_net, self.net))
+        return bound
+
+    def _tune_multiplier(self) -> float:
+        """The price multiplier giving the tightest root bound (the bound is convex in it)."""
+        ratios = [v / p for v, p in zip(self.values, self.prices) if p > 0 and v > 0]
+        low, high = 0.0, max(ratios, default=0.0)
+        if not high:
+            return 0.0
+
+        def root_bound(multiplier):
+            net = [v - multiplier * p for v, p in zip(self.values, self.prices)]
+            order = sorted(range(self.count), key=lambda i: -net[i])
+            return multiplier * self.budget + self._greedy(0, self.slots, {}, order, net)
+
+        for _ in range(MULTIPLIER_STEPS):
+            a, b = low + (high - low) / 3, high - (high - low) / 3
+            if root_bound(a) <= root_bound(b):
+                high = b
+            else:
+                low = a
+        return (low + high) / 2
+
+    def _prepare(self) -> List[int]:
+        """Put the items in branching order and build the bound orders; returns the permutation."""
+        if self.budget is not None:
+            self.multiplier = self._tune_multiplier()
+        net = [v - self.multiplier * p for v, p in zip(self.values, self.prices)]
+        branch = sorted(range(self.count), key=lambda i: (-net[i], i))
+        self.values = [self.values[i] for i in branch]
+        self.prices = [self.prices[i] for i in branch]
+        self.buckets = [self.buckets[i] for i in branch]
+        self.net = [net[i] for i in branch]
+        self.negative_prices = [-price for price in self.prices]
+        self.by_value = sorted(range(self.count), key=lambda i: -self.values[i])
+        self.by_net = list(range(self.count))
+        self.by_price = sorted(range(self.count), key=lambda i: self.prices[i])
+        return branch
+
+    def _greedy_incumbent(self) -> None:
+        """A first deck: items in branching order, never leaving the rest unaffordable."""
+        counts = [0] * self.count
+        used: Dict[int, int] = {}
+        slots_left, budget_left, value = self.slots, self.budget, 0.0
+        for i in range(self.count):
+            if slots_left == 0:
+                break
+            bucket = self.buckets[i]
+            room = min(self.copies, slots_left, self._cap(bucket) - used.get(bucket, 0))
+            while room > 0 and budget_left is not None:
+                used[bucket] = used.get(bucket, 0) + room
+                affordable = room * self.prices[i] + self._cheapest_fill(i + 1, slots_left - room, used) <= budget_left
+                used[bucket] -= room
+                if affordable:
+                    break
+                room -= 1
+            if room > 0:
+                counts[i] = room
+                used[bucket] = used.get(bucket, 0) + room
+                slots_left -= room
+                value += room * self.values[i]
+                if budget_left is not None:
+                    budget_left -= room * self.prices[i]
+        if slots_left == 0:
+            self.best_value, self.best_counts = value, counts
+
+    def run(self) -> Tuple[List[int], float, bool]:
+        """Return (count per item, total value, whether the search finished)."""
+        branch = self._prepare()
+        counts = [0] * self.count
+        if self._bound(0, self.slots, {}, self.budget) == -math.inf or (
+                self.budget is not None and self._cheapest_fill(0, self.slots, {}) > self.budget):
+            return counts, 0.0, True
+
+        self._greedy_incumbent()
+        self.counts = [0] * self.count
+        optimal = True
+        try:
+            self._search(0, self.slots, {}, self.budget, 0.0)
+        except SearchTimeout:
+            optimal = False
+        if self.best_counts is None:
+            return counts, 0.0, optimal
+        for position, item in enumerate(branch):
+            counts[item] = self.best_counts[position]
+        return counts, self.best_value, optimal
+
+    def _search(self, start, slots_left, used, budget_left, value) -> None:
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CHECK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+        if slots_left == 0:
+            if value > self.best_value:
+                self.best_value, self.best_counts = value, list(self.counts)
+            return
+
+        for i in range(start, self.count):
+            # Both bounds only get worse as the first item to add moves right
+            if value + self._bound(i, slots_left, used, budget_left) <= self.best_value:
+                return
+            if budget_left is not None and self._cheapest_fill(i, slots_left, used) > budget_left:
+                return
+            bucket = self.buckets[i]
+            room = min(self.copies, slots_left, self._cap(bucket) - used.get(bucket, 0))
+            for count in range(room, 0, -1):
+                spent = count * self.prices[i]
+                if budget_left is not None and spent > budget_left:
+                    continue
+                self.counts[i] = count
+                used[bucket] = used.get(bucket, 0) + count
+                self._search(i + 1, slots_left - count, used, None if budget_left is None else budget_left - spent,
+                             value + count * self.values[i])
+                used[bucket] -= count
+                self.counts[i] = 0
+
+
+def leader_pairs(db: SWUCardDatabase) -> List[Tuple[str, ...]]:
+    """Every Twin Suns leader pair (sharing Heroism or Villainy), as card keys."""
+    from analyze_twin_suns import SIDES, load_leaders, side_leaders
+    leaders, _ = load_leaders(db.cards)
+    pairs = {}
+    for side in SIDES:
+        for pair in combinations(side_leaders(leaders, side), 2):
+            pairs.setdefault(tuple(f"{leader.set}/{leader.number}" for leader in pair), None)
+    return list(pairs)
+
+
+_worker_db: Dict[str, SWUCardDatabase] = {}
+
+
+def _init_worker(db_path: str) -> None:
+    _worker_db['db'] = SWUCardDatabase(db_path, quiet=True)
+
+
+def _solve_for(leader_keys: Tuple[str, ...], options: Dict[str, Any], time_limit: Optional[float]) -> Dict[str, Any]:
+    db = _worker_db['db']
+    leaders = [resolve_card(db, key) for key in leader_keys]
+    base = resolve_card(db, options['base']) if options.get('base') else None
+    problem_options = {name: value for name, value in options.items() if name != 'base'}
+    return DeckProblem(db, leaders, base, **problem_options).solve(time_limit).to_json()
+
+
+def optimize_batch(db_path: str, pairs: Sequence[Tuple[str, ...]], output_path, options: Dict[str, Any],
+                   time_limit: Optional[float] = DEFAULT_TIME_LIMIT, workers: Optional[int] = None) -> int:
+    """Solve a deck for every leader group on a process pool, appending one JSON line per deck.
+
+    Leader groups already in the output file are skipped, so an interrupted
+    overnight run picks up where it stopped. A group that fails (an unknown
+    card, leaders the format doesn't allow) is reported and left out of the
+    file, so a later run tries it again; the rest of the batch carries on.
+    Returns the number of decks solved.
+    """
+    output_path = Path(output_path)
+    done = set()
+    if output_path.exists():
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(tuple(json.loads(line)['leaders']))
+                except (ValueError, KeyError):
+                    continue
+    todo = [pair for pair in pairs if tuple(pair) not in done]
+    print(f"Solving {len(todo)} decks ({len(done)} already in {output_path})")
+
+    solved = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as pool, \
+            open(output_path, 'a', encoding='utf-8') as out:
+        futures = {pool.submit(_solve_for, tuple(pair), options, time_limit): pair for pair in todo}
+        for future in as_completed(futures):
+            try:
+                deck = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  Failed {' + '.join(futures[future])}: {e}")
+                continue
+            out.write(json.dumps(deck) + "\n")
+            out.flush()
+            solved += 1
+            if solved % 50 == 0 or solved + failed == len(todo):
+                print(f"  {solved}/{len(todo)} decks")
+    if failed:
+        print(f"{failed} leader groups failed; run again to retry them")
+    return solved
+
+
+def print_deck(deck: Deck) -> None:
+    print("=" * 60)
+    print("Leaders: " + " + ".join(f"{leader.get('Name')} ({card_key(leader)})" for leader in deck.leaders))
+    if deck.base:
+        print(f"Base: {deck.base.get('Name')} ({card_key(deck.base)})")
+    status = "optimal" if deck.optimal else "best found in time limit"
+    print(f"{deck.size} cards | value {deck.value:.2f} | ${deck.price:.2f} | {status} ({deck.nodes} nodes, {deck.seconds:.2f}s)")
+    print("=" * 60)
+    for card, count in sorted(deck.cards, key=lambda item: (parse_cost(item[0]) or 0, item[0].get('Name', ''))):
+        name = card.get('Name', 'Unknown') + (f" - {card['Subtitle']}" if card.get('Subtitle') else '')
+        print(f"{count}x [{card.get('Cost', '-')}] {name} ({card_key(card)}, {card.get('Type')})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Build the best deck for a set of leaders.")
+    parser.add_argument('leaders', nargs='*', metavar='SET/NUMBER', help="leader cards, e.g. SOR/005 SOR/010")
+    parser.add_argument('--all-pairs', action='store_true', help="solve every Twin Suns leader pair (batch mode)")
+    parser.add_argument('--output', default='database/decks.jsonl', help="batch output file (default: database/decks.jsonl)")
+    parser.add_argument('--workers', type=int, help="batch worker processes (default: one per CPU)")
+    parser.add_argument('--db', default='database/swu_cards.json', help="card database (default: database/swu_cards.json)")
+    parser.add_argument('--base', metavar='SET/NUMBER', help="base card; its aspect counts towards coverage")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='twin_suns', dest='deck_format')
+    parser.add_argument('--objective', choices=sorted(OBJECTIVES), default='synergy')
+    parser.add_argument('--budget', type=float, help="maximum total MarketPrice of the deck")
+    parser.add_argument('--curve', help="maximum cards per cost, comma-separated from cost 0; the last covers higher costs")
+    parser.add_argument('--allow-penalty', action='store_true', help="allow cards needing aspects the leaders lack")
+    parser.add_argument('--deck-size', type=int, help="main deck size (default: the format's)")
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help=f"seconds per deck; 0 = search until optimal (default: {DEFAULT_TIME_LIMIT:g})")
+    return parser
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.leaders and not args.all_pairs:
+        parser.error("give leader cards or --all-pairs")
+    if args.all_pairs and FORMATS[args.deck_format]['leaders'] != 2:
+        parser.error(f"--all-pairs solves two-leader decks; --format {args.deck_format} takes "
+                     f"{FORMATS[args.deck_format]['leaders']} leader(s)")
+    return args
+
+
+def main(argv=None):
+    """Optimize one deck, or every leader pair in batch mode."""
+    args = parse_args(argv)
+    options = {
+        'base': args.base,
+        'deck_format': args.deck_format,
+        'objective': args.objective,
+        'budget': args.budget,
+        'curve': [int(n) for n in args.curve.split(',')] if args.curve else None,
+        'allow_penalty': args.allow_penalty,
+        'deck_size': args.deck_size,
+    }
+    time_limit = args.time_limit or None
+
+    if args.all_pairs:
+        pairs = leader_pairs(SWUCardDatabase(args.db))
+        optimize_batch(args.db, pairs, args.output, options, time_limit, args.workers)
+        return
+
+    db = SWUCardDatabase(args.db)
+    problem_options = {name: value for name, value in options.items() if name != 'base'}
+    try:
+        leaders = [resolve_card(db, key) for key in args.leaders]
+        base = resolve_card(db, args.base) if args.base else None
+        problem = DeckProblem(db, leaders, base, **problem_options)
+    except ValueError as e:
+        build_parser().error(str(e))
+    deck = problem.solve(time_limit)
+    if not deck.cards:
+        print("No legal deck: not enough eligible cards for the constraints")
+        return
+    print_deck(deck)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple, NamedTuple, Union
+
+from deck_optimizer import FORMATS, card_key
+from query_cards import SWUCardDatabase, card_number_key, parse_cost
+
+# Batches at least this large are resolved on a process pool (if workers allow)
+PARALLEL_MIN_DECKS = 20000
+CHUNK_DECKS = 2000
+
+# "SOR/010", "SOR_010", "sor 10"
+CARD_ID = re.compile(r'^([A-Za-z]{2,4})[\s/_-]+(\d{1,3})$')
+# "3 Name", "3x Name", "Name x3"
+COUNTED_LINE = re.compile(r'^(?:(\d+)\s*[xX]?\s+)?(.*?)(?:\s+[xX]\s*(\d+))?$')
+SECTION_HEADER = re.compile(r'^(leaders?|bases?|deck|main\s*deck|sideboard)\s*(?:\(\d+\))?\s*:?$', re.IGNORECASE)
+
+Decklist = Union[str, Dict[str, Any], Iterable[Any]]
+
+
+class ResolvedDeck(NamedTuple):
+    """A decklist matched to the database, with its aggregates.
+
+    Cards are SET/NUMBER keys. `unknown` lists the entries that matched no
+    card (or several different ones). `aspects` has the aspect icons of the
+    main deck, the aspects the leaders and base provide, and how many main
+    deck cards need an aspect they don't (and so cost more to play).
+    """
+    name: Optional[str]
+    leaders: List[str]
+    base: Optional[str]
+    cards: List[Tuple[str, int]]
+    sideboard: List[Tuple[str, int]]
+    unknown: List[str]
+    size: int
+    cost_curve: Dict[int, int]
+    types: Dict[str, int]
+    aspects: Dict[str, Any]
+    price: float
+    problems: List[str]
+
+    def to_json(self) -> Dict[str, Any]:
+        deck = self._asdict()
+        deck['cards'] = [{'card': key, 'count': count} for key, count in self.cards]
+        deck['sideboard'] = [{'card': key, 'count': count} for key, count in self.sideboard]
+        deck['price'] = round(self.price, 2)
+        return deck
+
+
+def normalize_name(text: str) -> str:
+    """Case, accents, punctuation and spacing folded away: 'Darth Vader, Dark Lord...' -> 'darth vader dark lord...'."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return ' '.join(re.sub(r"[^a-z0-9]+", ' ', text.replace("'", '').replace('’', '')).split())
+
+
+def _price(card: Dict[str, Any]) -> float:
+    try:
+        return float(card.get('MarketPrice'))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class CardFacts(NamedTuple):
+    """What deck aggregates need from a card, computed once per card."""
+    card: Dict[str, Any]
+    key: str
+    title: str                             # normalized name and subtitle, shared by reprints
+    type: str
+    aspects: Tuple[Tuple[str, int], ...]   # (aspect, icons)
+    cost: Optional[int]
+    price: float
+
+    @classmethod
+    def of(cls, card: Dict[str, Any]) -> 'CardFacts':
+        title = normalize_name(f"{card.get('Name') or ''} {card.get('Subtitle') or ''}")
+        return cls(card, card_key(card), title, card.get('Type') or 'Unknown',
+                   tuple(Counter(card.get('Aspects') or []).items()), parse_cost(card), _price(card))
+
+
+def _counted(text: str) -> Tuple[str, int]:
+    count, entry, trailing = COUNTED_LINE.match(text.strip()).groups()
+    return entry, int(count or trailing or 1)
+
+
+class DeckResolver:
+    """Resolves decklists against lookup keys built once over all cards.
+
+    An entry is a card id (SET/NUMBER, SET_NUMBER as in SWUDB exports) or
+    a name with or without its subtitle ("Darth Vader, Dark Lord of the
+    Sith" or "Darth Vader - Dark Lord of the Sith"), compared without case,
+    accents or punctuation. A name alone resolves if only one card has it.
+    Reprints resolve to their first printing in database order. Each
+    distinct entry (and decklist line) is resolved once per resolver,
+    however many decks use it.
+    """
+
+    def __init__(self, cards: Iterable[Dict[str, Any]]):
+        self.by_number: Dict[Tuple[str, str], CardFacts] = {}
+        self.by_full_name: Dict[str, CardFacts] = {}
+        full_names_by_name: Dict[str, set] = {}
+        for card in cards:
+            facts = CardFacts.of(card)
+            self.by_number.setdefault(card_number_key(card.get('Set', ''), card.get('Number', '')), facts)
+            name = normalize_name(card.get('Name') or '')
+            full_name = facts.title
+            self.by_full_name.setdefault(full_name, facts)
+            full_names_by_name.setdefault(name, set()).add(full_name)
+        # Unambiguous names only; a name alone that is also a full name (no subtitle) is already above
+        self.by_name = {name: self.by_full_name[next(iter(full_names))]
+                        for name, full_names in full_names_by_name.items() if len(full_names) == 1}
+        self._entries: Dict[str, Optional[CardFacts]] = {}
+        self._lines: Dict[str, Tuple[str, int]] = {}
+
+    def _match(self, entry: str) -> Optional[CardFacts]:
+        if entry in self._entries:
+            return self._entries[entry]
+        facts = None
+        match = CARD_ID.match(entry.strip())
+        if match:
+            facts = self.by_number.get(card_number_key(match.group(1), match.group(2)))
+        if facts is None:
+            name = normalize_name(entry)
+            facts = self.by_full_name.get(name) or self.by_name.get(name)
+        self._entries[entry] = facts
+        return facts
+
+    def lookup(self, entry: str) -> Optional[Dict[str, Any]]:
+        """The card an entry names, or None."""
+        facts = self._match(entry)
+        return facts.card if facts else None
+
+    def _counted(self, line: str) -> Tuple[str, int]:
+        parsed = self._lines.get(line)
+        if parsed is None:
+            parsed = self._lines[line] = _counted(line)
+        return parsed
+
+    def entries(self, decklist: Decklist) -> Tuple[Optional[str], List[Tuple[str, int, str]]]:
+        """(deck name, [(entry, count, section)]) of a decklist in any supported form.
+
+        Forms: decklist text (one "3 Name" or "3x SOR/010" per line, with
+        optional Leader/Base/Deck/Sideboard headers and # comments); a
+        SWUDB-style JSON dict ('leader', 'secondleader', 'base', 'deck',
+        'sideboard' with {'id', 'count'}); or a list of entries, each text
+        ("2 SOR/010"), a (set, number[, count]) tuple or an {'id', 'count'} dict.
+        Outside a Sideboard section, the card type decides where a card goes.
+        """
+        if isinstance(decklist, str):
+            entries, section = [], 'deck'
+            for line in decklist.splitlines():
+                line = line.strip()
+                if not line or line.startswith(('#', '//')):
+                    continue
+                header = SECTION_HEADER.match(line)
+                if header:
+                    section = 'sideboard' if header.group(1).lower() == 'sideboard' else 'deck'
+                    continue
+                entries.append((*self._counted(line), section))
+            return None, entries
+
+        if isinstance(decklist, dict):
+            name = (decklist.get('metadata') or {}).get('name') or decklist.get('name')
+            entries = []
+            for field, section in (('leader', 'deck'), ('secondleader', 'deck'), ('base', 'deck'),
+                                   ('deck', 'deck'), ('sideboard', 'sideboard')):
+                value = decklist.get(field)
+                for item in ([value] if isinstance(value, dict) else value or []):
+                    entries.append((str(item.get('id', '')), int(item.get('count', 1)), section))
+            return name, entries
+
+        entries = []
+        for item in decklist:
+            if isinstance(item, dict):
+                entries.append((str(item.get('id', '')), int(item.get('count', 1)), 'deck'))
+            elif isinstance(item, (tuple, list)):
+                set_code, number, *count = item
+                entries.append((f"{set_code}/{number}", int(count[0]) if count else 1, 'deck'))
+            else:
+                entries.append((*self._counted(str(item)), 'deck'))
+        return None, entries
+
+    def resolve(self, decklist: Decklist, deck_format: Optional[str] = None) -> ResolvedDeck:
+        """Resolve one decklist; with `deck_format`, also check it against that format's rules."""
+        name, entries = self.entries(decklist)
+        leaders: List[CardFacts] = []
+        bases: List[CardFacts] = []
+        main: Dict[str, int] = {}
+        sideboard: Dict[str, int] = {}
+        facts_by_key: Dict[str, CardFacts] = {}
+        unknown = []
+
+        for entry, count, section in entries:
+            facts = self._match(entry)
+            if facts is None:
+                unknown.append(entry)
+                continue
+            key = facts.key
+            facts_by_key[key] = facts
+            if section == 'sideboard':
+                sideboard[key] = sideboard.get(key, 0) + count
+            elif facts.type == 'Leader':
+                leaders.append(facts)
+            elif facts.type == 'Base':
+                bases.append(facts)
+            else:
+                main[key] = main.get(key, 0) + count
+
+        provided: Dict[str, int] = {}
+        for facts in leaders + bases[:1]:
+            for aspect, icon_count in facts.aspects:
+                provided[aspect] = provided.get(aspect, 0) + icon_count
+        icons: Dict[str, int] = {}
+        curve: Dict[int, int] = {}
+        types: Dict[str, int] = {}
+        penalty_cards = 0
+        price = sum(facts.price for facts in leaders + bases[:1])
+        for key, count in main.items():
+            facts = facts_by_key[key]
+            off_aspect = False
+            for aspect, icon_count in facts.aspects:
+                icons[aspect] = icons.get(aspect, 0) + icon_count * count
+                off_aspect = off_aspect or icon_count > provided.get(aspect, 0)
+            if off_aspect:
+                penalty_cards += count
+            if facts.cost is not None:
+                curve[facts.cost] = curve.get(facts.cost, 0) + count
+            types[facts.type] = types.get(facts.type, 0) + count
+            price += facts.price * count
+
+        size = sum(main.values())
+        problems = []
+        if deck_format is not None:
+            rules = FORMATS[deck_format]
+            if len(leaders) != rules['leaders']:
+                problems.append(f"{len(leaders)} leaders, expected {rules['leaders']}")
+            if len(bases) != 1:
+                problems.append(f"{len(bases)} bases, expected 1")
+            if size < rules['deck_size']:
+                problems.append(f"{size} main deck cards, expected at least {rules['deck_size']}")
+            # The copy limit is per card name, so reprints in other sets count together
+            copies: Dict[str, List[Any]] = {}
+            for counts in (main, sideboard):
+                for key, count in counts.items():
+                    facts = facts_by_key[key]
+                    copies.setdefault(facts.title, [facts, 0])[1] += count
+            for facts, total in copies.values():
+                if total > rules['copies']:
+                    card = facts.card
+                    title = f"{card.get('Name', '')}, {card['Subtitle']}" if card.get('Subtitle') else card.get('Name', '')
+                    problems.append(f"{total} copies of {title}, at most {rules['copies']} allowed")
+            if unknown:
+                problems.append(f"{len(unknown)} unknown cards")
+
+        return ResolvedDeck(
+            name=name,
+            leaders=[facts.key for facts in leaders],
+            base=bases[0].key if bases else None,
+            cards=list(main.items()),
+            sideboard=list(sideboard.items()),
+            unknown=unknown,
+            size=size,
+            cost_curve=dict(sorted(curve.items())),
+            types=types,
+            aspects={'icons': icons, 'provided': sorted(provided), 'penalty_cards': penalty_cards},
+            price=price,
+            problems=problems,
+        )
+
+
+_worker_resolver: Dict[str, DeckResolver] = {}
+
+
+def _init_worker(backend: type, db_path: str) -> None:
+    _worker_resolver['resolver'] = DeckResolver(backend(db_path, quiet=True).cards)
+
+
+def _resolve_chunk(decklists: List[Decklist], deck_format: Optional[str]) -> List[ResolvedDeck]:
+    resolver = _worker_resolver['resolver']
+    return [resolver.resolve(decklist, deck_format) for decklist in decklists]
+
+
+def resolve_decklists(db: SWUCardDatabase, decklists: Sequence[Decklist], deck_format: Optional[str] = None,
+                      workers: Optional[int] = None, resolver: Optional[DeckResolver] = None) -> List[ResolvedDeck]:
+    """Resolve many decklists, in order (see SWUCardDatabase.resolve_decklists).
+
+    Batches of PARALLEL_MIN_DECKS or more are split into chunks over a
+    process pool of `workers` processes (default: one per CPU), each of
+    which opens db.db_path with the same backend class as `db` (JSON or
+    SQLite); workers=1 keeps everything in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(decklists) >= PARALLEL_MIN_DECKS:
+        chunks = [list(decklists[start:start + CHUNK_DECKS]) for start in range(0, len(decklists), CHUNK_DECKS)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(type(db), str(db.db_path))) as pool:
+            return [deck for chunk in pool.map(_resolve_chunk, chunks, [deck_format] * len(chunks))
+                    for deck in chunk]
+    resolver = resolver or DeckResolver(db.cards)
+    return [resolver.resolve(decklist, deck_format) for decklist in decklists]
+
+
+def load_decklists(paths: Iterable[str]) -> List[Decklist]:
+    """Decklists from files: .txt (one deck), .json (a deck or a list of decks), .jsonl (one deck per line)."""
+    decklists = []
+    for path in map(Path, paths):
+        if path.suffix == '.jsonl':
+            with open(path, 'r', encoding='utf-8') as f:
+                decklists.extend(json.loads(line) for line in f if line.strip())
+        elif path.suffix == '.json':
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            decklists.extend(data if isinstance(data, list) else [data])
+        else:
+            decklists.append(path.read_text(encoding='utf-8'))
+    return decklists
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Resolve decklists against the card database and summarize them.")
+    parser.add_argument('files', nargs='+', help="decklist files: .txt, .json (SWUDB export or list of them), .jsonl")
+    parser.add_argument('--db', default='database/swu_cards.json', help="card database (default: database/swu_cards.json)")
+    parser.add_argument('--format', choices=sorted(FORMATS), dest='deck_format', help="check decks against a format")
+    parser.add_argument('--workers', type=int, help="worker processes for large batches (default: one per CPU)")
+    parser.add_argument('--output', help="write one JSON line per resolved deck to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Resolve decklist files and report unknown cards and rule problems."""
+    args = parse_args(argv)
+    decklists = load_decklists(args.files)
+    db = SWUCardDatabase(args.db)
+    decks = db.resolve_decklists(decklists, deck_format=args.deck_format, workers=args.workers)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for deck in decks:
+                f.write(json.dumps(deck.to_json()) + "\n")
+        print(f"Saved {len(decks)} resolved decks to: {args.output}")
+
+    unknown = Counter(entry for deck in decks for entry in deck.unknown)
+    with_problems = [(number, deck) for number, deck in enumerate(decks, 1) if deck.problems]
+    print(f"\nResolved {len(decks)} decks: {sum(1 for deck in decks if deck.unknown)} with unknown cards"
+          + (f", {len(with_problems)} breaking {args.deck_format} rules" if args.deck_format else ""))
+    if len(decks) == 1:
+        deck = decks[0]
+        print(f"Leaders: {', '.join(deck.leaders) or '-'} | Base: {deck.base or '-'} | "
+              f"{deck.size} cards | ${deck.price:.2f}")
+        print("Cost curve: " + ", ".join(f"{cost}: {count}" for cost, count in deck.cost_curve.items()))
+        print("Aspect icons: " + ", ".join(f"{aspect}: {count}" for aspect, count in deck.aspects['icons'].items())
+              + f" ({deck.aspects['penalty_cards']} cards off-aspect)")
+    for number, deck in with_problems[:10]:
+        print(f"  {deck.name or f'deck {number}'}: {'; '.join(deck.problems)}")
+    if unknown:
+        print(f"\nUnknown cards ({len(unknown)} distinct):")
+        for entry, count in unknown.most_common(20):
+            print(f"  {count}x {entry}")
+
+
+if __name__ == "__main__":
+    main()
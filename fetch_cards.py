@@ -1,9 +1,26 @@
+import argparse
 import requests
 import json
+import os
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 
+from art_mirror import ART_DIR, DEFAULT_THUMBNAIL_SIZE, mirror_art
+from card_export import DatabaseExporter
+from card_snapshot import file_digest
+from fetch_metrics import METRICS_JSON_FILE, METRICS_TEXTFILE, FetchMetrics
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, CachedResponse, ResponseCache
+from price_history import HISTORY_FILE, PriceHistory
+from request_control import (DEFAULT_RETRIES, MAX_RETRY_AFTER, RETRYABLE_STATUSES, AdaptiveConcurrency,
+                             CircuitBreaker, CircuitOpenError, backoff_delay, parse_retry_after)
+from stats_cube import CUBE_FILE, StatsCube
+
 # Known card sets (fallback if auto-detection fails)
 KNOWN_CARD_SETS = {
     'SOR': 252,  # Spark of Rebellion
@@ -17,12 +34,194 @@ KNOWN_CARD_SETS = {
 API_BASE_URL = "https://api.swu-db.com/cards"
 SETS_PAGE_URL = "https://www.swu-db.com/sets"
 
-def discover_card_sets():
+# Be respectful to the API - the whole run shares one request budget
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_WORKERS = 8
+
+# How long cached responses are used before revalidating with the server
+CARD_CACHE_TTL = 24 * 3600
+SETS_CACHE_TTL = 24 * 3600
+
+class RateLimiter:
+    """Spread requests evenly so all worker threads share one requests-per-second budget."""
+    
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+    
+    def wait(self):
+        """Block until the next request slot is free."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+    
+    def defer(self, seconds):
+        """Hold every request back for `seconds`, e.g. when the server sent Retry-After."""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+class ApiClient:
+    """HTTP client shared by all fetches: keep-alive sessions per thread and a global rate limit.
+    
+    With a `cache`, fresh responses are served from disk and expired ones are
+    revalidated with ETag/Last-Modified. In `offline` mode every response comes
+    from the cache (whatever its age); misses get a 504 like an HTTP
+    only-if-cached request, and the network is never touched.
+    
+    Requests in flight are capped by an AIMD limit of up to `max_concurrency`
+    that backs off when the server answers 429/5xx or slows down (see
+    request_control.AdaptiveConcurrency). Those responses and network errors
+    are retried up to `max_retries` times with jittered exponential backoff,
+    waiting at least as long as a Retry-After header asks. A circuit
+    breaker per host stops requests to a host that keeps failing.
+    
+    Every response is recorded in `metrics` (see fetch_metrics.FetchMetrics).
+    """
+    
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 api_base_url=API_BASE_URL, sets_page_url=SETS_PAGE_URL,
+                 cache=None, offline=False, metrics=None,
+                 max_concurrency=DEFAULT_WORKERS, max_retries=DEFAULT_RETRIES):
+        if offline and cache is None:
+            raise ValueError("offline mode needs a response cache")
+        self.api_base_url = api_base_url.rstrip('/')
+        self.sets_page_url = sets_page_url
+        self.limiter = RateLimiter(requests_per_second)
+        self.cache = cache
+        self.offline = offline
+        self.metrics = metrics if metrics is not None else FetchMetrics()
+        self.max_retries = max_retries
+        self.concurrency = AdaptiveConcurrency(max_concurrency, on_change=self.metrics.concurrency)
+        self._breakers = {}
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """The calling thread's session (requests.Session is not safe to share across threads)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+    
+    def endpoint(self, url):
+        """Which kind of request a URL is, for the metrics."""
+        if url.startswith(self.api_base_url):
+            return 'cards'
+        if url == self.sets_page_url:
+            return 'sets'
+        return 'other'
+    
+    def get(self, url, timeout=10, ttl=None):
+        """GET a URL within the request budget, reusing the thread's connection."""
+        endpoint = self.endpoint(url)
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            response = self.cache.load(url, entry)
+            self.metrics.observe_request(endpoint, response.status_code, None, len(response.content), 'cache')
+            return response
+        if self.offline:
+            self.metrics.observe_request(endpoint, 504, None, 0, 'cache')
+            return CachedResponse(url, 504, b"")
+        
+        headers = self.cache.conditional_headers(entry) if entry else {}
+        breaker = self.breaker(url)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response, seconds = self._send(url, endpoint, breaker, timeout, headers)
+            except CircuitOpenError as e:
+                error, reason, delay = e, "circuit_open", e.retry_in
+            except requests.RequestException as e:
+                error, reason, delay = e, type(e).__name__, backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRYABLE_STATUSES:
+                    break
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                    return response
+                if retry_after is not None:
+                    # The server wants a break from all of us, not just this request
+                    self.limiter.defer(retry_after)
+                error, reason, delay = None, f"HTTP {response.status_code}", backoff_delay(attempt, retry_after)
+            
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+            self.metrics.retry(reason)
+            time.sleep(delay)
+        
+        if self.cache:
+            if response.status_code == 304 and entry:
+                self.cache.revalidated(url, entry, ttl)
+                return self.cache.load(url, entry)
+            self.cache.store(url, response, ttl)
+        return response
+    
+    def breaker(self, url):
+        """The circuit breaker of a URL's host."""
+        host = urlparse(url).netloc
+        with self._sessions_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, on_open=self.metrics.circuit_opened)
+        return breaker
+    
+    def _send(self, url, endpoint, breaker, timeout, headers):
+        """Send one request within the concurrency limit and rate budget; returns (response, seconds)."""
+        breaker.before_request()
+        self.concurrency.acquire()
+        seconds, failed = None, True
+        try:
+            self.limiter.wait()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=timeout, headers=headers)
+            except Exception as e:
+                self.metrics.observe_error(endpoint, e, time.perf_counter() - start)
+                raise
+            seconds = time.perf_counter() - start
+            failed = response.status_code in RETRYABLE_STATUSES
+            source = 'revalidated' if response.status_code == 304 else 'network'
+            self.metrics.observe_request(endpoint, response.status_code, seconds, len(response.content), source)
+            return response, seconds
+        finally:
+            self.concurrency.release(seconds, congested=failed)
+            breaker.record(not failed)
+    
+    def close(self):
+        """Close every session opened by this client."""
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+_default_client = None
+
+def get_default_client():
+    """Return the module-wide client used when callers don't pass their own."""
+    global _default_client
+    if _default_client is None:
+        _default_client = ApiClient()
+    return _default_client
+
+def discover_card_sets(client=None):
     """Automatically discover available card sets from the SWU-DB website."""
+    client = client or get_default_client()
     print("Discovering available card sets...")
     
     try:
-        response = requests.get(SETS_PAGE_URL, timeout=15)
+        response = client.get(client.sets_page_url, timeout=15, ttl=SETS_CACHE_TTL)
         if response.status_code != 200:
             print(f"Failed to fetch sets page. Using known sets as fallback.")
             return KNOWN_CARD_SETS
@@ -68,178 +267,638 @@ def discover_card_sets():
         print("Using known sets as fallback.")
         return KNOWN_CARD_SETS
 
-def fetch_card(set_code, card_number):
-    """Fetch a single card from the API."""
-    url = f"{API_BASE_URL}/{set_code.lower()}/{card_number}?format=json"
+def fetch_card(set_code, card_number, client=None, dead_letters=None):
+    """Fetch a single card from the API.
+    
+    Failures that may pass (rate limiting, server errors, network errors
+    that outlasted the client's retries) put the card in `dead_letters` to be
+    tried again later; success or a definite answer such as 404 takes it out.
+    """
+    client = client or get_default_client()
+    url = f"{client.api_base_url}/{set_code.lower()}/{card_number}?format=json"
+    job = (set_code, card_number)
     try:
-        response = requests.get(url, timeout=10)
+        response = client.get(url, timeout=10, ttl=CARD_CACHE_TTL)
         if response.status_code == 200:
-            return response.json()
+            card_data = response.json()
+            if dead_letters is not None:
+                dead_letters.resolve(job)
+            return card_data
         else:
             print(f"Failed to fetch {set_code}/{card_number}: Status {response.status_code}")
-            return None
+            reason = f"HTTP {response.status_code}"
+            transient = response.status_code in RETRYABLE_STATUSES
     except Exception as e:
         print(f"Error fetching {set_code}/{card_number}: {e}")
-        return None
+        reason = f"{type(e).__name__}: {e}"
+        transient = True
+    
+    client.metrics.failure(set_code, card_number, reason)
+    if dead_letters is not None:
+        if transient:
+            dead_letters.add(job, reason)
+        else:
+            dead_letters.resolve(job)
+    return None
 
-def build_database(card_sets=None):
-    """Build the complete card database."""
-    if card_sets is None:
-        card_sets = discover_card_sets()
+def fetch_job(job, client, dead_letters=None):
+    """Fetch one (set_code, card_number) job, timing it in the client's metrics."""
+    client.metrics.job_started()
+    start = time.perf_counter()
+    card_data = fetch_card(job[0], job[1], client, dead_letters)
+    client.metrics.job_finished(job, time.perf_counter() - start, card_data is not None)
+    return card_data
+
+def fetch_cards_concurrently(jobs, client, workers=DEFAULT_WORKERS, dead_letters=None):
+    """Fetch (set_code, card_number) jobs, yielding results in job order."""
+    client.metrics.jobs_queued(len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield fetch_job(job, client, dead_letters)
+        return
     
-    all_cards = []
-    total_cards = sum(card_sets.values())
-    current_card = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(lambda job: fetch_job(job, client, dead_letters), jobs)
+
+def fetch_jobs(jobs, card_sets, client, workers=DEFAULT_WORKERS, on_result=None, dead_letters=None):
+    """Fetch a list of (set_code, card_number) jobs and return the cards found.
     
-    print(f"\nStarting to fetch {total_cards} cards from {len(card_sets)} sets...")
+    `on_result(job, card_data)` is called for every job in order, including
+    failed ones (with `card_data=None`). Transient failures go to
+    `dead_letters` (see fetch_card).
+    """
+    fetched = []
+    total_cards = len(jobs)
+    current_set = None
+    set_started = time.perf_counter()
     
-    for set_code, card_count in card_sets.items():
-        print(f"\nFetching {set_code} set ({card_count} cards)...")
+    results = fetch_cards_concurrently(jobs, client, workers, dead_letters)
+    for current_card, (job, card_data) in enumerate(zip(jobs, results), 1):
+        set_code = job[0]
+        if set_code != current_set:
+            now = time.perf_counter()
+            if current_set is not None:
+                client.metrics.set_done(current_set, now - set_started)
+            current_set, set_started = set_code, now
+            print(f"\nFetching {set_code} set ({card_sets.get(set_code, '?')} cards)...")
         
-        for card_num in range(1, card_count + 1):
-            current_card += 1
-            card_data = fetch_card(set_code, card_num)
-            
+        if on_result:
+            on_result(job, card_data)
+        if card_data:
+            fetched.append(card_data)
+            if current_card % 50 == 0:
+                print(f"Progress: {current_card}/{total_cards} cards fetched ({current_card/total_cards*100:.1f}%)")
+    
+    if current_set is not None:
+        client.metrics.set_done(current_set, time.perf_counter() - set_started)
+    return fetched
+
+DEAD_LETTER_FILE = "dead_letters.jsonl"
+
+# Pause before retrying dead letters, so a struggling server gets a moment to recover
+DEAD_LETTER_DELAY = 5.0
+
+class DeadLetterQueue:
+    """Persisted set of card jobs that failed transiently, to be fetched again.
+    
+    Every failure and every recovery is appended to the file as one JSON line
+    as it happens, so the queue survives a crash. save() rewrites the file
+    with just the jobs still failing, or removes it once there are none.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if self.path.exists():
+            self._load()
+    
+    def _load(self):
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            # Drop a line torn by a crash mid-write
+            data = data[:data.rfind(b"\n") + 1]
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(data))
+        for line in data.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            job = tuple(entry['job'])
+            if entry.get('resolved'):
+                self.entries.pop(job, None)
+            else:
+                self.entries[job] = entry
+    
+    def _append(self, entry):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+    
+    def add(self, job, reason):
+        """Record a failed job (again, if it was already queued)."""
+        with self._lock:
+            attempts = self.entries.get(job, {}).get('attempts', 0) + 1
+            entry = {'job': list(job), 'reason': reason, 'attempts': attempts,
+                     'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}
+            self.entries[job] = entry
+            self._append(entry)
+    
+    def resolve(self, job):
+        """Take a job out of the queue, if it is in it."""
+        with self._lock:
+            if self.entries.pop(job, None) is not None:
+                self._append({'job': list(job), 'resolved': True})
+    
+    def jobs(self):
+        with self._lock:
+            return list(self.entries)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def save(self):
+        """Compact the file to the jobs still failing."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if not self.entries:
+                self.path.unlink(missing_ok=True)
+                return
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+
+def retry_dead_letters(dead_letters, client, workers=DEFAULT_WORKERS, only=None):
+    """Fetch the queued jobs (those in `only`, if given) again; returns {job: card} for the recovered ones."""
+    jobs = [job for job in dead_letters.jobs() if only is None or job in only]
+    if not jobs:
+        return {}
+    
+    print(f"\nRetrying {len(jobs)} failed cards from the dead-letter queue...")
+    time.sleep(DEAD_LETTER_DELAY)
+    recovered = {}
+    with client.metrics.stage('dead_letters'):
+        for job, card_data in zip(jobs, fetch_cards_concurrently(jobs, client, workers, dead_letters)):
             if card_data:
-                all_cards.append(card_data)
-                if current_card % 50 == 0:
-                    print(f"Progress: {current_card}/{total_cards} cards fetched ({current_card/total_cards*100:.1f}%)")
-            
-            # Be respectful to the API - small delay between requests
-            time.sleep(0.1)
+                recovered[job] = card_data
+    print(f"Recovered {len(recovered)}/{len(jobs)} cards.")
+    return recovered
+
+def build_database(card_sets=None, client=None, workers=DEFAULT_WORKERS, on_card=None, dead_letters=None):
+    """Build the complete card database.
+    
+    Cards are fetched by a pool of `workers` threads sharing the client's
+    request budget; the result is in the same order as a serial run.
+    `on_card(card)` is called for each card as it arrives, e.g. to stream
+    it into a DatabaseExporter. With a DeadLetterQueue, cards that failed
+    transiently are retried once more at the end; those reach `on_card`
+    last but take their place in the returned list.
+    """
+    client = client or get_default_client()
+    if card_sets is None:
+        with client.metrics.stage('discover'):
+            card_sets = discover_card_sets(client)
+    
+    jobs = [(set_code, card_num)
+            for set_code, card_count in card_sets.items()
+            for card_num in range(1, card_count + 1)]
+    total_cards = len(jobs)
+    
+    print(f"\nStarting to fetch {total_cards} cards from {len(card_sets)} sets ({workers} workers)...")
+    fetched = {}
+    
+    def on_result(job, card_data):
+        if card_data:
+            fetched[job] = card_data
+            if on_card:
+                on_card(card_data)
+    
+    with client.metrics.stage('fetch'):
+        fetch_jobs(jobs, card_sets, client, workers, on_result, dead_letters)
+    if dead_letters is not None:
+        for job, card_data in retry_dead_letters(dead_letters, client, workers, only=set(jobs)).items():
+            on_result(job, card_data)
+    all_cards = [fetched[job] for job in jobs if job in fetched]
     
     print(f"\nCompleted! Successfully fetched {len(all_cards)}/{total_cards} cards.")
     return all_cards
 
-def save_database(cards, output_dir="database"):
-    """Save the database in multiple formats."""
-    Path(output_dir).mkdir(exist_ok=True)
-    
-    # Save as JSON
+SYNC_JOURNAL_FILE = "sync_journal.jsonl"
+SYNC_STATE_FILE = "sync_state.json"
+
+def card_key(card):
+    """Return the (set_code, card_number) pair identifying a card."""
+    return card.get('Set', 'UNKNOWN'), int(card.get('Number', 0))
+
+def load_database(output_dir="database"):
+    """Load the previously saved card list, or an empty list if there is none."""
     json_path = Path(output_dir) / "swu_cards.json"
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(cards, f, indent=2, ensure_ascii=False)
-    print(f"Saved JSON database: {json_path} ({json_path.stat().st_size / 1024:.1f} KB)")
+    if not json_path.exists():
+        return []
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+class SyncJournal:
+    """Append-only log of the jobs completed by a sync, used to resume after a crash.
     
-    # Save as CSV
-    if cards:
-        import csv
-        csv_path = Path(output_dir) / "swu_cards.csv"
+    Each line records one (set, number) job and the card it returned (or null
+    if the fetch failed), and is flushed to disk before the next job is logged.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+    
+    def load(self):
+        """Return {(set_code, card_number): card_or_None} for every logged job."""
+        done = {}
+        if not self.path.exists():
+            return done
         
-        # Get all unique keys from all cards
-        all_keys = set()
-        for card in cards:
-            all_keys.update(card.keys())
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            # A crash mid-write leaves a truncated last line; drop it so new entries start clean
+            data = data[:data.rfind(b"\n") + 1]
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(data))
         
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=sorted(all_keys))
-            writer.writeheader()
-            for card in cards:
-                # Flatten lists/dicts to strings for CSV
-                row = {}
-                for key, value in card.items():
-                    if isinstance(value, (list, dict)):
-                        row[key] = json.dumps(value)
-                    else:
-                        row[key] = value
-                writer.writerow(row)
-        print(f"Saved CSV database: {csv_path} ({csv_path.stat().st_size / 1024:.1f} KB)")
-    
-    # Save organized by set
-    by_set_dir = Path(output_dir) / "by_set"
-    by_set_dir.mkdir(exist_ok=True)
-    
-    cards_by_set = {}
-    for card in cards:
-        set_code = card.get('Set', 'UNKNOWN')
-        if set_code not in cards_by_set:
-            cards_by_set[set_code] = []
-        cards_by_set[set_code].append(card)
-    
-    for set_code, set_cards in cards_by_set.items():
-        set_path = by_set_dir / f"{set_code}.json"
-        with open(set_path, 'w', encoding='utf-8') as f:
-            json.dump(set_cards, f, indent=2, ensure_ascii=False)
-        print(f"Saved {set_code}: {len(set_cards)} cards")
-
-def create_summary_stats(cards):
-    """Generate summary statistics about the database."""
-    stats = {
-        'total_cards': len(cards),
-        'by_set': {},
-        'by_type': {},
-        'by_rarity': {},
-        'by_aspect': {},
-        'by_arena': {},
+        for line in data.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            done[tuple(entry['job'])] = entry['card']
+        return done
+    
+    def record(self, job, card_data):
+        """Durably append one finished job."""
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'job': list(job), 'card': card_data}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def clear(self):
+        """Remove the journal once its results have been saved."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+def load_sync_state(output_dir="database"):
+    """Load {set_code: last synced ISO timestamp}."""
+    state_path = Path(output_dir) / SYNC_STATE_FILE
+    if not state_path.exists():
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_sync_state(set_codes, output_dir="database"):
+    """Mark the given sets as synced now."""
+    state = load_sync_state(output_dir)
+    now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for set_code in set_codes:
+        state[set_code] = now
+    state_path = Path(output_dir) / SYNC_STATE_FILE
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+def find_stale_sets(card_sets, output_dir="database", max_age_days=None):
+    """Return the sets whose last sync is older than `max_age_days`."""
+    if max_age_days is None:
+        return set()
+    
+    state = load_sync_state(output_dir)
+    json_path = Path(output_dir) / "swu_cards.json"
+    # Databases built before sync state was recorded count from the file's age
+    fallback = json_path.stat().st_mtime if json_path.exists() else 0
+    cutoff = time.time() - max_age_days * 86400
+    
+    stale = set()
+    for set_code in card_sets:
+        synced_at = state.get(set_code)
+        synced = datetime.fromisoformat(synced_at).timestamp() if synced_at else fallback
+        if synced < cutoff:
+            stale.add(set_code)
+    return stale
+
+def plan_sync(existing_cards, card_sets, stale_sets=()):
+    """List the (set_code, card_number) jobs missing from the database or in a stale set."""
+    have = {card_key(card) for card in existing_cards}
+    return [(set_code, card_num)
+            for set_code, card_count in card_sets.items()
+            for card_num in range(1, card_count + 1)
+            if set_code in stale_sets or (set_code, card_num) not in have]
+
+def sync_database(card_sets=None, client=None, workers=DEFAULT_WORKERS, output_dir="database",
+                  max_age_days=None, refresh_sets=(), compact=False, dead_letters=None):
+    """Incrementally update the saved database instead of rebuilding it.
+    
+    Only cards missing from the database, and every card of a stale or
+    explicitly refreshed set, are fetched. Progress is journaled so an
+    interrupted sync resumes where it stopped. Cards that failed
+    transiently are retried once more at the end through `dead_letters`.
+    Returns the merged card list.
+    """
+    client = client or get_default_client()
+    if card_sets is None:
+        with client.metrics.stage('discover'):
+            card_sets = discover_card_sets(client)
+    
+    existing_cards = load_database(output_dir)
+    stale_sets = find_stale_sets(card_sets, output_dir, max_age_days) | {s.upper() for s in refresh_sets}
+    existing_sets = {card.get('Set') for card in existing_cards}
+    new_sets = {set_code for set_code in card_sets if set_code not in existing_sets}
+    
+    Path(output_dir).mkdir(exist_ok=True)
+    journal = SyncJournal(Path(output_dir) / SYNC_JOURNAL_FILE)
+    done = journal.load()
+    if done:
+        print(f"Resuming interrupted sync: {len(done)} jobs already completed.")
+    
+    jobs = [job for job in plan_sync(existing_cards, card_sets, stale_sets) if job not in done]
+    print(f"\nDatabase has {len(existing_cards)} cards. "
+          f"{len(jobs)} cards to fetch ({len(stale_sets)} stale sets, {len(new_sets)} new sets).")
+    
+    try:
+        with client.metrics.stage('fetch'):
+            fetch_jobs(jobs, card_sets, client, workers, on_result=journal.record, dead_letters=dead_letters)
+        if dead_letters is not None:
+            # Also cards that failed to refresh in an earlier run, though the database has an older copy
+            retry = {job for job in dead_letters.jobs() if job[0] in card_sets}
+            for job, card_data in retry_dead_letters(dead_letters, client, workers, only=retry).items():
+                journal.record(job, card_data)
+    finally:
+        journal.close()
+    
+    fetched = {job: card for job, card in journal.load().items() if card}
+    if not fetched:
+        print("\nDatabase is already up to date.")
+        journal.clear()
+        save_sync_state(stale_sets | new_sets, output_dir)
+        return existing_cards
+    
+    previous = {card_key(card): card for card in existing_cards}
+    updates = {card_key(card): card for card in fetched.values()}
+    merged = {**previous, **updates}
+    
+    # Keep the build order: sets in discovery order, then by card number
+    set_order = {set_code: i for i, set_code in enumerate(card_sets)}
+    for card in existing_cards:
+        set_order.setdefault(card.get('Set', 'UNKNOWN'), len(set_order))
+    cards = sorted(merged.values(), key=lambda card: (set_order[card_key(card)[0]], card_key(card)[1]))
+    
+    # Apply just the fetched cards to the statistics cube, if it matches the database being replaced
+    cube = StatsCube.load(Path(output_dir) / CUBE_FILE, database_digest(output_dir))
+    if cube is None:
+        cube = StatsCube(cards)
+    else:
+        for key, card in updates.items():
+            cube.update(previous.get(key), card)
+    
+    print(f"\nSync complete: {len(fetched)} cards fetched, database now has {len(cards)} cards.")
+    save_database(cards, output_dir, compact, client.metrics)
+    save_stats_cube(cube, output_dir)
+    save_sync_state(stale_sets | new_sets, output_dir)
+    journal.clear()
+    return cards
+
+def save_database(cards, output_dir="database", compact=False, metrics=None):
+    """Save the database in multiple formats (see card_export.DatabaseExporter)."""
+    with DatabaseExporter(output_dir, compact, metrics) as exporter:
+        for card in cards:
+            exporter.add(card)
+
+def database_digest(output_dir="database"):
+    """SHA-256 of the saved swu_cards.json (hex), or None if there is none."""
+    path = Path(output_dir) / "swu_cards.json"
+    return file_digest(path).hex() if path.exists() else None
+
+def load_stats_cube(cards, output_dir="database"):
+    """The saved statistics cube if it was built from the saved database, else a new one over `cards`."""
+    cube = StatsCube.load(Path(output_dir) / CUBE_FILE, database_digest(output_dir))
+    return cube if cube is not None else StatsCube(cards)
+
+def save_stats_cube(cube, output_dir="database"):
+    """Save the statistics cube, tied to the database file it describes."""
+    cube.source_digest = database_digest(output_dir)
+    cube.save(Path(output_dir) / CUBE_FILE)
+
+def create_summary_stats(cards, cube=None):
+    """Generate summary statistics about the database (see stats_cube.StatsCube)."""
+    if cube is None:
+        cube = StatsCube(cards)
+    return {
+        'total_cards': cube.total,
+        'by_set': cube.counts_by('Set'),
+        'by_type': cube.counts_by('Type'),
+        'by_rarity': cube.counts_by('Rarity'),
+        'by_aspect': cube.counts_by('Aspect'),
+        'by_arena': cube.counts_by('Arena'),
     }
+
+def print_summary(stats):
+    """Print the headline counts from create_summary_stats."""
+    print(f"\nTotal Cards: {stats['total_cards']}")
     
-    for card in cards:
-        # Count by set
-        set_code = card.get('Set', 'UNKNOWN')
-        stats['by_set'][set_code] = stats['by_set'].get(set_code, 0) + 1
-        
-        # Count by type
-        card_type = card.get('Type', 'UNKNOWN')
-        stats['by_type'][card_type] = stats['by_type'].get(card_type, 0) + 1
-        
-        # Count by rarity
-        rarity = card.get('Rarity', 'UNKNOWN')
-        stats['by_rarity'][rarity] = stats['by_rarity'].get(rarity, 0) + 1
-        
-        # Count by arena
-        arena = card.get('Arena', 'N/A')
-        if arena:
-            stats['by_arena'][arena] = stats['by_arena'].get(arena, 0) + 1
+    print("\nCards by Set:")
+    for set_code, count in sorted(stats['by_set'].items()):
+        print(f"  {set_code}: {count}")
+    
+    print("\nCards by Type:")
+    for card_type, count in sorted(stats['by_type'].items()):
+        print(f"  {card_type}: {count}")
     
-    return stats
+    print("\nCards by Rarity:")
+    for rarity, count in sorted(stats['by_rarity'].items()):
+        print(f"  {rarity}: {count}")
+    
+    print("\nCards by Aspect:")
+    for aspect, count in sorted(stats['by_aspect'].items()):
+        print(f"  {aspect}: {count}")
+    
+    print("\nCards by Arena:")
+    for arena, count in sorted(stats['by_arena'].items()):
+        print(f"  {arena}: {count}")
 
-if __name__ == "__main__":
+def save_statistics(stats, output_dir="database"):
+    """Save the summary statistics next to the database."""
+    stats_path = Path(output_dir) / "statistics.json"
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2)
+    print(f"\nStatistics saved to: {stats_path}")
+
+def save_fetch_metrics(metrics, output_dir="database", textfile=None):
+    """Print the run's request summary and write its JSON report and Prometheus textfile."""
+    print("\n" + "=" * 60)
+    print("Fetch Metrics")
+    print("=" * 60)
+    metrics.print_summary()
+    report_path = metrics.write_json(Path(output_dir) / METRICS_JSON_FILE)
+    textfile_path = metrics.write_prometheus(textfile or Path(output_dir) / METRICS_TEXTFILE)
+    print(f"Run report saved to: {report_path}")
+    print(f"Prometheus metrics saved to: {textfile_path}")
+
+COMMANDS = ('build', 'sync', 'art')
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent fetch threads (default: {DEFAULT_WORKERS}, 1 = serial)")
+    common.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f"global requests-per-second budget (default: {DEFAULT_REQUESTS_PER_SECOND:g}, 0 = unlimited)")
+    common.add_argument('--api-url', default=API_BASE_URL, help="card API base URL")
+    common.add_argument('--sets-url', default=SETS_PAGE_URL, help="sets page URL used for discovery")
+    common.add_argument('--output-dir', default="database", help="database directory (default: database)")
+    common.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"HTTP response cache directory (default: {DEFAULT_CACHE_DIR})")
+    common.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="evict least recently used responses beyond this size")
+    common.add_argument('--no-cache', action='store_true', help="always fetch from the network")
+    common.add_argument('--offline', action='store_true',
+                        help="replay responses from the cache only, without any network access")
+    common.add_argument('--compact-json', action='store_true',
+                        help="write JSON without indentation (smaller and faster to parse)")
+    common.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f"retries per request after rate limiting, server or network errors (default: {DEFAULT_RETRIES})")
+    common.add_argument('--metrics-textfile',
+                        help=f"where to write the Prometheus metrics, e.g. into node_exporter's "
+                             f"textfile collector directory (default: <output-dir>/{METRICS_TEXTFILE})")
+    
+    parser = argparse.ArgumentParser(description="Build the Star Wars Unlimited card database.")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('build', parents=[common], help="fetch every card and rebuild the database (default)")
+    sync = subparsers.add_parser('sync', parents=[common],
+                                 help="fetch only missing or stale cards into the existing database")
+    sync.add_argument('--max-age-days', type=float,
+                      help="refetch every card of sets last synced longer ago than this")
+    sync.add_argument('--refresh', nargs='+', default=[], metavar='SET',
+                      help="refetch every card of these sets")
+    art = subparsers.add_parser('art', parents=[common],
+                                help="download every card image into a local deduplicated mirror")
+    art.add_argument('--art-dir', default=ART_DIR, help=f"mirror directory (default: {ART_DIR})")
+    art.add_argument('--thumbnail-size', type=int, default=DEFAULT_THUMBNAIL_SIZE,
+                     help=f"longest thumbnail side in pixels (default: {DEFAULT_THUMBNAIL_SIZE}, 0 = no thumbnails)")
+    art.add_argument('--verify', action='store_true',
+                     help="re-hash stored images and download damaged ones again")
+    
+    # `build` is the default command, so plain `fetch_cards.py --workers 4` still works
+    args_list = list(sys.argv[1:] if argv is None else argv)
+    if not args_list or (args_list[0] not in COMMANDS and args_list[0] not in ('-h', '--help')):
+        args_list = ['build'] + args_list
+    return parser.parse_args(args_list)
+
+def mirror_database_art(args):
+    """Mirror the art of every card in the saved database."""
+    if args.offline:
+        sys.exit("The art mirror downloads images and can't run --offline")
+    json_path = Path(args.output_dir) / "swu_cards.json"
+    if not json_path.exists():
+        sys.exit(f"No database at {json_path}; run a build first")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        cards = json.load(f)
+    
+    # Images are large and never change under the same URL, so they bypass the response cache
+    client = ApiClient(args.rps, args.api_url, args.sets_url)
+    try:
+        manifest = mirror_art(cards, client, art_dir=args.art_dir, workers=args.workers,
+                              thumbnail_size=args.thumbnail_size or None, verify=args.verify)
+    finally:
+        client.close()
+    if manifest['failures']:
+        sys.exit(1)
+
+def main(argv=None):
+    """Build (or sync), save and summarize the card database."""
+    args = parse_args(argv)
+    if args.offline and args.no_cache:
+        sys.exit("--offline needs the response cache; drop --no-cache")
+    if args.command == 'art':
+        return mirror_database_art(args)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+    client = ApiClient(args.rps, args.api_url, args.sets_url, cache=cache, offline=args.offline,
+                       max_concurrency=args.workers, max_retries=args.retries)
+    dead_letters = DeadLetterQueue(Path(args.output_dir) / DEAD_LETTER_FILE)
+    
     print("=" * 60)
     print("Star Wars Unlimited Card Database Builder")
     print("=" * 60)
     
-    # Build the database
-    cards = build_database()
+    if args.command == 'sync':
+        try:
+            cards = sync_database(client=client, workers=args.workers, output_dir=args.output_dir,
+                                  max_age_days=args.max_age_days, refresh_sets=args.refresh,
+                                  compact=args.compact_json, dead_letters=dead_letters)
+        finally:
+            dead_letters.save()
+    else:
+        # Build the database, streaming cards into the output files as they arrive
+        with DatabaseExporter(args.output_dir, args.compact_json, client.metrics) as exporter:
+            try:
+                cards = build_database(client=client, workers=args.workers, on_card=exporter.add,
+                                       dead_letters=dead_letters)
+            finally:
+                dead_letters.save()
+            
+            # Cards recovered from the dead-letter queue were streamed after their set
+            reordered = exporter.cards != cards
+            if cards and not reordered:
+                # Save the database
+                print("\n" + "=" * 60)
+                print("Saving database...")
+                print("=" * 60)
+            else:
+                exporter.abort()
+        
+        if cards and reordered:
+            print("\n" + "=" * 60)
+            print("Saving database...")
+            print("=" * 60)
+            save_database(cards, args.output_dir, args.compact_json, client.metrics)
+        
+        if cards:
+            save_sync_state({card.get('Set', 'UNKNOWN') for card in cards}, args.output_dir)
     
     if cards:
-        # Save the database
-        print("\n" + "=" * 60)
-        print("Saving database...")
-        print("=" * 60)
-        save_database(cards)
-        
         # Generate and save statistics
         print("\n" + "=" * 60)
         print("Database Statistics")
         print("=" * 60)
-        stats = create_summary_stats(cards)
-        
-        print(f"\nTotal Cards: {stats['total_cards']}")
-        
-        print("\nCards by Set:")
-        for set_code, count in sorted(stats['by_set'].items()):
-            print(f"  {set_code}: {count}")
+        with client.metrics.stage('statistics'):
+            # A sync saved the cube it updated; a build makes its cube once here and saves it
+            cube = load_stats_cube(cards, args.output_dir) if args.command == 'sync' else StatsCube(cards)
+            stats = create_summary_stats(cards, cube)
+            if args.command != 'sync':
+                save_stats_cube(cube, args.output_dir)
+        print_summary(stats)
+        save_statistics(stats, args.output_dir)
         
-        print("\nCards by Type:")
-        for card_type, count in sorted(stats['by_type'].items()):
-            print(f"  {card_type}: {count}")
-        
-        print("\nCards by Rarity:")
-        for rarity, count in sorted(stats['by_rarity'].items()):
-            print(f"  {rarity}: {count}")
-        
-        print("\nCards by Arena:")
-        for arena, count in sorted(stats['by_arena'].items()):
-            print(f"  {arena}: {count}")
-        
-        # Save stats
-        stats_path = Path("database") / "statistics.json"
-        with open(stats_path, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2)
-        print(f"\nStatistics saved to: {stats_path}")
+        # Keep today's prices; the database itself only has the latest ones
+        with client.metrics.stage('price_history'):
+            history = PriceHistory(Path(args.output_dir) / HISTORY_FILE)
+            appended = history.append(cards)
+        if appended:
+            print(f"Price history updated: {history.path} ({len(history.dates)} dates)")
     else:
         print("\nNo cards were fetched. Please check your internet connection and try again.")
     
+    if len(dead_letters):
+        print(f"\n{len(dead_letters)} cards still failing after retries; they are kept in "
+              f"{dead_letters.path} and tried again by the next build or sync.")
+    
+    save_fetch_metrics(client.metrics, args.output_dir, args.metrics_textfile)
+    
     print("\n" + "=" * 60)
     print("Complete!")
     print("=" * 60)
+    
+    client.close()
+
+if __name__ == "__main__":
+    main()
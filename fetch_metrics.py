@@ -0,0 +1,331 @@
+import json
+import os
+import platform
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+METRICS_JSON_FILE = "fetch_metrics.json"
+METRICS_TEXTFILE = "fetch_metrics.prom"
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "swu_fetch"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes it."""
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(self.bounds)
+        self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for n in self.buckets:
+            total += n
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation within the bucket (like PromQL histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        below = 0
+        for i, n in enumerate(self.buckets):
+            if n and below + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - below) / n
+            below += n
+        return self.bounds[-1]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': {**{f"{bound:g}": n for bound, n in zip(self.bounds, self.cumulative())},
+                        '+Inf': self.count},
+        }
+
+
+class FetchMetrics:
+    """Counters and timings of one database build or sync, shared by every thread.
+
+    ApiClient records each request (latency, status, bytes, whether it came
+    from the cache); the fetch loop records queue depth, per-set times and
+    failed jobs; the exporter records the time spent on each output format.
+    The run can then be written as a JSON report and as a Prometheus
+    textfile-collector file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.requests: Counter = Counter()         # (endpoint, status, source) -> count
+        self.bytes: Counter = Counter()            # endpoint -> bytes received
+        self.retries: Counter = Counter()          # reason -> count
+        self.errors: Counter = Counter()           # exception class -> count
+        self.circuit_opens: Counter = Counter()    # host -> count
+        self.concurrency_limits: List[int] = []    # every change of the adaptive limit
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self._depth_samples = 0
+        self._depth_total = 0
+        self.set_seconds: Dict[str, float] = {}    # wall time spent on each set
+        self.set_request_seconds: Counter = Counter()
+        # Final outcome per card: a card that failed and was then fetched on a retry counts once, as fetched
+        self.card_outcomes: Dict[Tuple[str, Any], bool] = {}    # (set, number) -> fetched
+        self.failures: Dict[Tuple[str, Any], Dict[str, Any]] = {}  # cards still failing, latest reason
+        self.stages: Dict[str, float] = {}
+        self.formats: Dict[str, float] = {}
+
+    def observe_request(self, endpoint: str, status, seconds: Optional[float], size: int,
+                        source: str = 'network') -> None:
+        """One response; `seconds` is None for responses served from the cache without a request."""
+        with self._lock:
+            self.requests[endpoint, str(status), source] += 1
+            self.bytes[endpoint] += size
+            if seconds is not None:
+                self.latency[endpoint].observe(seconds)
+
+    def observe_error(self, endpoint: str, error: BaseException, seconds: float) -> None:
+        """A request that raised instead of returning a response."""
+        with self._lock:
+            self.requests[endpoint, 'error', 'network'] += 1
+            self.errors[type(error).__name__] += 1
+            self.latency[endpoint].observe(seconds)
+
+    def retry(self, reason: str) -> None:
+        with self._lock:
+            self.retries[reason] += 1
+
+    def concurrency(self, limit: int) -> None:
+        with self._lock:
+            self.concurrency_limits.append(limit)
+
+    def circuit_opened(self, host: str) -> None:
+        with self._lock:
+            self.circuit_opens[host] += 1
+
+    def jobs_queued(self, count: int) -> None:
+        with self._lock:
+            self.queued += count
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+    def job_started(self) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self._depth_samples += 1
+            self._depth_total += self.queued
+
+    def job_finished(self, job: Tuple[str, Any], seconds: float, ok: bool) -> None:
+        """One attempt at a (set, number) job; the last attempt decides whether the card counts as failed."""
+        with self._lock:
+            self.in_flight -= 1
+            self.set_request_seconds[job[0]] += seconds
+            self.card_outcomes[job] = ok
+            if ok:
+                self.failures.pop(job, None)
+
+    def failure(self, set_code: str, card_number: int, reason: str) -> None:
+        """A card that could not be fetched, kept for the report instead of only printed."""
+        with self._lock:
+            self.failures[set_code, card_number] = {'set': set_code, 'number': card_number, 'reason': reason}
+
+    def set_done(self, set_code: str, seconds: float) -> None:
+        with self._lock:
+            self.set_seconds[set_code] = self.set_seconds.get(set_code, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a phase of the run (discover, fetch, save, ...)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def observe_format(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.formats[name] = self.formats.get(name, 0.0) + seconds
+
+    def _endpoint_report(self, endpoint: str) -> Dict[str, Any]:
+        by_status, by_source = Counter(), Counter()
+        for (e, status, source), n in self.requests.items():
+            if e == endpoint:
+                by_status[status] += n
+                by_source[source] += n
+        histogram = self.latency.get(endpoint)
+        return {
+            'total': sum(by_status.values()),
+            'by_status': dict(by_status),
+            'by_source': dict(by_source),
+            'bytes': self.bytes[endpoint],
+            'latency_seconds': histogram.to_dict() if histogram else None,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Everything recorded so far, as JSON-ready data."""
+        with self._lock:
+            endpoints = sorted(set(self.latency) | {endpoint for endpoint, _, _ in self.requests})
+            sets = list(dict.fromkeys([*self.set_seconds, *self.set_request_seconds]))
+            set_cards = Counter((set_code, ok) for (set_code, _), ok in self.card_outcomes.items())
+            return {
+                'started': datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec='seconds'),
+                'duration_seconds': time.perf_counter() - self._start,
+                'host': platform.node(),
+                'stages': dict(self.stages),
+                'requests': {endpoint: self._endpoint_report(endpoint) for endpoint in endpoints},
+                'errors': dict(self.errors),
+                'retries': dict(self.retries),
+                'circuit_opens': dict(self.circuit_opens),
+                'concurrency': {
+                    'changes': len(self.concurrency_limits),
+                    'min': min(self.concurrency_limits, default=None),
+                    'final': self.concurrency_limits[-1] if self.concurrency_limits else None,
+                },
+                'queue': {
+                    'max_depth': self.max_queue_depth,
+                    'mean_depth': self._depth_total / self._depth_samples if self._depth_samples else 0,
+                },
+                'sets': {
+                    set_code: {
+                        'seconds': self.set_seconds.get(set_code),
+                        'request_seconds': self.set_request_seconds[set_code],
+                        'cards': set_cards[set_code, True],
+                        'failed': set_cards[set_code, False],
+                    }
+                    for set_code in sets
+                },
+                'formats': dict(self.formats),
+                'failures': list(self.failures.values()),
+            }
+
+    def write_json(self, path) -> Path:
+        path = Path(path)
+        _atomic_write(path, json.dumps(self.report(), indent=2) + "\n")
+        return path
+
+    def write_prometheus(self, path) -> Path:
+        """Write the textfile-collector format node_exporter reads (atomically, as it requires)."""
+        path = Path(path)
+        _atomic_write(path, self.prometheus_text())
+        return path
+
+    def prometheus_text(self) -> str:
+        report = self.report()
+        lines: List[str] = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{PREFIX}_{name}{{{label_text}}} {_number(value)}" if label_text
+                             else f"{PREFIX}_{name} {_number(value)}")
+
+        with self._lock:
+            requests = sorted(self.requests.items())
+            histograms = sorted(self.latency.items())
+        metric('last_run_timestamp_seconds', 'gauge', "When the last run started.", [({}, self.started)])
+        metric('last_run_duration_seconds', 'gauge', "Wall time of the last run.",
+               [({}, report['duration_seconds'])])
+        metric('stage_seconds', 'gauge', "Wall time per phase of the run.",
+               [({'stage': stage}, seconds) for stage, seconds in report['stages'].items()])
+        metric('requests_total', 'counter', "Responses by endpoint, status and source (network, cache, revalidated).",
+               [({'endpoint': endpoint, 'status': status, 'source': source}, n)
+                for (endpoint, status, source), n in requests])
+        metric('response_bytes_total', 'counter', "Response body bytes by endpoint.",
+               [({'endpoint': endpoint}, data['bytes']) for endpoint, data in report['requests'].items()])
+
+        lines.append(f"# HELP {PREFIX}_request_duration_seconds Network request latency.")
+        lines.append(f"# TYPE {PREFIX}_request_duration_seconds histogram")
+        for endpoint, histogram in histograms:
+            label = f'endpoint="{_escape(endpoint)}"'
+            for bound, cumulative in zip(histogram.bounds, histogram.cumulative()):
+                lines.append(f'{PREFIX}_request_duration_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{PREFIX}_request_duration_seconds_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f'{PREFIX}_request_duration_seconds_sum{{{label}}} {_number(histogram.sum)}')
+            lines.append(f'{PREFIX}_request_duration_seconds_count{{{label}}} {histogram.count}')
+
+        metric('retries_total', 'counter', "Retried requests by reason.",
+               [({'reason': reason}, n) for reason, n in report['retries'].items()])
+        metric('errors_total', 'counter', "Requests that raised, by exception.",
+               [({'error': error}, n) for error, n in report['errors'].items()])
+        metric('circuit_opens_total', 'counter', "Times a host's circuit breaker opened.",
+               [({'host': host}, n) for host, n in report['circuit_opens'].items()])
+        metric('concurrency_limit_min', 'gauge', "Lowest adaptive concurrency limit reached.",
+               [({}, report['concurrency']['min'])] if report['concurrency']['min'] is not None else [])
+        metric('queue_depth_max', 'gauge', "Most jobs waiting for a worker at once.",
+               [({}, report['queue']['max_depth'])])
+        metric('set_seconds', 'gauge', "Wall time spent fetching each set.",
+               [({'set': set_code}, data['seconds']) for set_code, data in report['sets'].items()
+                if data['seconds'] is not None])
+        metric('set_cards', 'gauge', "Cards fetched and failed per set.",
+               [({'set': set_code, 'result': result}, data[key]) for set_code, data in report['sets'].items()
+                for result, key in (('ok', 'cards'), ('failed', 'failed'))])
+        metric('format_seconds', 'gauge', "Time spent writing each output format.",
+               [({'format': name}, seconds) for name, seconds in report['formats'].items()])
+        metric('failed_jobs', 'gauge', "Cards that could not be fetched in the last run.",
+               [({}, len(report['failures']))])
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self) -> None:
+        report = self.report()
+        for endpoint, data in report['requests'].items():
+            latency = data['latency_seconds']
+            timing = (f", p50 {latency['p50'] * 1000:.0f} ms, p99 {latency['p99'] * 1000:.0f} ms"
+                      if latency and latency['count'] else "")
+            print(f"{endpoint}: {data['total']} responses ({', '.join(f'{s}: {n}' for s, n in sorted(data['by_status'].items()))})"
+                  f", {data['bytes'] / 1024:.0f} KB{timing}")
+        if report['retries']:
+            print("Retries: " + ", ".join(f"{reason} {n}" for reason, n in sorted(report['retries'].items())))
+        if report['stages']:
+            print("Time: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in report['stages'].items()))
+        if report['failures']:
+            print(f"{len(report['failures'])} cards failed to fetch")
+
+
+def _number(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
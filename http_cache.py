@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".http_cache"
+DEFAULT_TTL = 24 * 3600            # seconds
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Statuses worth remembering: real cards and the known holes in each set's numbering
+CACHEABLE_STATUSES = (200, 404)
+
+class CachedResponse:
+    """The parts of requests.Response the fetchers use, served from the cache."""
+
+    from_cache = True
+
+    def __init__(self, url, status_code, content, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+class ResponseCache:
+    """Persistent, content-addressed cache of HTTP responses.
+
+    Bodies live in `objects/` under the SHA-256 of their content, so identical
+    responses are stored once. Each URL has a small metadata entry in
+    `entries/` recording the status, body digest, validators (ETag and
+    Last-Modified) and expiry time. Entry file mtimes track last access, and
+    the least recently used entries are evicted when the bodies exceed
+    `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._object_refs = {}
+        self._total_bytes = 0
+
+    def _entry_path(self, key):
+        return self.cache_dir / "entries" / key[:2] / f"{key}.json"
+
+    def _object_path(self, digest):
+        return self.cache_dir / "objects" / digest[:2] / digest
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        """Read every entry's metadata once; later lookups are in memory."""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        for path in (self.cache_dir / "entries").glob("*/*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                path.unlink(missing_ok=True)
+                continue
+            entry['last_access'] = path.stat().st_mtime
+            self._entries[path.stem] = entry
+            self._add_ref(entry)
+
+    def _write_entry(self, key, entry):
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stored = {k: v for k, v in entry.items() if k != 'last_access'}
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, path)
+
+    def lookup(self, url):
+        """Return the cache entry for a URL, or None."""
+        with self._lock:
+            self._load_index()
+            entry = self._entries.get(self._key(url))
+            if entry is not None and not self._object_path(entry['digest']).exists():
+                # Body was removed behind our back; treat as a miss
+                self._drop(self._key(url))
+                return None
+            return entry
+
+    @staticmethod
+    def is_fresh(entry):
+        return entry['expires_at'] > time.time()
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load(self, url, entry):
+        """Build a response from a cache entry, marking it recently used."""
+        content = self._object_path(entry['digest']).read_bytes()
+        entry_path = self._entry_path(self._key(url))
+        now = time.time()
+        try:
+            os.utime(entry_path, (now, now))
+        except OSError:
+            pass
+        entry['last_access'] = now
+        return CachedResponse(url, entry['status'], content, {'Content-Type': entry.get('content_type', '')})
+
+    def store(self, url, response, ttl=None):
+        """Cache a response if its status is cacheable."""
+        if response.status_code not in CACHEABLE_STATUSES:
+            return
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        entry = {
+            'url': url,
+            'status': response.status_code,
+            'digest': digest,
+            'size': len(content),
+            'content_type': response.headers.get('Content-Type', ''),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': now,
+            'expires_at': now + (self.ttl if ttl is None else ttl),
+            'last_access': now,
+        }
+
+        with self._lock:
+            self._load_index()
+            object_path = self._object_path(digest)
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = object_path.with_name(f"{digest}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, object_path)
+            key = self._key(url)
+            previous = self._entries.get(key)
+            self._write_entry(key, entry)
+            self._entries[key] = entry
+            self._add_ref(entry)
+            if previous is not None:
+                self._release_ref(previous)
+            self._evict()
+
+    def revalidated(self, url, entry, ttl=None):
+        """Extend an entry's lifetime after the server answered 304 Not Modified."""
+        now = time.time()
+        entry['stored_at'] = now
+        entry['expires_at'] = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._write_entry(self._key(url), entry)
+
+    def _add_ref(self, entry):
+        digest = entry['digest']
+        if digest not in self._object_refs:
+            self._object_refs[digest] = 0
+            self._total_bytes += entry['size']
+        self._object_refs[digest] += 1
+
+    def _release_ref(self, entry):
+        """Forget one reference to a body, deleting it when no entry uses it."""
+        digest = entry['digest']
+        self._object_refs[digest] -= 1
+        if self._object_refs[digest] == 0:
+            del self._object_refs[digest]
+            self._total_bytes -= entry['size']
+            self._object_path(digest).unlink(missing_ok=True)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._entry_path(key).unlink(missing_ok=True)
+        self._release_ref(entry)
+
+    def _evict(self):
+        """Drop least recently used entries until the bodies fit in max_bytes."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k]['last_access']):
+            self._drop(key)
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def size(self):
+        """Total bytes of cached bodies."""
+        with self._lock:
+            self._load_index()
+            return self._total_bytes
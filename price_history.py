@@ -0,0 +1,391 @@
+import argparse
+import csv
+import json
+import os
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+PRICE_FIELDS = ('MarketPrice', 'LowPrice', 'FoilPrice', 'LowFoilPrice')
+HISTORY_FILE = "price_history.bin"
+
+FILE_MAGIC = b"SWUPRICE"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<8sI")
+
+# magic, day (date.toordinal()), rows, length of the new-keys JSON, length of
+# the compressed columns, CRC-32 of both
+BLOCK_MAGIC = b"PBLK"
+BLOCK_HEADER = struct.Struct("<4sIIIII")
+
+# Prices are stored as whole cents; this marks a missing price
+NO_PRICE = -1
+
+Key = Tuple[str, str, str]
+
+
+def price_key(card: Dict[str, Any]) -> Key:
+    """The (Set, Number, VariantType) a card's prices are recorded under."""
+    return card.get('Set', 'UNKNOWN'), card.get('Number', ''), card.get('VariantType') or 'Normal'
+
+
+def _cents(value) -> int:
+    try:
+        return int(round(float(value) * 100))
+    except (ValueError, TypeError):
+        return NO_PRICE
+
+
+class PriceBlock:
+    """One dated snapshot: key ids in ascending order and a cents column per price field."""
+
+    def __init__(self, day: int, key_ids: np.ndarray, cents: np.ndarray):
+        self.day = day
+        self.key_ids = key_ids
+        self.cents = cents  # shape (len(PRICE_FIELDS), rows)
+
+    def prices(self, field: str) -> np.ndarray:
+        """Prices in dollars for one field, NaN where missing."""
+        column = self.cents[PRICE_FIELDS.index(field)]
+        return np.where(column == NO_PRICE, np.nan, column / 100.0)
+
+    def encode(self) -> bytes:
+        # Sorted ids delta-encode to mostly ones, which compresses to almost nothing
+        deltas = np.diff(self.key_ids, prepend=0).astype('<u4')
+        return zlib.compress(deltas.tobytes() + self.cents.astype('<i4').tobytes(), 6)
+
+    @classmethod
+    def decode(cls, day: int, rows: int, data: bytes) -> 'PriceBlock':
+        raw = zlib.decompress(data)
+        key_ids = np.cumsum(np.frombuffer(raw, dtype='<u4', count=rows), dtype=np.int64)
+        cents = np.frombuffer(raw, dtype='<i4', offset=4 * rows).reshape(len(PRICE_FIELDS), rows)
+        return cls(day, key_ids, cents)
+
+
+class PriceHistory:
+    """Append-only, columnar history of card prices.
+
+    The file is a header followed by one block per snapshot. A block holds
+    the date, any (Set, Number, VariantType) keys seen for the first time
+    (key ids are assigned in order of first appearance), and the snapshot's
+    key ids and prices as zlib-compressed columns of whole cents. Opening
+    the file reads only block headers and new keys to build the date index;
+    price columns are decompressed when a query needs their dates. A
+    truncated or corrupt last block (from an interrupted append) is ignored
+    and overwritten by the next append.
+
+    When several snapshots share a date, the last one counts.
+
+        history = PriceHistory("database/price_history.bin")
+        history.append(cards)
+        history.movers(days=7)
+    """
+
+    def __init__(self, path=Path("database") / HISTORY_FILE):
+        self.path = Path(path)
+        self.keys: List[Key] = []
+        self.key_ids: Dict[Key, int] = {}
+        # (day, offset of the columns, rows, length) per block, in file order
+        self.blocks: List[Tuple[int, int, int, int]] = []
+        self.valid_length = FILE_HEADER.size
+        self._decoded: Dict[int, PriceBlock] = {}
+        self._day_index: List[Tuple[int, int]] = []
+        if self.path.exists():
+            self._scan()
+
+    def _scan(self) -> None:
+        with open(self.path, 'rb') as f:
+            header = f.read(FILE_HEADER.size)
+            if len(header) < FILE_HEADER.size:
+                # An empty or torn header (from an interrupted first append) holds no blocks;
+                # the next append rewrites it
+                if not FILE_MAGIC.startswith(header[:len(FILE_MAGIC)]):
+                    raise ValueError(f"{self.path} is not a price history file")
+                return
+            magic, version = FILE_HEADER.unpack(header)
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{self.path} is not a price history file")
+            if version != FILE_VERSION:
+                raise ValueError(f"{self.path} has format version {version}, expected {FILE_VERSION}")
+            offset = FILE_HEADER.size
+            while True:
+                header = f.read(BLOCK_HEADER.size)
+                if len(header) < BLOCK_HEADER.size:
+                    break
+                magic, day, rows, keys_length, columns_length, crc = BLOCK_HEADER.unpack(header)
+                if magic != BLOCK_MAGIC:
+                    break
+                new_keys = f.read(keys_length)
+                columns = f.read(columns_length)
+                if (len(new_keys) < keys_length or len(columns) < columns_length
+                        or zlib.crc32(columns, zlib.crc32(new_keys)) != crc):
+                    break
+                for key in json.loads(new_keys):
+                    self._learn(tuple(key))
+                columns_offset = offset + BLOCK_HEADER.size + keys_length
+                self.blocks.append((day, columns_offset, rows, columns_length))
+                offset = columns_offset + columns_length
+        self.valid_length = offset
+        self._index_days()
+
+    def _learn(self, key: Key) -> int:
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            key_id = self.key_ids[key] = len(self.keys)
+            self.keys.append(key)
+        return key_id
+
+    def _index_days(self) -> None:
+        latest = {day: number for number, (day, _, _, _) in enumerate(self.blocks)}
+        self._day_index = sorted(latest.items())
+
+    @property
+    def dates(self) -> List[date]:
+        """Snapshot dates, oldest first."""
+        return [date.fromordinal(day) for day, _ in self._day_index]
+
+    def _block(self, number: int) -> PriceBlock:
+        block = self._decoded.get(number)
+        if block is None:
+            day, offset, rows, length = self.blocks[number]
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                block = self._decoded[number] = PriceBlock.decode(day, rows, f.read(length))
+        return block
+
+    def append(self, cards: Iterable[Dict[str, Any]], day: Optional[date] = None) -> int:
+        """Record today's (or `day`'s) prices of the cards; returns the number of rows written.
+
+        Nothing is written if the prices are identical to the snapshot
+        already recorded for that day.
+        """
+        day_number = (day or date.today()).toordinal()
+        known = len(self.keys)
+        rows = {}
+        for card in cards:
+            rows[self._learn(price_key(card))] = [_cents(card.get(field)) for field in PRICE_FIELDS]
+        new_keys = self.keys[known:]
+        key_ids = np.array(sorted(rows), dtype=np.int64)
+        cents = np.array([rows[key_id] for key_id in key_ids], dtype=np.int32).reshape(-1, len(PRICE_FIELDS)).T
+        block = PriceBlock(day_number, key_ids, np.ascontiguousarray(cents))
+
+        if not new_keys and self._day_index and self._day_index[-1][0] == day_number:
+            last = self._block(self._day_index[-1][1])
+            if np.array_equal(last.key_ids, block.key_ids) and np.array_equal(last.cents, block.cents):
+                return 0
+
+        keys_json = json.dumps([list(key) for key in new_keys], separators=(',', ':')).encode('utf-8')
+        columns = block.encode()
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, day_number, len(key_ids), len(keys_json), len(columns),
+                                   zlib.crc32(columns, zlib.crc32(keys_json)))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'r+b' if self.path.exists() else 'w+b'
+        with open(self.path, mode) as f:
+            if f.seek(0, os.SEEK_END) < FILE_HEADER.size:
+                f.seek(0)
+                f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+                self.valid_length = FILE_HEADER.size
+            # Drop any torn block left by an interrupted append
+            f.truncate(self.valid_length)
+            f.seek(self.valid_length)
+            f.write(header + keys_json + columns)
+            f.flush()
+            os.fsync(f.fileno())
+
+        columns_offset = self.valid_length + BLOCK_HEADER.size + len(keys_json)
+        self.blocks.append((day_number, columns_offset, len(key_ids), len(columns)))
+        self._decoded[len(self.blocks) - 1] = block
+        self.valid_length = columns_offset + len(columns)
+        self._index_days()
+        return len(key_ids)
+
+    def _day_range(self, start: Optional[date], end: Optional[date]) -> List[Tuple[int, int]]:
+        days = [day for day, _ in self._day_index]
+        lo = 0 if start is None else bisect_left(days, start.toordinal())
+        hi = len(days) if end is None else bisect_right(days, end.toordinal())
+        return self._day_index[lo:hi]
+
+    def frame(self, field: str = 'MarketPrice', start: Optional[date] = None,
+              end: Optional[date] = None) -> Tuple[List[date], np.ndarray]:
+        """(dates, prices) for a date range: prices[i, key_id] in dollars, NaN where not recorded."""
+        selected = self._day_range(start, end)
+        prices = np.full((len(selected), len(self.keys)), np.nan)
+        for row, (_, number) in enumerate(selected):
+            block = self._block(number)
+            prices[row, block.key_ids] = block.prices(field)
+        return [date.fromordinal(day) for day, _ in selected], prices
+
+    def series(self, set_code: str, number, variant: str = 'Normal', field: str = 'MarketPrice',
+               start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[date, float]]:
+        """Recorded prices of one card, oldest first."""
+        key_id = self.key_ids.get((set_code.upper(), str(number).zfill(3), variant))
+        if key_id is None:
+            return []
+        result = []
+        for day, block_number in self._day_range(start, end):
+            block = self._block(block_number)
+            row = np.searchsorted(block.key_ids, key_id)
+            if row < len(block.key_ids) and block.key_ids[row] == key_id:
+                cents = block.cents[PRICE_FIELDS.index(field), row]
+                if cents != NO_PRICE:
+                    result.append((date.fromordinal(day), int(cents) / 100.0))
+        return result
+
+    @staticmethod
+    def _forward_fill(prices: np.ndarray) -> np.ndarray:
+        """Carry each card's last recorded price forward over days without one."""
+        rows = np.where(np.isnan(prices), 0, np.arange(len(prices))[:, None])
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        filled = prices[rows, np.arange(prices.shape[1])]
+        return filled
+
+    def movers(self, days: int = 7, field: str = 'MarketPrice', limit: int = 10, end: Optional[date] = None,
+               min_price: float = 0.0) -> List[Dict[str, Any]]:
+        """Cards whose price changed most (by percentage) over the `days` days up to `end`.
+
+        Each card's price on a date is its last recorded price on or before
+        it. Cards priced below `min_price` at both ends are skipped, since
+        their percentages are mostly noise.
+        """
+        end = end or (self.dates[-1] if self._day_index else date.today())
+        dates, prices = self.frame(field, None, end)
+        if not dates:
+            return []
+        filled = self._forward_fill(prices)
+        start_row = bisect_right(dates, end - timedelta(days=days)) - 1
+        if start_row < 0:
+            return []
+        before, after = filled[start_row], filled[-1]
+        valid = ~np.isnan(before) & ~np.isnan(after) & (before > 0) & (np.maximum(before, after) >= min_price)
+        change = np.where(valid, after - before, 0.0)
+        percent = np.where(valid, change / np.where(before > 0, before, 1.0) * 100, 0.0)
+        order = np.argsort(-np.abs(percent), kind='stable')[:limit]
+        return [
+            {'key': self.keys[i], 'before': float(before[i]), 'after': float(after[i]),
+             'change': float(change[i]), 'percent': float(percent[i])}
+            for i in order if valid[i] and change[i]
+        ]
+
+    def set_averages(self, window: int = 7, field: str = 'MarketPrice', start: Optional[date] = None,
+                     end: Optional[date] = None) -> Dict[str, List[Tuple[date, float]]]:
+        """Rolling average price per set: for each snapshot date, the mean over the
+        last `window` days of the set's average card price."""
+        dates, prices = self.frame(field, None, end)
+        if not dates:
+            return {}
+        set_codes = sorted({key[0] for key in self.keys})
+        set_of_key = np.array([set_codes.index(key[0]) for key in self.keys])
+        present = ~np.isnan(prices)
+        values = np.where(present, prices, 0.0)
+        # Per-date, per-set sums and counts in one pass each
+        sums = np.zeros((len(dates), len(set_codes)))
+        counts = np.zeros((len(dates), len(set_codes)))
+        for set_number in range(len(set_codes)):
+            columns = set_of_key == set_number
+            sums[:, set_number] = values[:, columns].sum(axis=1)
+            counts[:, set_number] = present[:, columns].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            daily = sums / counts
+
+        day_numbers = np.array([d.toordinal() for d in dates])
+        first = np.searchsorted(day_numbers, day_numbers - window + 1)
+        has_value = ~np.isnan(daily)
+        totals = np.vstack([np.zeros(len(set_codes)), np.cumsum(np.where(has_value, daily, 0.0), axis=0)])
+        seen = np.vstack([np.zeros(len(set_codes)), np.cumsum(has_value, axis=0)])
+        rows = np.arange(len(dates))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rolling = (totals[rows + 1] - totals[first]) / (seen[rows + 1] - seen[first])
+
+        keep = [row for row, d in enumerate(dates) if start is None or d >= start]
+        return {
+            set_code: [(dates[row], float(rolling[row, i])) for row in keep if not np.isnan(rolling[row, i])]
+            for i, set_code in enumerate(set_codes)
+        }
+
+    def portfolio_value(self, collection: Dict[Key, int], field: str = 'MarketPrice',
+                        on: Optional[date] = None) -> Tuple[float, Dict[Key, float]]:
+        """Total value of a collection {(set, number, variant): quantity} on a date (default: latest).
+
+        Uses each card's last recorded price on or before the date; cards
+        never priced are valued at 0 and left out of the breakdown.
+        """
+        dates, prices = self.frame(field, None, on)
+        if not dates:
+            return 0.0, {}
+        latest = self._forward_fill(prices)[-1]
+        keys = [key for key in collection if key in self.key_ids]
+        ids = np.array([self.key_ids[key] for key in keys], dtype=np.int64)
+        quantities = np.array([collection[key] for key in keys], dtype=np.float64)
+        values = latest[ids] * quantities if len(ids) else np.zeros(0)
+        breakdown = {key: float(value) for key, value in zip(keys, values) if not np.isnan(value)}
+        return float(np.nansum(values)), breakdown
+
+
+def load_collection(path) -> Dict[Key, int]:
+    """Read a collection CSV with Set, Number, Quantity and optional VariantType columns."""
+    collection: Dict[Key, int] = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            key = (row['Set'].upper(), row['Number'].zfill(3), row.get('VariantType') or 'Normal')
+            collection[key] = collection.get(key, 0) + int(row.get('Quantity') or 1)
+    return collection
+
+
+def parse_args(argv=None):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Record and analyze card price history.")
+    parser.add_argument('--history', default=str(Path("database") / HISTORY_FILE),
+                        help=f"history file (default: database/{HISTORY_FILE})")
+    parser.add_argument('--field', choices=PRICE_FIELDS, default='MarketPrice')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record = subparsers.add_parser('record', help="append today's prices from the card database")
+    record.add_argument('--db', default='database/swu_cards.json')
+    movers = subparsers.add_parser('movers', help="biggest price changes")
+    movers.add_argument('--days', type=int, default=7)
+    movers.add_argument('--limit', type=int, default=20)
+    movers.add_argument('--min-price', type=float, default=0.25)
+    sets = subparsers.add_parser('sets', help="rolling average price per set")
+    sets.add_argument('--window', type=int, default=7)
+    card = subparsers.add_parser('card', help="price history of one card")
+    card.add_argument('card', metavar='SET/NUMBER')
+    card.add_argument('--variant', default='Normal')
+    portfolio = subparsers.add_parser('portfolio', help="value of a collection CSV (Set, Number, Quantity)")
+    portfolio.add_argument('collection')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    history = PriceHistory(args.history)
+
+    if args.command == 'record':
+        with open(args.db, 'r', encoding='utf-8') as f:
+            rows = history.append(json.load(f))
+        print(f"Recorded {rows} prices in {history.path} ({len(history.dates)} dates)")
+    elif args.command == 'movers':
+        for move in history.movers(args.days, args.field, args.limit, min_price=args.min_price):
+            set_code, number, variant = move['key']
+            print(f"{set_code} #{number} ({variant}): ${move['before']:.2f} -> ${move['after']:.2f} "
+                  f"({move['percent']:+.1f}%)")
+    elif args.command == 'sets':
+        for set_code, points in history.set_averages(args.window, args.field).items():
+            if points:
+                print(f"{set_code}: ${points[-1][1]:.2f} ({args.window}-day average as of {points[-1][0]})")
+    elif args.command == 'card':
+        set_code, _, number = args.card.partition('/')
+        for day, price in history.series(set_code, number, args.variant, args.field):
+            print(f"{day}: ${price:.2f}")
+    elif args.command == 'portfolio':
+        total, breakdown = history.portfolio_value(load_collection(args.collection), args.field)
+        for (set_code, number, variant), value in sorted(breakdown.items(), key=lambda item: -item[1]):
+            print(f"{set_code} #{number} ({variant}): ${value:.2f}")
+        print(f"Total: ${total:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,717 @@
 import json
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from collections.abc import Mapping
+from graphlib import CycleError, TopologicalSorter
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, NamedTuple, Sequence, Tuple
+
+# Card fields with a posting list, and how their values are normalized.
+# Traits and keywords match case-insensitively; the others match exactly.
+POSTING_FIELDS = {
+    'Set': str.upper,
+    'Type': str,
+    'Rarity': str,
+    'Aspects': str,
+    'Traits': str.upper,
+    'Keywords': str.upper,
+    'Arenas': str,
+}
+
+def parse_cost(card: Dict[str, Any]) -> Optional[int]:
+    """Return a card's cost as an int (missing cost counts as 0), or None if it isn't numeric."""
+    try:
+        return int(card.get('Cost', 0))
+    except (ValueError, TypeError):
+        return None
+
+def card_number_key(set_code: str, number) -> Tuple[str, str]:
+    """Normalize a set code and card number to the (Set, Number) key stored on cards."""
+    return set_code.upper(), str(number).zfill(3)
+
+
+# Multi-valued card fields stored as bitsets in compact Card records
+BITSET_FIELDS = ('Aspects', 'Traits', 'Keywords', 'Arenas')
+
+
+class Vocabulary:
+    """Shared bit assignments for the values of one multi-valued field.
+    
+    A list of distinct values in bit order is stored as one int. Lists that
+    a bitset can't reproduce exactly (repeated values, such as a double
+    aspect, or an unusual order) are kept as shared tuples instead.
+    """
+    
+    def __init__(self):
+        self.values: List[str] = []
+        self.bits: Dict[str, int] = {}
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    
+    def learn(self, lists: Iterable[List[str]]) -> None:
+        """Add unseen values, in the order they usually appear within cards.
+        
+        Ordering bits the way the data is ordered lets almost every list be
+        stored as a bitset.
+        """
+        before = Counter()
+        seen = {}
+        for values in lists:
+            for i, value in enumerate(values):
+                seen.setdefault(value, None)
+                for later in values[i + 1:]:
+                    if later != value:
+                        before[value, later] += 1
+        
+        new_values = [value for value in seen if value not in self.bits]
+        graph = {value: set() for value in new_values}
+        for (first, second), count in before.items():
+            if second in graph and first in graph and count > before[second, first]:
+                graph[second].add(first)
+        try:
+            ordered = list(TopologicalSorter(graph).static_order())
+        except CycleError:
+            ordered = new_values
+        for value in ordered:
+            self.bits[value] = len(self.values)
+            self.values.append(value)
+    
+    def encode(self, values: List[str]):
+        """Return an int bitset for the list, or a shared tuple if a bitset can't represent it."""
+        if all(value in self.bits for value in values):
+            positions = [self.bits[value] for value in values]
+            if all(a < b for a, b in zip(positions, positions[1:])):
+                mask = 0
+                for position in positions:
+                    mask |= 1 << position
+                return mask
+        key = tuple(sys.intern(value) for value in values)
+        return self._tuples.setdefault(key, key)
+    
+    def decode(self, stored) -> List[str]:
+        if isinstance(stored, tuple):
+            return list(stored)
+        values = []
+        position = 0
+        while stored:
+            if stored & 1:
+                values.append(self.values[position])
+            stored >>= 1
+            position += 1
+        return values
+
+
+class CardLayout:
+    """The field names (in order) shared by every Card with the same keys."""
+    
+    __slots__ = ('keys', 'positions', 'codecs')
+    
+    def __init__(self, keys: Tuple[str, ...], vocabularies: Dict[str, Vocabulary]):
+        self.keys = keys
+        self.positions = {key: position for position, key in enumerate(keys)}
+        self.codecs = {position: vocabularies[key] for position, key in enumerate(keys) if key in vocabularies}
+
+
+class Card(Mapping):
+    """Compact, read-only card record with the same keys and values as the card dict.
+    
+    Each card holds a reference to a shared CardLayout and a tuple of
+    values; strings are interned and the BITSET_FIELDS are small ints
+    against shared vocabularies. It behaves like a read-only dict (get,
+    [], keys, items, ==), so print_card and other callers work unchanged;
+    use dict(card) for a mutable or JSON-serializable copy.
+    """
+    
+    __slots__ = ('_layout', '_values')
+    
+    def __init__(self, layout: CardLayout, values: Tuple[Any, ...]):
+        self._layout = layout
+        self._values = values
+    
+    def __getitem__(self, key: str) -> Any:
+        position = self._layout.positions[key]
+        value = self._values[position]
+        codec = self._layout.codecs.get(position)
+        if codec is not None and (type(value) is int or isinstance(value, tuple)):
+            return codec.decode(value)
+        return value
+    
+    def __iter__(self):
+        return iter(self._layout.keys)
+    
+    def __len__(self) -> int:
+        return len(self._layout.keys)
+    
+    def __repr__(self) -> str:
+        return f"Card({dict(self)!r})"
+
+
+class CardPacker:
+    """Converts card dicts to Card records sharing one set of vocabularies and layouts."""
+    
+    def __init__(self):
+        self.vocabularies = {field: Vocabulary() for field in BITSET_FIELDS}
+        self._layouts: Dict[Tuple[str, ...], CardLayout] = {}
+    
+    def pack_all(self, cards: Iterable[Dict[str, Any]]) -> List[Card]:
+        """Pack a batch of cards, first learning the vocabularies from it."""
+        cards = list(cards)
+        for field, vocabulary in self.vocabularies.items():
+            vocabulary.learn(card[field] for card in cards if isinstance(card.get(field), list))
+        return [self.pack(card) for card in cards]
+    
+    def pack(self, card: Dict[str, Any]) -> Card:
+        keys = tuple(sys.intern(key) for key in card)
+        layout = self._layouts.get(keys)
+        if layout is None:
+            layout = self._layouts[keys] = CardLayout(keys, self.vocabularies)
+        
+        values = []
+        for key, value in card.items():
+            if key in self.vocabularies and isinstance(value, list):
+                vocabulary = self.vocabularies[key]
+                if any(v not in vocabulary.bits for v in value):
+                    vocabulary.learn([value])
+                value = vocabulary.encode(value)
+            elif isinstance(value, str):
+                value = sys.intern(value)
+            values.append(value)
+        return Card(layout, tuple(values))
+
+
+class CardIndex:
+    """Lookup structures over a list of cards, built once at load time.
+    
+    Holds a hash index on (Set, Number), a posting list of card positions for
+    each value of the POSTING_FIELDS, and the cards' positions sorted by cost
+    for range queries. Posting lists are in card order, so results keep the
+    order of the underlying list.
+    """
+    
+    def __init__(self, cards: List[Dict[str, Any]], prebuilt: Optional[Dict[str, Any]] = None):
+        """Index a card list, or adopt indexes saved by to_prebuilt() without touching the cards."""
+        self.cards = cards
+        if prebuilt is not None:
+            self.by_key = {tuple(key.split('/', 1)): position for key, position in prebuilt['keys'].items()}
+            self.postings = prebuilt['postings']
+            self.cost_values = prebuilt['cost_values']
+            self.cost_positions = prebuilt['cost_positions']
+            return
+        
+        self.by_key: Dict[Tuple[str, str], int] = {}
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: defaultdict(list) for field in POSTING_FIELDS}
+        costed = []
+        
+        for position, card in enumerate(cards):
+            self.by_key.setdefault((card.get('Set'), card.get('Number')), position)
+            
+            for field, normalize in POSTING_FIELDS.items():
+                value = card.get(field)
+                if value is None:
+                    continue
+                values = value if isinstance(value, list) else [value]
+                # Some cards list an aspect twice; post each card once per value
+                for key in dict.fromkeys(normalize(v) for v in values):
+                    self.postings[field][key].append(position)
+            
+            cost = parse_cost(card)
+            if cost is not None:
+                costed.append((cost, position))
+        
+        costed.sort()
+        self.cost_values = [cost for cost, _ in costed]
+        self.cost_positions = [position for _, position in costed]
+    
+    def to_prebuilt(self) -> Dict[str, Any]:
+        """Export the indexes as JSON-serializable data for CardIndex(cards, prebuilt=...)."""
+        return {
+            'keys': {f"{set_code}/{number}": position for (set_code, number), position in self.by_key.items()},
+            'postings': {field: dict(postings) for field, postings in self.postings.items()},
+            'cost_values': self.cost_values,
+            'cost_positions': self.cost_positions,
+        }
+    
+    def lookup(self, set_code: str, number) -> Optional[Dict[str, Any]]:
+        """Get a card by set and number in O(1)."""
+        position = self.by_key.get(card_number_key(set_code, number))
+        return None if position is None else self.cards[position]
+    
+    def posting(self, field: str, value: str) -> List[int]:
+        """Positions of the cards whose `field` contains `value`."""
+        return self.postings[field].get(POSTING_FIELDS[field](value), [])
+    
+    def cost_range(self, min_cost: int, max_cost: int) -> List[int]:
+        """Positions of the cards costing between min_cost and max_cost, in card order."""
+        lo = bisect_left(self.cost_values, min_cost)
+        hi = bisect_right(self.cost_values, max_cost)
+        return sorted(self.cost_positions[lo:hi])
+    
+    def select(self, criteria: Dict[str, str], min_cost: Optional[int] = None,
+               max_cost: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Cards matching every {field: value} criterion and the cost range.
+        
+        Posting lists are intersected smallest-first, so a selective criterion
+        keeps the whole query cheap.
+        """
+        candidates = [self.posting(field, value) for field, value in criteria.items()]
+        if min_cost is not None or max_cost is not None:
+            candidates.append(self.cost_range(0 if min_cost is None else min_cost,
+                                              99 if max_cost is None else max_cost))
+        if not candidates:
+            return list(self.cards)
+        
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            if not positions:
+                break
+            other_set = set(other)
+            positions = [position for position in positions if position in other_set]
+        return [self.cards[position] for position in positions]
+
+
+class SetShards:
+    """Per-set card files from database/by_set, loaded when first needed.
+    
+    The manifest written by save_database lists the sets in database order.
+    Each set's file is loaded and indexed on first use; when the loaded
+    shards exceed `memory_budget` bytes (estimated from their file sizes),
+    the least recently used ones are dropped and reloaded on next use.
+    """
+    
+    def __init__(self, by_set_dir, memory_budget: Optional[int] = None, packer: Optional[CardPacker] = None):
+        self.by_set_dir = Path(by_set_dir)
+        self.memory_budget = memory_budget
+        self.packer = packer
+        with open(self.by_set_dir / "manifest.json", 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.manifest: Dict[str, Dict[str, Any]] = {entry['set']: entry for entry in manifest['sets']}
+        self._loaded: "OrderedDict[str, CardIndex]" = OrderedDict()
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def set_codes(self) -> List[str]:
+        return list(self.manifest)
+    
+    @property
+    def total_cards(self) -> int:
+        return sum(entry['cards'] for entry in self.manifest.values())
+    
+    def loaded_sets(self) -> List[str]:
+        """Sets currently in memory, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+    
+    def get(self, set_code: str) -> CardIndex:
+        """The index of one set's cards, loading the shard if needed."""
+        set_code = set_code.upper()
+        with self._lock:
+            if set_code in self._loaded:
+                self._loaded.move_to_end(set_code)
+                return self._loaded[set_code]
+        
+        entry = self.manifest.get(set_code)
+        if entry is None:
+            return CardIndex([])
+        with open(self.by_set_dir / entry['file'], 'r', encoding='utf-8') as f:
+            cards = json.load(f)
+        index = CardIndex(self.packer.pack_all(cards) if self.packer else cards)
+        
+        with self._lock:
+            if set_code not in self._loaded:
+                self._loaded[set_code] = index
+                self._loaded_bytes += entry['bytes']
+                self._evict(keep=set_code)
+            return self._loaded[set_code]
+    
+    def _evict(self, keep: str) -> None:
+        while self.memory_budget is not None and self._loaded_bytes > self.memory_budget and len(self._loaded) > 1:
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                break
+            del self._loaded[oldest]
+            self._loaded_bytes -= self.manifest[oldest]['bytes']
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    expired: int
+    evictions: int
+    reloads: int
+
+
+class QueryCache:
+    """Bounded LRU map of query keys to results, with an optional time-to-live.
+    
+    Safe to share between threads. Counts hits, misses, expired entries and
+    evictions so the size can be tuned (see SWUCardDatabase.cache_info).
+    """
+    
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = 0
+    
+    def get(self, key: Tuple[Any, ...]) -> Tuple[bool, Any]:
+        """(True, value) for a live entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# How often (seconds) a caching database checks whether its file was replaced
+SOURCE_CHECK_INTERVAL = 1.0
+
 
 class SWUCardDatabase:
     """Query interface for the Star Wars Unlimited card database."""
     
-    def __init__(self, db_path="database/swu_cards.json"):
-        """Load the card database."""
+    def __init__(self, db_path="database/swu_cards.json", use_snapshot: bool = True,
+                 lazy: bool = False, memory_budget_mb: Optional[float] = None, compact: bool = False,
+                 cache_size: int = 0, cache_ttl: Optional[float] = None, quiet: bool = False):
+        """Load the card database.
+        
+        If save_database wrote a binary snapshot next to the JSON file and it
+        is still current, cards are loaded lazily from it together with its
+        prebuilt indexes; otherwise the JSON file is parsed.
+        
+        With `lazy=True`, only the by_set manifest is read up front and each
+        set is loaded when a query first touches it (see SetShards), keeping
+        at most `memory_budget_mb` of shards in memory.
+        
+        With `compact=True`, cards are held as read-only Card records (see
+        Card), which take about half the memory of dicts.
+        
+        With `cache_size`, the results of up to that many distinct queries
+        (query and the filter_by_* methods, search_by_name, search_text,
+        filter_by_range, sort_by) are kept, least recently used first out,
+        each for at most `cache_ttl` seconds if given. Cached results are
+        tuples shared by every caller, so they can't be changed by
+        accident; combine with `compact=True` to make the cards read-only
+        too. While caching, the database file is checked for changes at most
+        once a second and the database is reloaded (and the cache emptied)
+        when it was replaced, e.g. by a new build.
+        
+        With `quiet=True`, loading and reloading print nothing (warnings
+        excepted), for servers and worker processes.
+        """
+        self._init_state(db_path, CardPacker() if compact else None, (use_snapshot, lazy, memory_budget_mb),
+                         cache_size, cache_ttl, quiet)
+        self._load()
+        self._source_version = self._read_source_version()
+    
+    def _init_state(self, db_path, packer: Optional[CardPacker] = None,
+                    load_options: Tuple[bool, bool, Optional[float]] = (True, False, None),
+                    cache_size: int = 0, cache_ttl: Optional[float] = None, quiet: bool = False) -> None:
+        """Set up the state every backend shares (subclasses call this instead of __init__)."""
         self.db_path = Path(db_path)
+        self.quiet = quiet
+        self.packer = packer
+        self._load_options = load_options
+        self._cache = QueryCache(cache_size, cache_ttl) if cache_size else None
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self._source_version = None
+        self._source_checked = time.monotonic()
+        self._reset_derived()
+    
+    def _reset_derived(self) -> None:
+        """Forget the structures built from the cards; they are rebuilt on first use."""
+        self._columns = None
+        self._search_index = None
+        self._deck_resolver = None
+    
+    def _load(self) -> None:
+        use_snapshot, lazy, memory_budget_mb = self._load_options
+        self._reset_derived()
+        
+        if lazy:
+            budget = None if memory_budget_mb is None else int(memory_budget_mb * 1024 * 1024)
+            self.shards: Optional[SetShards] = SetShards(self.db_path.parent / "by_set", budget, self.packer)
+            self._cards = None
+            self.index = None
+            if not self.quiet:
+                print(f"Found {self.shards.total_cards} cards in {len(self.shards.set_codes)} sets (loaded on demand)")
+            return
+        
+        self.shards = None
+        self._cards, prebuilt = self._load_cards(use_snapshot)
+        if self.packer:
+            self._cards = self.packer.pack_all(self._cards)
+        self.index = CardIndex(self._cards, prebuilt)
+        if not self.quiet:
+            print(f"Loaded {len(self._cards)} cards from database")
+    
+    @property
+    def source_path(self) -> Path:
+        """The file whose replacement means the database changed."""
+        return self.db_path.parent / "by_set" / "manifest.json" if self.shards is not None else self.db_path
+    
+    def _read_source_version(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.source_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    
+    def reload(self) -> None:
+        """Load the database from disk again and empty the query cache."""
+        with self._reload_lock:
+            self._load()
+            self._source_version = self._read_source_version()
+            self.reloads += 1
+            if self._cache is not None:
+                self._cache.clear()
+    
+    def _check_source(self) -> None:
+        """Reload if the database file was replaced since it was loaded (checked at most once a second)."""
+        now = time.monotonic()
+        if now - self._source_checked < SOURCE_CHECK_INTERVAL:
+            return
+        self._source_checked = now
+        version = self._read_source_version()
+        if version is not None and version != self._source_version:
+            self.reload()
+    
+    def _cached(self, key: Tuple[Any, ...], compute) -> Sequence[Dict[str, Any]]:
+        """compute() as a list, or with the cache on, a tuple remembered under `key`."""
+        if self._cache is None:
+            return compute()
+        self._check_source()
+        found, result = self._cache.get(key)
+        if not found:
+            result = tuple(compute())
+            self._cache.put(key, result)
+        return result
+    
+    def cache_info(self) -> CacheInfo:
+        """Hit, miss, size, expiry, eviction and reload counts of the query cache."""
+        cache = self._cache
+        if cache is None:
+            return CacheInfo(0, 0, 0, 0, 0, 0, self.reloads)
+        return CacheInfo(cache.hits, cache.misses, cache.maxsize, len(cache),
+                         cache.expired, cache.evictions, self.reloads)
+    
+    def cache_clear(self) -> None:
+        """Forget every cached result (the counters are kept)."""
+        if self._cache is not None:
+            self._cache.clear()
+    
+    @property
+    def cards(self):
+        """Every card, in database order. In lazy mode this loads every set."""
+        if self.shards is None:
+            return self._cards
+        return [card for index in self._indexes() for card in index.cards]
+    
+    def _indexes(self, set_code: Optional[str] = None):
+        """Yield the indexes a query has to look at: one per set in lazy mode."""
+        if self.shards is None:
+            yield self.index
+        elif set_code is not None:
+            yield self.shards.get(set_code)
+        else:
+            for code in self.shards.set_codes:
+                yield self.shards.get(code)
+    
+    def _load_cards(self, use_snapshot: bool):
+        """Return (cards, prebuilt index or None), preferring a valid snapshot."""
+        if use_snapshot:
+            # Imported here: card_snapshot itself imports this module
+            from card_snapshot import SnapshotCards, SnapshotError, snapshot_path_for
+            snapshot_path = snapshot_path_for(self.db_path)
+            if snapshot_path.exists():
+                try:
+                    cards = SnapshotCards(snapshot_path, self.db_path)
+                    return cards, cards.prebuilt_index()
+                except SnapshotError as e:
+                    print(f"Ignoring snapshot, loading JSON instead: {e}")
+        
         with open(self.db_path, 'r', encoding='utf-8') as f:
-            self.cards = json.load(f)
-        print(f"Loaded {len(self.cards)} cards from database")
+            return json.load(f), None
+    
+    @property
+    def columns(self):
+        """Typed columnar view of the cards (see card_columns.CardColumns), built on first use."""
+        if self._columns is None:
+            from card_columns import CardColumns
+            self._columns = CardColumns(self.cards)
+        return self._columns
     
     def get_card(self, set_code: str, number: str) -> Optional[Dict[str, Any]]:
         """Get a specific card by set and number."""
-        for card in self.cards:
-            if card.get('Set') == set_code.upper() and card.get('Number') == str(number).zfill(3):
-                return card
+        for index in self._indexes(set_code):
+            return index.lookup(set_code, number)
         return None
     
-    def search_by_name(self, name: str) -> List[Dict[str, Any]]:
+    def search_by_name(self, name: str) -> Sequence[Dict[str, Any]]:
         """Search for cards by name (case-insensitive, partial match)."""
         name_lower = name.lower()
-        return [card for card in self.cards 
-                if name_lower in card.get('Name', '').lower() 
-                or name_lower in card.get('Subtitle', '').lower()]
+        return self._cached(('name', name_lower), lambda: [
+            card for index in self._indexes() for card in index.cards
+            if name_lower in card.get('Name', '').lower() 
+            or name_lower in card.get('Subtitle', '').lower()])
+    
+    def search_text(self, query: str, limit: Optional[int] = 20) -> Sequence[Dict[str, Any]]:
+        """Ranked full-text search over names, subtitles and rules text.
+        
+        Tolerates typos and partial words, and supports phrases and AND/OR,
+        e.g. db.search_text('"When Played" AND shield'). See card_search.CardSearchIndex.
+        """
+        return self._cached(('text', query, limit),
+                            lambda: [card for card, _ in self.search_index.search(query, limit)])
     
-    def filter_by_set(self, set_code: str) -> List[Dict[str, Any]]:
+    @property
+    def search_index(self):
+        """Full-text index of the cards, built on first search."""
+        if self._search_index is None:
+            from card_search import CardSearchIndex
+            self._search_index = CardSearchIndex(self.cards)
+        return self._search_index
+    
+    def filter_by_set(self, set_code: str) -> Sequence[Dict[str, Any]]:
         """Get all cards from a specific set."""
-        return [card for card in self.cards if card.get('Set') == set_code.upper()]
+        return self.query(set_code=set_code)
     
-    def filter_by_type(self, card_type: str) -> List[Dict[str, Any]]:
+    def filter_by_type(self, card_type: str) -> Sequence[Dict[str, Any]]:
         """Filter cards by type (Leader, Unit, Base, Event, Upgrade)."""
-        return [card for card in self.cards if card.get('Type') == card_type]
+        return self.query(card_type=card_type)
     
-    def filter_by_rarity(self, rarity: str) -> List[Dict[str, Any]]:
+    def filter_by_rarity(self, rarity: str) -> Sequence[Dict[str, Any]]:
         """Filter cards by rarity."""
-        return [card for card in self.cards if card.get('Rarity') == rarity]
+        return self.query(rarity=rarity)
     
-    def filter_by_trait(self, trait: str) -> List[Dict[str, Any]]:
+    def filter_by_trait(self, trait: str) -> Sequence[Dict[str, Any]]:
         """Find cards with a specific trait."""
-        trait_upper = trait.upper()
-        return [card for card in self.cards 
-                if trait_upper in [t.upper() for t in card.get('Traits', [])]]
+        return self.query(trait=trait)
     
-    def filter_by_aspect(self, aspect: str) -> List[Dict[str, Any]]:
+    def filter_by_aspect(self, aspect: str) -> Sequence[Dict[str, Any]]:
         """Find cards with a specific aspect."""
-        return [card for card in self.cards 
-                if aspect in card.get('Aspects', [])]
+        return self.query(aspect=aspect)
+    
+    def filter_by_keyword(self, keyword: str) -> Sequence[Dict[str, Any]]:
+        """Find cards with a specific keyword (e.g. Sentinel, Ambush)."""
+        return self.query(keyword=keyword)
     
-    def filter_by_cost(self, min_cost: int = 0, max_cost: int = 99) -> List[Dict[str, Any]]:
+    def filter_by_arena(self, arena: str) -> Sequence[Dict[str, Any]]:
+        """Find cards in a specific arena (Ground, Space)."""
+        return self.query(arena=arena)
+    
+    def filter_by_cost(self, min_cost: int = 0, max_cost: int = 99) -> Sequence[Dict[str, Any]]:
         """Filter cards by cost range."""
-        results = []
-        for card in self.cards:
-            try:
-                cost = int(card.get('Cost', 0))
-                if min_cost <= cost <= max_cost:
-                    results.append(card)
-            except (ValueError, TypeError):
-                pass
-        return results
-    
-    def get_legendaries(self) -> List[Dict[str, Any]]:
+        return self.query(min_cost=min_cost, max_cost=max_cost)
+    
+    def query(self, set_code: Optional[str] = None, card_type: Optional[str] = None,
+              rarity: Optional[str] = None, aspect: Optional[str] = None,
+              trait: Optional[str] = None, keyword: Optional[str] = None,
+              arena: Optional[str] = None, min_cost: Optional[int] = None,
+              max_cost: Optional[int] = None) -> Sequence[Dict[str, Any]]:
+        """Find cards matching all of the given criteria.
+        
+        Example: db.query(trait="JEDI", card_type="Unit", max_cost=3)
+        """
+        criteria = {
+            'Set': set_code,
+            'Type': card_type,
+            'Rarity': rarity,
+            'Aspects': aspect,
+            'Traits': trait,
+            'Keywords': keyword,
+            'Arenas': arena,
+        }
+        criteria = {field: value for field, value in criteria.items() if value is not None}
+        compute = lambda: [card for index in self._indexes(set_code)
+                           for card in index.select(criteria, min_cost, max_cost)]
+        if self._cache is None:
+            return compute()
+        # Equivalent queries share an entry: values as the indexes normalize them, costs with their defaults
+        costs = (None, None) if min_cost is None and max_cost is None else \
+            (0 if min_cost is None else min_cost, 99 if max_cost is None else max_cost)
+        key = ('query', tuple((field, POSTING_FIELDS[field](value)) for field, value in criteria.items()), costs)
+        return self._cached(key, compute)
+    
+    def filter_by_range(self, field: str, low: Optional[float] = None,
+                        high: Optional[float] = None) -> Sequence[Dict[str, Any]]:
+        """Cards whose numeric field (Cost, Power, HP or a price) is within [low, high].
+        
+        Unlike filter_by_cost, cards without a value for the field are excluded.
+        """
+        def compute():
+            rows = self.columns.range_mask(field, low, high).nonzero()[0]
+            return [self.columns.cards[row] for row in rows]
+        return self._cached(('range', field, low, high), compute)
+    
+    def sort_by(self, field: str, descending: bool = False) -> Sequence[Dict[str, Any]]:
+        """Cards that have a numeric field, sorted by it (e.g. sort_by('MarketPrice', descending=True))."""
+        return self._cached(('sort', field, descending),
+                            lambda: [self.columns.cards[row] for row in self.columns.order_by(field, descending)])
+    
+    def aggregate(self, value_field: Optional[str], by: Iterable[str] = (),
+                  agg: str = 'mean') -> Dict[Tuple[Any, ...], float]:
+        """Group cards and aggregate a numeric field (count, sum, mean, min or max).
+        
+        Example: db.aggregate('Power', by=('Set', 'Cost')) gives the average
+        power per cost per set, keyed by (set, cost).
+        """
+        return self.columns.aggregate(value_field, tuple(by), agg)
+    
+    def get_legendaries(self) -> Sequence[Dict[str, Any]]:
         """Get all legendary cards."""
         return self.filter_by_rarity('Legendary')
     
-    def get_leaders(self) -> List[Dict[str, Any]]:
+    def get_leaders(self) -> Sequence[Dict[str, Any]]:
         """Get all leader cards."""
         return self.filter_by_type('Leader')
     
+    def resolve_decklists(self, decklists: Sequence[Any], deck_format: Optional[str] = None,
+                          workers: Optional[int] = None) -> List[Any]:
+        """Resolve decklists to cards in one batch; returns a decklists.ResolvedDeck per decklist.
+        
+        Decklists may be text ("3 Darth Vader, Dark Lord of the Sith" or
+        "3x SOR/010" per line), SWUDB JSON dicts, or lists of entries (see
+        decklists.DeckResolver.entries). Each comes back with its leaders,
+        base, cards, unknown entries, cost curve, aspect coverage and total
+        MarketPrice, and with `deck_format` ('premier' or 'twin_suns') its
+        rule problems. Very large batches are spread over `workers`
+        processes.
+        """
+        from decklists import DeckResolver, resolve_decklists
+        if self._deck_resolver is None:
+            self._deck_resolver = DeckResolver(self.cards)
+        return resolve_decklists(self, decklists, deck_format, workers, self._deck_resolver)
+    
     def print_card(self, card: Dict[str, Any]) -> None:
         """Pretty print a card's details."""
         print("=" * 60)
@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+# Responses worth retrying: rate limited, or the server (or a proxy) struggling
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_RETRIES = 4
+BACKOFF_BASE = 0.5      # seconds before the first retry (on average 3/4 of this)
+BACKOFF_CAP = 30.0
+MAX_RETRY_AFTER = 120.0  # longest Retry-After honored; anything longer gives up on the request
+
+# AIMD: halve the limit on congestion, add one per window of good responses
+DECREASE_FACTOR = 0.5
+LATENCY_TOLERANCE = 2.0  # congested when recent latency is this many times the long-run average
+LATENCY_MIN_SAMPLES = 20
+FAST_EWMA = 0.3
+SLOW_EWMA = 0.05
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 15.0
+CIRCUIT_PROBE_WAIT = 1.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = BACKOFF_BASE,
+                  cap: float = BACKOFF_CAP, rng: Callable[[float, float], float] = random.uniform) -> float:
+    """Seconds to wait before retry number `attempt` (0-based).
+
+    Exponential backoff with "equal jitter" (between half and all of
+    base * 2**attempt), so workers that failed together don't retry
+    together. A server's Retry-After is a lower bound.
+    """
+    ceiling = min(cap, base * 2 ** attempt)
+    delay = rng(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of requests in flight.
+
+    Each window of `limit` good responses raises the limit by one, up to
+    `max_limit`. A rate-limit or server error, a network error, or recent
+    latency (a fast moving average) climbing to LATENCY_TOLERANCE times
+    its long-run average halves it, at most once per window so one burst
+    of errors counts once. Callers bracket each request with acquire() and
+    release().
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, initial: Optional[int] = None,
+                 on_change: Optional[Callable[[int], None]] = None):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(initial or self.max_limit)
+        self.in_flight = 0
+        self.on_change = on_change
+        self._cond = threading.Condition()
+        self._good = 0
+        self._since_decrease = None
+        self._fast: Optional[float] = None
+        self._slow: Optional[float] = None
+        self._samples = 0
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None, congested: bool = False) -> None:
+        """Return a slot, with the request's latency and whether it was refused or failed."""
+        with self._cond:
+            self.in_flight -= 1
+            if latency is not None and not congested:
+                congested = self._latency_congested(latency)
+            before = int(self.limit)
+            if self._since_decrease is not None:
+                self._since_decrease += 1
+            if congested:
+                self._good = 0
+                if self._since_decrease is None or self._since_decrease >= before:
+                    self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                    self._since_decrease = 0
+            else:
+                self._good += 1
+                if self._good >= before:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self._good = 0
+            changed = int(self.limit) != before
+            self._cond.notify_all()
+        if changed and self.on_change:
+            self.on_change(int(self.limit))
+
+    def _latency_congested(self, latency: float) -> bool:
+        self._samples += 1
+        self._fast = latency if self._fast is None else self._fast + FAST_EWMA * (latency - self._fast)
+        if self._slow is not None and self._samples >= LATENCY_MIN_SAMPLES \
+                and self._fast > LATENCY_TOLERANCE * self._slow:
+            return True
+        # Only unremarkable responses move the baseline, so a slowdown can't hide itself
+        self._slow = latency if self._slow is None else self._slow + SLOW_EWMA * (latency - self._slow)
+        return False
+
+
+class CircuitOpenError(Exception):
+    """Requests to a host are suspended after repeated failures."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host}, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host that keeps failing.
+
+    After CIRCUIT_FAILURE_THRESHOLD failures in a row the circuit opens and
+    requests fail fast with CircuitOpenError for `reset_timeout` seconds.
+    Then one probe request is let through: success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, host: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, on_open: Optional[Callable[[str], None]] = None):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_open = on_open
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(self.host, remaining)
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(self.host, CIRCUIT_PROBE_WAIT)
+
+    def record(self, success: bool) -> None:
+        opened = False
+        with self._lock:
+            if success:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                opened = True
+        if opened and self.on_open:
+            self.on_open(self.host)
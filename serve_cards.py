@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import contextlib
+import gzip
+import json
+import math
+import signal
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from card_snapshot import file_digest
+from query_cards import QueryCache, SWUCardDatabase
+from stats_cube import CUBE_FILE, DIMENSIONS, StatsCube
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_DB_PATH = "database/swu_cards.json"
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+RESPONSE_CACHE_SIZE = 1024   # encoded responses kept per database version
+GZIP_MIN_BYTES = 1024        # smaller bodies are sent uncompressed
+GZIP_LEVEL = 6
+
+RELOAD_CHECK_INTERVAL = 1.0  # seconds between checks of the database file
+KEEPALIVE_TIMEOUT = 15.0
+SHUTDOWN_GRACE = 5.0         # seconds in-flight requests get to finish on shutdown
+MAX_HEADER_BYTES = 16 * 1024
+
+# Query parameters of /cards and /leaders, by SWUCardDatabase.query argument
+FILTER_PARAMS = {'set': 'set_code', 'type': 'card_type', 'rarity': 'rarity', 'aspect': 'aspect',
+                 'trait': 'trait', 'keyword': 'keyword', 'arena': 'arena'}
+COST_PARAMS = ('min_cost', 'max_cost')
+SEARCH_PARAMS = set(FILTER_PARAMS) | set(COST_PARAMS) | {'name', 'q', 'page', 'per_page'}
+
+# Query parameters of /stats, by statistics cube dimension
+STATS_PARAMS = {dimension.lower(): dimension for dimension in DIMENSIONS}
+
+
+class BadRequest(ValueError):
+    """A request the client has to fix (answered with 400)."""
+
+
+class NotFound(LookupError):
+    """Answered with 404."""
+
+
+class LoadedDatabase:
+    """One loaded version of the database with its indexes built, shared read-only by requests."""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.source_version = source_version(self.db_path)
+        self.digest = file_digest(self.db_path).hex()
+        self.version = self.digest[:16]
+        self.db = SWUCardDatabase(self.db_path, quiet=True)
+        self.cards = self.db.cards
+        # Built now rather than on the first request that needs them
+        self.db.search_index
+        self.cube = StatsCube.load(self.db_path.parent / CUBE_FILE, self.digest) or StatsCube(self.cards)
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.etag = f'"{self.version}"'
+        self.etag_gzip = f'"{self.version}-gz"'
+
+
+def source_version(path) -> Optional[Tuple[int, int, int]]:
+    """(mtime, size, inode) of a file, which changes whenever it is replaced; None if it is missing."""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _page(items, params) -> Dict[str, Any]:
+    try:
+        page = int(params.get('page', 1))
+        per_page = int(params.get('per_page', DEFAULT_PER_PAGE))
+    except ValueError:
+        raise BadRequest("page and per_page must be integers")
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        raise BadRequest(f"page must be >= 1 and per_page between 1 and {MAX_PER_PAGE}")
+    start = (page - 1) * per_page
+    return {'total': len(items), 'page': page, 'per_page': per_page,
+            'pages': math.ceil(len(items) / per_page), 'cards': [dict(card) for card in items[start:start + per_page]]}
+
+
+class CardService:
+    """Read-only HTTP/1.1 API over the card database.
+
+    Endpoints (GET or HEAD, JSON responses):
+      /health                      database version, card count, load time, reload count
+      /cards/<set>/<number>        one card
+      /cards?<filters>             matching cards, paginated
+      /leaders?<filters>           leaders only, same filters
+      /stats?<dimensions>          card counts by set, type, rarity, aspect and arena
+
+    Filters are set, type, rarity, aspect, trait, keyword, arena, min_cost,
+    max_cost, name (substring of the name or subtitle) and q (ranked
+    full-text search, see SWUCardDatabase.search_text), with page and
+    per_page. /stats takes set, type, rarity, aspect, arena and cost to
+    slice the counts.
+
+    The database is loaded once, with its indexes and statistics cube, and
+    requests are answered on the event loop from memory. Encoded (and
+    gzipped) responses are kept in an LRU keyed on the database version
+    and URL. ETags are the database version, so clients revalidate with
+    If-None-Match and get 304 until the database changes. When the
+    database file is replaced, the new version is loaded on a worker
+    thread and swapped in between requests; requests already running
+    finish on the version they started with.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, cache_size: int = RESPONSE_CACHE_SIZE,
+                 reload_interval: Optional[float] = RELOAD_CHECK_INTERVAL):
+        self.db_path = Path(db_path)
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.current = LoadedDatabase(self.db_path)
+        self.responses = QueryCache(cache_size)
+        self.reloads = 0
+        self.requests = 0
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def watch(self) -> None:
+        """Reload the database whenever its file is replaced (runs until cancelled)."""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            version = source_version(self.db_path)
+            if version is None or version == self.current.source_version:
+                continue
+            try:
+                loaded = await asyncio.to_thread(LoadedDatabase, self.db_path)
+            except (OSError, ValueError) as e:
+                # Most likely caught mid-write; the next check tries again
+                print(f"Reload failed, still serving {self.current.version}: {e}")
+                continue
+            if loaded.digest == self.current.digest:
+                # Rewritten with the same content
+                self.current.source_version = loaded.source_version
+                continue
+            self.current = loaded
+            self.responses = QueryCache(self.cache_size)
+            self.reloads += 1
+            print(f"Reloaded database: version {loaded.version}, {len(loaded.cards)} cards")
+
+    # --- routing ---
+
+    def route(self, loaded: LoadedDatabase, path: str, params: Dict[str, str]):
+        """The JSON-serializable body for a request; raises BadRequest or NotFound."""
+        parts = [unquote(part) for part in path.strip('/').split('/') if part]
+        if parts == ['health'] or not parts:
+            return {'version': loaded.version, 'cards': len(loaded.cards), 'loaded_at': loaded.loaded_at,
+                    'reloads': self.reloads}
+        if parts == ['cards']:
+            return self.search(loaded, params)
+        if parts == ['leaders']:
+            if 'type' in params:
+                raise BadRequest("/leaders does not take type")
+            return self.search(loaded, {**params, 'type': 'Leader'})
+        if len(parts) == 3 and parts[0] == 'cards':
+            self._check_params(params, ())
+            card = loaded.db.get_card(parts[1], parts[2])
+            if card is None:
+                raise NotFound(f"no card {parts[1].upper()}/{parts[2]}")
+            return dict(card)
+        if parts == ['stats']:
+            return self.stats(loaded, params)
+        raise NotFound(f"no such endpoint: {path}")
+
+    @staticmethod
+    def _check_params(params, allowed) -> None:
+        unknown = sorted(set(params) - set(allowed))
+        if unknown:
+            raise BadRequest(f"unknown parameter {unknown[0]!r}")
+
+    def search(self, loaded: LoadedDatabase, params: Dict[str, str]) -> Dict[str, Any]:
+        self._check_params(params, SEARCH_PARAMS)
+        db = loaded.db
+        criteria = {FILTER_PARAMS[name]: value for name, value in params.items() if name in FILTER_PARAMS}
+        try:
+            criteria.update({name: int(params[name]) for name in COST_PARAMS if name in params})
+        except ValueError:
+            raise BadRequest("min_cost and max_cost must be integers")
+
+        results = db.query(**criteria)
+        if 'name' in params:
+            named = {id(card) for card in db.search_by_name(params['name'])}
+            results = [card for card in results if id(card) in named]
+        if 'q' in params:
+            # Ranked order of the text search, restricted to the other filters
+            allowed = {id(card) for card in results}
+            results = [card for card in db.search_text(params['q'], limit=None) if id(card) in allowed]
+        return _page(results, params)
+
+    def stats(self, loaded: LoadedDatabase, params: Dict[str, str]) -> Dict[str, Any]:
+        self._check_params(params, STATS_PARAMS)
+        where = {STATS_PARAMS[name]: value for name, value in params.items()}
+        if 'Cost' in where and where['Cost'].isdigit():
+            where['Cost'] = int(where['Cost'])
+        cube = loaded.cube
+        return {
+            'total_cards': cube.count(**where),
+            'by_set': cube.counts_by('Set', **where),
+            'by_type': cube.counts_by('Type', **where),
+            'by_rarity': cube.counts_by('Rarity', **where),
+            'by_aspect': cube.counts_by('Aspect', **where),
+            'by_arena': cube.counts_by('Arena', **where),
+        }
+
+    # --- HTTP ---
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """(status, headers, body) for one request."""
+        if method not in ('GET', 'HEAD'):
+            return self._error(HTTPStatus.METHOD_NOT_ALLOWED, "only GET and HEAD are supported", {'Allow': 'GET, HEAD'})
+
+        # Held for the whole request, so a reload can't change the version underneath it
+        loaded = self.current
+        use_gzip = 'gzip' in headers.get('accept-encoding', '')
+        etag = loaded.etag_gzip if use_gzip else loaded.etag
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding',
+                            'X-Database-Version': loaded.version}
+
+        if_none_match = headers.get('if-none-match')
+        if if_none_match and (if_none_match.strip() == '*' or
+                              {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+                              & {loaded.etag, loaded.etag_gzip}):
+            return HTTPStatus.NOT_MODIFIED, response_headers, b""
+
+        key = (loaded.version, target, use_gzip)
+        found, cached = self.responses.get(key)
+        if found:
+            status, body, encoding = cached
+        else:
+            url = urlsplit(target)
+            try:
+                status, payload = HTTPStatus.OK, self.route(loaded, url.path, dict(parse_qsl(url.query)))
+            except BadRequest as e:
+                status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+            except NotFound as e:
+                status, payload = HTTPStatus.NOT_FOUND, {'error': str(e)}
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            encoding = None
+            if use_gzip and len(body) >= GZIP_MIN_BYTES:
+                body = gzip.compress(body, GZIP_LEVEL)
+                encoding = 'gzip'
+            self.responses.put(key, (status, body, encoding))
+
+        response_headers['Content-Type'] = 'application/json; charset=utf-8'
+        if encoding:
+            response_headers['Content-Encoding'] = encoding
+        return status, response_headers, body
+
+    @staticmethod
+    def _error(status, message, headers=None):
+        body = json.dumps({'error': message}).encode('utf-8')
+        return status, {'Content-Type': 'application/json; charset=utf-8', **(headers or {})}, body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one keep-alive connection until the client closes it or goes idle."""
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                self._in_flight += 1
+                self._idle.clear()
+                try:
+                    keep_alive = await self._serve_one(head, reader, writer)
+                finally:
+                    self._in_flight -= 1
+                    if not self._in_flight:
+                        self._idle.set()
+                if not keep_alive:
+                    break
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _serve_one(self, head: bytes, reader, writer) -> bool:
+        started = time.perf_counter()
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            await self._send(writer, *self._error(HTTPStatus.BAD_REQUEST, "malformed request line"), head_only=False,
+                             keep_alive=False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            await self._send(writer, *self._error(HTTPStatus.BAD_REQUEST, "invalid Content-Length"), head_only=False,
+                             keep_alive=False)
+            return False
+        if length:
+            try:
+                await reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                return False
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        self.requests += 1
+        try:
+            status, response_headers, body = self.respond(method, target, headers)
+        except Exception as e:
+            print(f"Error serving {method} {target}: {e!r}")
+            status, response_headers, body = self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "internal error")
+        response_headers['X-Response-Time'] = f"{(time.perf_counter() - started) * 1000:.2f}ms"
+        await self._send(writer, status, response_headers, body, head_only=method == 'HEAD', keep_alive=keep_alive)
+        return keep_alive
+
+    @staticmethod
+    async def _send(writer, status, headers, body, head_only, keep_alive) -> None:
+        status = HTTPStatus(status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if not head_only and status != HTTPStatus.NOT_MODIFIED:
+            writer.write(body)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready=None) -> None:
+        """Serve until SIGINT/SIGTERM, then let in-flight requests finish (up to SHUTDOWN_GRACE seconds)."""
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        address = server.sockets[0].getsockname()
+        print(f"Serving {len(self.current.cards)} cards (version {self.current.version}) "
+              f"on http://{address[0]}:{address[1]}")
+        if ready is not None:
+            ready(address)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(signum, stop.set)
+        watcher = asyncio.create_task(self.watch()) if self.reload_interval else None
+
+        try:
+            await stop.wait()
+        finally:
+            print(f"Shutting down after {self.requests} requests...")
+            server.close()
+            if watcher is not None:
+                watcher.cancel()
+            if self._in_flight:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._idle.wait(), SHUTDOWN_GRACE)
+            # Idle keep-alive connections see EOF and their handlers return
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await server.wait_closed()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the card database over HTTP (read-only JSON API)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT}; 0 picks one)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f"database JSON file (default: {DEFAULT_DB_PATH})")
+    parser.add_argument('--cache-size', type=int, default=RESPONSE_CACHE_SIZE,
+                        help=f"encoded responses to keep (default: {RESPONSE_CACHE_SIZE})")
+    parser.add_argument('--no-reload', action='store_true', help="don't reload when the database file changes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Loading {args.db}...")
+    service = CardService(args.db, args.cache_size, None if args.no_reload else RELOAD_CHECK_INTERVAL)
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import pickle
+from collections import Counter
+from itertools import product
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+# Cube dimensions. Aspect and Arena are multi-valued: a card counts once
+# under each of its aspects (and arenas), and once in every roll-up that
+# leaves them out.
+DIMENSIONS = ('Set', 'Type', 'Rarity', 'Aspect', 'Arena', 'Cost')
+
+# Numeric fields with count/sum/min/max in every cell
+MEASURES = ('Power', 'HP', 'MarketPrice')
+
+# Sums and means are rounded to this many decimals, hiding float drift from adding and removing cards
+SUM_DIGITS = 6
+
+# Dimension value of cards without the field
+MISSING = 'N/A'
+
+CUBE_FILE = "stats_cube.pickle"
+
+# Bumped when the pickled layout changes; older files are rebuilt
+CUBE_VERSION = 2
+
+# Roll-up i keeps the dimensions whose bit is set in i; these are their positions
+ROLLUP_POSITIONS = [tuple(d for d in range(len(DIMENSIONS)) if mask & (1 << d)) for mask in range(1 << len(DIMENSIONS))]
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def card_coordinates(card: Dict[str, Any]) -> Tuple[Tuple[Any, ...], ...]:
+    """The values a card has along each dimension (several for Aspect and Arena)."""
+    try:
+        cost = int(card['Cost'])
+    except (KeyError, ValueError, TypeError):
+        cost = MISSING
+    return (
+        (card.get('Set') or MISSING,),
+        (card.get('Type') or MISSING,),
+        (card.get('Rarity') or MISSING,),
+        tuple(dict.fromkeys(card.get('Aspects') or [])) or (MISSING,),
+        tuple(dict.fromkeys(card.get('Arenas') or [])) or (MISSING,),
+        (cost,),
+    )
+
+
+def card_measures(card: Dict[str, Any]) -> Tuple[Optional[float], ...]:
+    """The card's value of each measure, None where it has none."""
+    return tuple(_number(card.get(measure)) for measure in MEASURES)
+
+
+def rollup_keys(coordinates: Tuple[Tuple[Any, ...], ...], positions: Tuple[int, ...]) -> List[Tuple[Any, ...]]:
+    """Keys of the cells a card with these coordinates is in, in the roll-up keeping `positions`."""
+    if all(len(coordinates[i]) == 1 for i in positions):
+        return [tuple(coordinates[i][0] for i in positions)]
+    return list(product(*(coordinates[i] for i in positions)))
+
+
+class Cell:
+    """Aggregates of the cards in one cube cell: their number and, per
+    measure, the count, sum, min and max of the values they have."""
+
+    __slots__ = ('count', 'counts', 'sums', 'mins', 'maxes')
+
+    def __init__(self):
+        self.count = 0
+        self.counts = [0] * len(MEASURES)
+        self.sums = [0.0] * len(MEASURES)
+        self.mins: List[Optional[float]] = [None] * len(MEASURES)
+        self.maxes: List[Optional[float]] = [None] * len(MEASURES)
+
+    def add(self, measures: Tuple[Optional[float], ...], times: int = 1) -> None:
+        """Add `times` cards with these measure values."""
+        self.count += times
+        for i, value in enumerate(measures):
+            if value is None:
+                continue
+            self.counts[i] += times
+            self.sums[i] += value * times
+            if self.mins[i] is None or value < self.mins[i]:
+                self.mins[i] = value
+            if self.maxes[i] is None or value > self.maxes[i]:
+                self.maxes[i] = value
+
+    def remove(self, measures: Tuple[Optional[float], ...]) -> bool:
+        """Take one card out; False if it held a min or max, which then has to be rebuilt."""
+        self.count -= 1
+        exact = True
+        for i, value in enumerate(measures):
+            if value is None:
+                continue
+            self.counts[i] -= 1
+            self.sums[i] -= value
+            if value == self.mins[i] or value == self.maxes[i]:
+                exact = False
+        return exact
+
+    def measure(self, measure: str) -> Dict[str, Any]:
+        """count/sum/min/max/mean of one measure over the cards that have it."""
+        i = MEASURES.index(measure)
+        count = self.counts[i]
+        total = round(self.sums[i], SUM_DIGITS)
+        return {
+            'count': count,
+            'sum': total,
+            'min': self.mins[i],
+            'max': self.maxes[i],
+            'mean': round(total / count, SUM_DIGITS) if count else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, **{measure: self.measure(measure) for measure in MEASURES}}
+
+
+class StatsCube:
+    """Aggregates over Set x Type x Rarity x Aspect x Arena x Cost.
+
+    The cube keeps each distinct (coordinates, measures) combination of
+    its cards with a multiplicity, and builds a roll-up (the cells over
+    one subset of the dimensions) the first time a query needs it; only
+    the roll-ups actually queried are ever built. Once built, a point
+    query such as the number of Heroism units in SOR or the average price
+    of Legendary cards costing 5 is a single dict lookup. add()/remove()/
+    update() change the cells a card touches in the roll-ups built so
+    far, so a sync doesn't recompute the cube.
+
+        cube = StatsCube(cards)
+        cube.count(Set='SOR', Aspect='Heroism')
+        cube.group_by('Set', 'Cost', Type='Unit')   # {(set, cost): Cell}
+    """
+
+    def __init__(self, cards: Iterable[Dict[str, Any]] = ()):
+        self.version = CUBE_VERSION
+        self.source_digest: Optional[str] = None
+        self.total = 0
+        self.facts: Counter = Counter()
+        self.rollups: Dict[int, Dict[Tuple[Any, ...], Cell]] = {}
+        for card in cards:
+            self.facts[card_coordinates(card), card_measures(card)] += 1
+            self.total += 1
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Roll-ups are rebuilt on demand, so only the facts are saved
+        return {**self.__dict__, 'rollups': {}}
+
+    @staticmethod
+    def _mask(dimensions: Iterable[str]) -> int:
+        mask = 0
+        for dimension in dimensions:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension {dimension!r}; expected one of {', '.join(DIMENSIONS)}")
+            mask |= 1 << DIMENSIONS.index(dimension)
+        return mask
+
+    @staticmethod
+    def _dimensions(mask: int) -> Tuple[str, ...]:
+        return tuple(dimension for i, dimension in enumerate(DIMENSIONS) if mask & (1 << i))
+
+    def rollup(self, mask: int) -> Dict[Tuple[Any, ...], Cell]:
+        """The cells of roll-up `mask`, built from the facts on first use."""
+        cells = self.rollups.get(mask)
+        if cells is None:
+            cells = {}
+            positions = ROLLUP_POSITIONS[mask]
+            for (coordinates, measures), times in self.facts.items():
+                for key in rollup_keys(coordinates, positions):
+                    cell = cells.get(key)
+                    if cell is None:
+                        cell = cells[key] = Cell()
+                    cell.add(measures, times)
+            self.rollups[mask] = cells
+        return cells
+
+    def add(self, card: Dict[str, Any]) -> None:
+        coordinates, measures = card_coordinates(card), card_measures(card)
+        self.facts[coordinates, measures] += 1
+        self.total += 1
+        for mask, cells in self.rollups.items():
+            for key in rollup_keys(coordinates, ROLLUP_POSITIONS[mask]):
+                cell = cells.get(key)
+                if cell is None:
+                    cell = cells[key] = Cell()
+                cell.add(measures)
+
+    def remove(self, card: Dict[str, Any]) -> None:
+        """Take a previously added card (the same version of it) out of the cube."""
+        coordinates, measures = card_coordinates(card), card_measures(card)
+        fact = (coordinates, measures)
+        self.facts[fact] -= 1
+        if not self.facts[fact]:
+            del self.facts[fact]
+        self.total -= 1
+        stale = []
+        for mask, cells in self.rollups.items():
+            for key in rollup_keys(coordinates, ROLLUP_POSITIONS[mask]):
+                cell = cells[key]
+                if not cell.remove(measures):
+                    stale.append(mask)
+                if not cell.count:
+                    del cells[key]
+        # Roll-ups that lost a min or max are rebuilt on their next query
+        for mask in stale:
+            self.rollups.pop(mask, None)
+
+    def update(self, old_card: Optional[Dict[str, Any]], new_card: Dict[str, Any]) -> None:
+        """Replace a card by its new version (old_card None for a new card)."""
+        if old_card is not None:
+            self.remove(old_card)
+        self.add(new_card)
+
+    def cell(self, **where: Any) -> Optional[Cell]:
+        """The cell for fixed values of some dimensions (all others rolled up), e.g. cell(Set='SOR', Cost=3)."""
+        key = tuple(where[dimension] for dimension in DIMENSIONS if dimension in where)
+        return self.rollup(self._mask(where)).get(key)
+
+    def count(self, **where: Any) -> int:
+        """Number of cards matching the fixed dimension values."""
+        if not where:
+            return self.total
+        cell = self.cell(**where)
+        return cell.count if cell else 0
+
+    def group_by(self, *dimensions: str, **where: Any) -> Dict[Tuple[Any, ...], Cell]:
+        """Cells of the roll-up over `dimensions`, keyed in that order, sliced by `where`.
+
+        With `where`, this scans the roll-up over `dimensions` and the
+        `where` dimensions together, so it takes time in the size of that
+        roll-up, not of the result.
+        """
+        mask = self._mask(dimensions) | self._mask(where)
+        columns = self._dimensions(mask)
+        group_positions = [columns.index(dimension) for dimension in dimensions]
+        filters = [(columns.index(dimension), value) for dimension, value in where.items()]
+        return {
+            tuple(key[i] for i in group_positions): cell
+            for key, cell in self.rollup(mask).items()
+            if all(key[i] == value for i, value in filters)
+        }
+
+    def counts_by(self, dimension: str, **where: Any) -> Dict[Any, int]:
+        """{value: number of cards} along one dimension."""
+        return {key[0]: cell.count for key, cell in self.group_by(dimension, **where).items()}
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path, source_digest: Optional[str] = None) -> Optional['StatsCube']:
+        """The saved cube, or None if it is missing, unreadable, outdated or not built from `source_digest`."""
+        try:
+            with open(path, 'rb') as f:
+                cube = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(cube, cls) or getattr(cube, 'version', None) != CUBE_VERSION:
+            return None
+        if source_digest is not None and cube.source_digest != source_digest:
+            return None
+        return cube
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    json_path = Path(sys.argv[1] if len(sys.argv) > 1 else "database/swu_cards.json")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        cube = StatsCube(json.load(f))
+    for dimension in DIMENSIONS:
+        print(f"{dimension}: {cube.counts_by(dimension)}")